@@ -1,6 +1,9 @@
 from django.contrib import admin
 
-from .models import Warehouse, Zone, StockMovement
+from .models import (
+    ExportJob, ImportJob, Warehouse, Zone, StockMovement, StockMovementArchive, StockMovementLine, StockMovementLineArchive, ZoneBalance,
+    ZoneProductBalance, MovementRollup,
+)
 
 @admin.register(Warehouse)
 class WarehouseAdmin(admin.ModelAdmin):
@@ -10,13 +13,66 @@ class WarehouseAdmin(admin.ModelAdmin):
 
 @admin.register(Zone)
 class ZoneAdmin(admin.ModelAdmin):
-    list_display = ['warehouse', 'name', 'code', 'zone_type', 'created_at']
+    list_display = ['warehouse', 'name', 'code', 'zone_type', 'parent', 'depth', 'created_at']
     search_fields = ['name', 'code', 'zone_type']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['created_at', 'updated_at', 'path', 'depth']
+    raw_id_fields = ['parent']
+
+class StockMovementLineInline(admin.TabularInline):
+    model = StockMovementLine
+    fields = ['product_ref', 'lot', 'serial', 'quantity', 'unit']
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
 
 @admin.register(StockMovement)
 class StockMovementAdmin(admin.ModelAdmin):
     list_display = ['reference', 'movement_type', 'source_zone', 'dest_zone', 'quantity', 'created_at']
     search_fields = ['reference', 'movement_type', 'notes', 'status']
     readonly_fields = ['created_at', 'updated_at']
+    inlines = [StockMovementLineInline]
+
+class StockMovementLineArchiveInline(StockMovementLineInline):
+    model = StockMovementLineArchive
+
+@admin.register(StockMovementArchive)
+class StockMovementArchiveAdmin(admin.ModelAdmin):
+    list_display = ['reference', 'movement_type', 'status', 'quantity', 'created_at']
+    search_fields = ['reference', 'notes']
+    inlines = [StockMovementLineArchiveInline]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ZoneBalance)
+class ZoneBalanceAdmin(admin.ModelAdmin):
+    list_display = ['zone', 'on_hand', 'last_movement_at', 'updated_at']
+    readonly_fields = ['created_at', 'updated_at', 'last_movement_id', 'last_movement_at']
+
+@admin.register(ZoneProductBalance)
+class ZoneProductBalanceAdmin(admin.ModelAdmin):
+    list_display = ['product_ref', 'lot', 'zone', 'on_hand', 'updated_at']
+    search_fields = ['product_ref', 'lot']
+    readonly_fields = ['created_at', 'updated_at']
+
+@admin.register(MovementRollup)
+class MovementRollupAdmin(admin.ModelAdmin):
+    list_display = ['period', 'bucket', 'zone_id', 'direction', 'movement_type', 'status', 'quantity', 'movement_count']
+    list_filter = ['period', 'direction', 'movement_type']
+    readonly_fields = ['created_at', 'updated_at']
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'export_format', 'status', 'rows_written', 'total_rows', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind', 'export_format']
+    readonly_fields = ['created_at', 'updated_at', 'started_at', 'finished_at']
 
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'status', 'rows_created', 'rows_rejected', 'created_at', 'finished_at']
+    list_filter = ['status']
+    readonly_fields = ['created_at', 'updated_at', 'started_at', 'finished_at']
@@ -13,27 +13,36 @@ CONTEXT = """
 - Represents a physical storage facility.
 
 **Zone**
-- `warehouse` (FK → Warehouse), `name` (str), `code` (str), `zone_type` (str, default 'storage')
-- Sub-areas within a warehouse (e.g. receiving, storage, dispatch). zone_type is free text.
+- `warehouse` (FK → Warehouse), `parent` (FK → Zone, nullable), `name` (str), `code` (str)
+- `zone_type` (choices: area | aisle | rack | bin | storage | receiving | picking | shipping, default 'storage')
+- Locations within a warehouse, nested as a tree (area → aisle → rack → bin). A child always belongs to its parent's warehouse.
+- Use `under` on list_warehouse_zones to list every location below a zone, and `search` to find a zone by code or name.
 
 **StockMovement**
 - `reference` (str, required), `movement_type` (choices: inbound | outbound | transfer | adjustment)
 - `source_zone` (FK → Zone, nullable), `dest_zone` (FK → Zone, nullable)
-- `quantity` (decimal), `status` (str, default 'pending'), `notes` (text)
+- `quantity` (decimal), `status` (choices: pending | in_progress | done | cancelled, default 'pending'), `notes` (text)
+- `started_at`, `done_at`, `cancelled_at` (datetime, set when the status is entered)
 - For transfers: set both source_zone and dest_zone.
 - For inbound: set dest_zone only. For outbound: set source_zone only.
 - For adjustments: either zone can be set depending on context.
 
+**StockMovementLine**
+- `movement` (FK → StockMovement, related_name 'lines'), `product_ref` (str), `lot` (str, optional), `serial` (str, optional)
+- `quantity` (decimal), `unit` (str, default 'unit')
+- Product-level lines of a movement; the header's zones apply to every line.
+
 ### Key Flows
 
 1. **Create warehouse**: provide name (and optionally code, address).
-2. **Add zones**: create Zone records linked to the warehouse (e.g. 'Receiving', 'Storage A', 'Dispatch').
+2. **Add zones**: create Zone records linked to the warehouse (e.g. 'Receiving', 'Storage A', 'Dispatch'); pass `parent_id` to nest a location under another.
 3. **Record movement**: create StockMovement with reference, movement_type, quantity, and appropriate source/dest zones.
-4. **Update movement status**: change status from 'pending' → 'done' (or similar) once movement is executed.
+4. **Update movement status**: pending → in_progress → done; pending or in_progress → cancelled. done and cancelled are final; cancelled movements do not count towards stock.
 
 ### Relationships
 
-- Zone belongs to Warehouse (CASCADE delete).
+- Zone belongs to Warehouse (CASCADE delete) and optionally to a parent Zone (CASCADE delete).
 - StockMovement references Zone via source_zone and dest_zone (SET_NULL on delete, both nullable).
-- No direct FK to inventory/products — movements are zone-level, not product-level in this module.
+- No direct FK to inventory/products — lines carry a free-text `product_ref`; movements without lines are zone-level only.
+- On-hand per zone, product and lot is kept in ZoneProductBalance.
 """
@@ -1,6 +1,33 @@
 """AI tools for the Warehouse module."""
+import uuid
+
 from assistant.tools import AssistantTool, register_tool
 
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+PAGE_PROPERTIES = {
+    "limit": {"type": "integer", "minimum": 1, "maximum": MAX_LIMIT, "description": f"Rows per page (default {DEFAULT_LIMIT})"},
+    "cursor": {"type": "string", "description": "next_cursor from a previous call"},
+    "summary": {"type": "boolean", "description": "Return grouped counts instead of rows"},
+}
+
+
+def _hub_id(request):
+    return request.session.get('hub_id')
+
+
+def _json_row(row):
+    return {k: str(v) if isinstance(v, uuid.UUID) else v for k, v in row.items()}
+
+
+def _page(qs, args):
+    """One keyset page of a ``values()`` queryset ordered by name, as a tool result."""
+    from warehouse.pagination import keyset_paginate
+    limit = min(max(int(args.get('limit') or DEFAULT_LIMIT), 1), MAX_LIMIT)
+    page = keyset_paginate(qs, 'name', cursor=args.get('cursor'), per_page=limit)
+    return [_json_row(row) for row in page], page.next_cursor
+
 
 @register_tool
 class ListWarehouses(AssistantTool):
@@ -10,17 +37,22 @@ class ListWarehouses(AssistantTool):
     required_permission = "warehouse.view_warehouse"
     parameters = {
         "type": "object",
-        "properties": {"is_active": {"type": "boolean"}},
+        "properties": {"is_active": {"type": "boolean"}, **PAGE_PROPERTIES},
         "required": [],
         "additionalProperties": False,
     }
 
     def execute(self, args, request):
+        from django.db.models import Count
         from warehouse.models import Warehouse
-        qs = Warehouse.objects.all()
+        qs = Warehouse.objects.filter(hub_id=_hub_id(request), is_deleted=False)
         if 'is_active' in args:
             qs = qs.filter(is_active=args['is_active'])
-        return {"warehouses": [{"id": str(w.id), "name": w.name, "code": w.code, "address": w.address, "is_active": w.is_active} for w in qs]}
+        if args.get('summary'):
+            groups = list(qs.order_by().values('is_active').annotate(count=Count('id')))
+            return {"total": sum(g['count'] for g in groups), "by_is_active": groups}
+        rows, next_cursor = _page(qs.values('id', 'name', 'code', 'address', 'is_active'), args)
+        return {"warehouses": rows, "next_cursor": next_cursor}
 
 
 @register_tool
@@ -40,8 +72,13 @@ class CreateWarehouse(AssistantTool):
     }
 
     def execute(self, args, request):
+        from warehouse import services
         from warehouse.models import Warehouse
-        w = Warehouse.objects.create(name=args['name'], code=args.get('code', ''), address=args.get('address', ''))
+        w = Warehouse.objects.create(
+            hub_id=_hub_id(request), name=args['name'],
+            code=args.get('code', ''), address=args.get('address', ''),
+        )
+        services.mark_hub_changed(w.hub_id)
         return {"id": str(w.id), "name": w.name, "created": True}
 
 
@@ -53,17 +90,54 @@ class ListWarehouseZones(AssistantTool):
     required_permission = "warehouse.view_zone"
     parameters = {
         "type": "object",
-        "properties": {"warehouse_id": {"type": "string"}},
+        "properties": {
+            "warehouse_id": {"type": "string"}, "zone_type": {"type": "string"},
+            "under": {"type": "string", "description": "Zone id; list only the locations below it"},
+            "search": {"type": "string", "description": "Find zones by code or name (best matches, no paging)"},
+            **PAGE_PROPERTIES,
+        },
         "required": [],
         "additionalProperties": False,
     }
 
     def execute(self, args, request):
-        from warehouse.models import Zone
-        qs = Zone.objects.select_related('warehouse').all()
+        from django.core.exceptions import ValidationError
+        from django.db.models import Count, F
+        from warehouse import services
+        from warehouse.models import Warehouse, Zone
+        if args.get('warehouse_id'):
+            try:
+                found = Warehouse.objects.filter(hub_id=_hub_id(request), is_deleted=False, pk=args['warehouse_id']).exists()
+            except ValidationError:
+                found = False
+            if not found:
+                return {"error": "Warehouse not found"}
+        if args.get('search'):
+            limit = min(max(int(args.get('limit') or services.ZONE_SEARCH_LIMIT), 1), MAX_LIMIT)
+            zones = services.search_zones(_hub_id(request), args['search'], warehouse_id=args.get('warehouse_id'), limit=limit)
+            return {"zones": [_json_row(z) for z in zones], "next_cursor": None}
+        qs = Zone.objects.filter(hub_id=_hub_id(request), is_deleted=False, warehouse__is_deleted=False)
         if args.get('warehouse_id'):
             qs = qs.filter(warehouse_id=args['warehouse_id'])
-        return {"zones": [{"id": str(z.id), "name": z.name, "code": z.code, "zone_type": z.zone_type, "warehouse": z.warehouse.name} for z in qs]}
+        if args.get('zone_type'):
+            qs = qs.filter(zone_type=args['zone_type'])
+        if args.get('under'):
+            try:
+                node = Zone.objects.filter(hub_id=_hub_id(request), is_deleted=False, pk=args['under']).values('path', 'depth').first()
+            except ValidationError:
+                node = None
+            if node is None:
+                return {"error": "Zone not found"}
+            qs = qs.filter(path__startswith=node['path'], depth__gt=node['depth'])
+        if args.get('summary'):
+            groups = list(
+                qs.order_by().values('zone_type', is_active=F('warehouse__is_active')).annotate(count=Count('id'))
+            )
+            return {"total": sum(g['count'] for g in groups), "by_zone_type": groups}
+        rows, next_cursor = _page(
+            qs.values('id', 'name', 'code', 'zone_type', 'parent_id', 'depth', warehouse=F('warehouse__name')), args,
+        )
+        return {"zones": rows, "next_cursor": next_cursor}
 
 
 @register_tool
@@ -77,16 +151,42 @@ class CreateWarehouseZone(AssistantTool):
         "type": "object",
         "properties": {
             "warehouse_id": {"type": "string"}, "name": {"type": "string"}, "code": {"type": "string"},
-            "zone_type": {"type": "string", "description": "Zone type (e.g., storage, receiving, shipping)"},
+            "zone_type": {"type": "string", "enum": ["area", "aisle", "rack", "bin", "storage", "receiving", "picking", "shipping"]},
+            "parent_id": {"type": "string", "description": "Zone id of the parent location (same warehouse)"},
         },
         "required": ["warehouse_id", "name"],
         "additionalProperties": False,
     }
 
     def execute(self, args, request):
-        from warehouse.models import Zone
-        z = Zone.objects.create(
-            warehouse_id=args['warehouse_id'], name=args['name'],
+        from django.core.exceptions import ValidationError
+        from warehouse import services
+        from warehouse.models import Warehouse, Zone
+        hub_id = _hub_id(request)
+        try:
+            found = Warehouse.objects.filter(hub_id=hub_id, is_deleted=False, pk=args['warehouse_id']).exists()
+        except ValidationError:
+            found = False
+        if not found:
+            return {"error": "Warehouse not found", "created": False}
+        parent = None
+        if args.get('parent_id'):
+            try:
+                parent = Zone.objects.filter(
+                    hub_id=hub_id, is_deleted=False, warehouse_id=args['warehouse_id'], pk=args['parent_id'],
+                ).first()
+            except ValidationError:
+                parent = None
+            if parent is None:
+                return {"error": "Parent zone not found", "created": False}
+        z = Zone(
+            hub_id=hub_id, warehouse_id=args['warehouse_id'], name=args['name'],
             code=args.get('code', ''), zone_type=args.get('zone_type', 'storage'),
         )
+        try:
+            services.attach_zone(z, parent)
+        except services.ZoneSetupError as exc:
+            return {"error": str(exc), "created": False}
+        z.save()
+        services.mark_hub_changed(hub_id, zones=True)
         return {"id": str(z.id), "name": z.name, "created": True}
@@ -0,0 +1,180 @@
+"""
+Async variants of the read-heavy warehouse views, for ASGI deployments.
+
+Set ``WAREHOUSE_ASYNC_VIEWS = True`` to route the dashboard, the warehouse and
+movement lists and the zone type-ahead here. Their counts, pages and cache
+reads run on Django's async ORM and cache API, so a worker keeps serving other
+requests while a search keystroke waits on the database. Django still runs one
+request's async queries one after another, so the dashboard's three grouped
+queries do not overlap; the gain is the free event loop. The login check, the
+movement filter bar and template rendering reuse the sync code in a thread; so do exports,
+cursor pages and date ranges that reach the archive. Under WSGI each async view
+runs in its own event loop, so leave the setting off there. ``instrumented``
+only measures the sync views.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import render as django_render
+
+from apps.accounts.decorators import login_required
+from apps.core.htmx import htmx_view
+from apps.modules_runtime.navigation import with_module_nav
+
+from . import queries, services, views
+from .page_cache import hub_cached
+from .pagination import apaginate, keyset_paginate
+
+
+def _allowed(request):
+    return None
+
+
+_login_check = sync_to_async(login_required(_allowed))
+
+
+def alogin_required(view):
+    """
+    ``login_required`` for async views.
+
+    The sync check runs in a thread and loads the session on the way, so the
+    view (and ``hub_cached``) can read the session without blocking.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        denied = await _login_check(request)
+        if denied is not None:
+            return denied
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def _context(request, ctx):
+    return ctx
+
+
+def _page(nav, page_template, partial_template):
+    """Page or content partial of a view (as ``htmx_view`` picks), rendered from ``(request, ctx)``."""
+    return sync_to_async(with_module_nav(*nav)(htmx_view(page_template, partial_template)(_context)))
+
+
+_render = sync_to_async(django_render)
+_dashboard_page = _page(('warehouse', 'dashboard'), 'warehouse/pages/index.html', 'warehouse/partials/dashboard_content.html')
+_warehouses_page = _page(('warehouse', 'warehouses'), 'warehouse/pages/warehouses.html', 'warehouse/partials/warehouses_content.html')
+_stock_movements_page = _page(
+    ('warehouse', 'warehouses'), 'warehouse/pages/stock_movements.html', 'warehouse/partials/stock_movements_content.html',
+)
+
+
+# ======================================================================
+# Dashboard
+# ======================================================================
+
+@alogin_required
+@hub_cached('dashboard')
+async def dashboard(request):
+    stats = await services.adashboard_stats(request.session.get('hub_id'))
+    return await _dashboard_page(request, {
+        'total_warehouses': stats['total_warehouses'],
+        'total_stock_movements': stats['total_stock_movements'],
+        'stats': stats,
+    })
+
+
+# ======================================================================
+# Warehouse
+# ======================================================================
+
+@alogin_required
+@hub_cached('warehouses_list')
+async def warehouses_list(request):
+    if request.GET.get('export') in ('csv', 'excel'):
+        return await sync_to_async(views.warehouses_list)(request)
+    hub_id = request.session.get('hub_id')
+    search_query, sort_field, sort_dir, cursor, page_number, current_view, per_page = views._list_params(request, 'code')
+    qs = queries.warehouses_queryset(hub_id, search_query, sort_field, sort_dir)
+
+    paginate_mode = request.GET.get('paginate', '')
+    if paginate_mode == 'cursor' and sort_field in views.WAREHOUSE_KEYSET_FIELDS:
+        page_obj = await sync_to_async(keyset_paginate)(
+            qs, queries.WAREHOUSE_SORT_FIELDS[sort_field], sort_dir == 'desc',
+            cursor=cursor, per_page=per_page,
+            estimate=request.GET.get('estimate') == '1',
+        )
+    else:
+        page_obj = await apaginate(qs, per_page, page_number)
+
+    ctx = {
+        'warehouses': page_obj, 'page_obj': page_obj,
+        'search_query': search_query, 'sort_field': sort_field,
+        'sort_dir': sort_dir, 'current_view': current_view, 'per_page': per_page,
+        'paginate_mode': paginate_mode, 'estimate': request.GET.get('estimate', ''),
+    }
+    if request.htmx and request.htmx.target == 'datatable-body':
+        return await _render(request, 'warehouse/partials/warehouses_list.html', ctx)
+    return await _warehouses_page(request, ctx)
+
+
+# ======================================================================
+# Zone
+# ======================================================================
+
+@alogin_required
+async def zone_search(request):
+    """Type-ahead zone picker results, served from the cached zone directory."""
+    hub_id = request.session.get('hub_id')
+    warehouse_id = request.GET.get('warehouse', '').strip() or None
+    directory = await services.azone_directory(hub_id)
+    return await _render(request, 'warehouse/partials/zone_search_results.html', {
+        'results': services.search_zones(
+            hub_id, request.GET.get('zone_q', request.GET.get('q', '')), warehouse_id=warehouse_id, directory=directory,
+        ),
+    })
+
+
+# ======================================================================
+# StockMovement
+# ======================================================================
+
+def _stock_movement_filters(hub_id, data):
+    """Validated filters and whether their date range reaches the archive."""
+    filters = queries.stock_movement_filters(hub_id, data)
+    return filters, services.reaches_archive(hub_id, filters.get('date_from'), filters.get('date_to'))
+
+
+@alogin_required
+@hub_cached('stock_movements_list')
+async def stock_movements_list(request):
+    if request.GET.get('export') in ('csv', 'excel'):
+        return await sync_to_async(views.stock_movements_list)(request)
+    hub_id = request.session.get('hub_id')
+    search_query, sort_field, sort_dir, cursor, page_number, current_view, per_page = views._list_params(request, '')
+    sort_field = queries.stock_movement_sort(search_query, sort_field)
+    filters, with_archive = await sync_to_async(_stock_movement_filters)(hub_id, request.GET)
+    qs = queries.stock_movements_queryset(hub_id, search_query, sort_field, sort_dir, filters)
+
+    paginate_mode = request.GET.get('paginate', '')
+    if with_archive:
+        page_obj = await sync_to_async(views._stock_movements_with_archive_page)(
+            hub_id, search_query, sort_field, sort_dir, filters, per_page, page_number,
+        )
+    elif paginate_mode == 'cursor' and sort_field in views.STOCK_MOVEMENT_KEYSET_FIELDS:
+        page_obj = await sync_to_async(keyset_paginate)(
+            qs, queries.STOCK_MOVEMENT_SORT_FIELDS[sort_field], sort_dir == 'desc',
+            cursor=cursor, per_page=per_page,
+            estimate=request.GET.get('estimate') == '1',
+        )
+    else:
+        page_obj = await apaginate(qs, per_page, page_number)
+
+    ctx = {
+        'stock_movements': page_obj, 'page_obj': page_obj,
+        'search_query': search_query, 'sort_field': sort_field, 'sort_param': request.GET.get('sort', ''),
+        'sort_dir': sort_dir, 'current_view': current_view, 'per_page': per_page,
+        'paginate_mode': paginate_mode, 'estimate': request.GET.get('estimate', ''),
+        **await sync_to_async(views._stock_movement_filter_context)(request, hub_id, search_query, filters, with_archive),
+    }
+    if request.htmx and request.htmx.target == 'datatable-body':
+        # The filter bar sits outside the rows; refresh its counts out of band.
+        return await _render(request, 'warehouse/partials/stock_movements_list.html', {**ctx, 'facets_oob': True})
+    return await _stock_movements_page(request, ctx)
@@ -0,0 +1,200 @@
+"""
+Background export jobs.
+
+ExportJob rows are a database-backed queue. Workers claim queued jobs with
+``SELECT ... FOR UPDATE SKIP LOCKED``, so several can run side by side. Each
+worker writes the file chunk by chunk to a temporary file, recording progress
+as it goes, then saves the file to the default storage. With the default
+``WAREHOUSE_EXPORT_WORKER = 'command'`` jobs wait for ``python manage.py
+run_export_worker``, so web workers stay free and queued jobs survive restarts.
+``'thread'`` (for development) runs each job on a small pool in the web process
+once the request that queued it commits; the pool recovers what a previous
+process left behind when it starts.
+"""
+import datetime
+import io
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from . import queries
+from .exports import EXPORT_CHUNK_SIZE, STOCK_MOVEMENT_EXPORT_COLUMNS, WAREHOUSE_EXPORT_COLUMNS, iter_rows, write_csv, write_xlsx
+from .models import EXPORT_FORMAT, EXPORT_KIND, ExportJob
+
+logger = logging.getLogger(__name__)
+
+EXPORT_WORKER_THREADS = 2
+EXPORT_RETENTION_DAYS = 7
+# A running job whose progress has not moved for this long is assumed orphaned.
+EXPORT_STALE_AFTER = datetime.timedelta(minutes=15)
+EXPORT_PARAM_KEYS = ('q', 'sort', 'dir', 'type', 'status', 'warehouse', 'zone', 'from', 'to')
+
+EXPORT_KINDS = {value for value, _label in EXPORT_KIND}
+EXPORT_FORMATS = {value for value, _label in EXPORT_FORMAT}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def worker_mode():
+    return getattr(settings, 'WAREHOUSE_EXPORT_WORKER', 'command')
+
+
+def _source(kind):
+    """Queryset builder, columns and file name stem of an export kind."""
+    if kind == 'stock_movements':
+        return queries.stock_movements_queryset, STOCK_MOVEMENT_EXPORT_COLUMNS, 'stock_movements'
+    return queries.warehouses_queryset, WAREHOUSE_EXPORT_COLUMNS, 'warehouses'
+
+
+def export_params(data):
+    """The list state to store with a job: search, filters and sort."""
+    return {key: str(data.get(key, '')).strip() for key in EXPORT_PARAM_KEYS if data.get(key)}
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=EXPORT_WORKER_THREADS, thread_name_prefix='warehouse-export')
+            _executor.submit(_run_in_thread, recover_jobs, None)
+        return _executor
+
+
+def _run_in_thread(run, pk):
+    try:
+        run(pk)
+    finally:
+        close_old_connections()
+        connection.close()
+
+
+def recover_jobs(_pk=None):
+    """
+    Requeue exports and fail imports a dead process left running, then run
+    everything still queued. The thread pool does this when it starts.
+    """
+    from .import_jobs import fail_stale_imports, run_import_job
+    requeue_stale_jobs()
+    fail_stale_imports()
+    while run_import_job() is not None:
+        pass
+    while run_export_job() is not None:
+        pass
+
+
+def submit_job(run, pk):
+    """Run ``run(pk)`` on the in-process job pool (shared with import jobs)."""
+    _get_executor().submit(_run_in_thread, run, pk)
+
+
+def enqueue_export(hub_id, kind, export_format, params, user_id=None):
+    """Queue an export of the ``kind`` datatable with its list ``params``."""
+    if kind not in EXPORT_KINDS or export_format not in EXPORT_FORMATS:
+        raise ValueError(f'Unknown export: {kind}.{export_format}')
+    job = ExportJob.objects.create(
+        hub_id=hub_id, created_by=user_id, kind=kind, export_format=export_format, params=params,
+    )
+    if worker_mode() == 'thread':
+        transaction.on_commit(lambda: submit_job(run_export_job, job.pk))
+    return job
+
+
+def claim_job(pk=None):
+    """Mark the oldest queued job (or job ``pk``) running and return it, or None."""
+    with transaction.atomic():
+        jobs = ExportJob.objects.filter(status='queued').order_by('created_at')
+        if pk is not None:
+            jobs = jobs.filter(pk=pk)
+        if connection.features.has_select_for_update_skip_locked:
+            jobs = jobs.select_for_update(skip_locked=True)
+        else:
+            jobs = jobs.select_for_update()
+        job = jobs.first()
+        if job is None:
+            return None
+        job.status, job.started_at = 'running', timezone.now()
+        job.save(update_fields=['status', 'started_at', 'updated_at'])
+    return job
+
+
+def _progress(job, rows):
+    """Pass rows through, saving the running count once per chunk."""
+    count = 0
+    for row in rows:
+        yield row
+        count += 1
+        if count % EXPORT_CHUNK_SIZE == 0:
+            ExportJob.objects.filter(pk=job.pk).update(rows_written=count, updated_at=timezone.now())
+
+
+def write_export(job):
+    """Write the job's file to storage. Returns the number of rows written."""
+    build, columns, stem = _source(job.kind)
+    params = job.params or {}
+    options = {'search_query': params.get('q', ''), 'sort_dir': params.get('dir', 'asc')}
+    if job.kind == 'stock_movements':
+        options['sort_field'] = queries.stock_movement_sort(params.get('q', ''), params.get('sort', ''))
+        options['filters'] = queries.stock_movement_filters(job.hub_id, params)
+    elif params.get('sort'):
+        options['sort_field'] = params['sort']
+    qs = build(job.hub_id, **options)
+    job.total_rows = qs.count()
+    job.save(update_fields=['total_rows', 'updated_at'])
+
+    headers = [header for _, header in columns]
+    rows = _progress(job, iter_rows(qs, columns))
+    with tempfile.TemporaryFile() as tmp:
+        if job.export_format == 'csv':
+            text = io.TextIOWrapper(tmp, encoding='utf-8', newline='')
+            count = write_csv(rows, headers, text)
+            text.flush()
+            text.detach()
+            extension = 'csv'
+        else:
+            count = write_xlsx(rows, headers, tmp)
+            extension = 'xlsx'
+        tmp.seek(0)
+        job.file.save(f'{stem}-{timezone.localdate():%Y%m%d}-{job.pk.hex[:8]}.{extension}', File(tmp), save=False)
+    return count
+
+
+def run_export_job(pk=None):
+    """Claim and run one job. Returns the job, or None when nothing was queued."""
+    job = claim_job(pk)
+    if job is None:
+        return None
+    try:
+        job.rows_written = write_export(job)
+        job.status = 'done'
+    except Exception as exc:
+        logger.exception('Export job %s failed', job.pk)
+        job.status, job.error = 'failed', str(exc)[:1000]
+    job.finished_at = timezone.now()
+    job.save(update_fields=['rows_written', 'status', 'error', 'file', 'finished_at', 'updated_at'])
+    return job
+
+
+def requeue_stale_jobs():
+    """Put jobs whose worker died back in the queue. Returns how many were requeued."""
+    return ExportJob.objects.filter(
+        status='running', updated_at__lt=timezone.now() - EXPORT_STALE_AFTER,
+    ).update(status='queued', rows_written=0, updated_at=timezone.now())
+
+
+def purge_export_jobs(days=EXPORT_RETENTION_DAYS):
+    """Delete finished jobs older than ``days`` together with their files."""
+    old = ExportJob.all_objects.filter(created_at__lt=timezone.now() - datetime.timedelta(days=days))
+    count = 0
+    for job in old.exclude(status__in=('queued', 'running')).only('id', 'file').iterator():
+        if job.file:
+            job.file.delete(save=False)
+        ExportJob.all_objects.filter(pk=job.pk).delete()
+        count += 1
+    return count
@@ -1,7 +1,8 @@
 from django import forms
 from django.utils.translation import gettext_lazy as _
 
-from .models import Warehouse, StockMovement
+from . import services
+from .models import Warehouse, StockMovement, Zone
 
 class WarehouseForm(forms.ModelForm):
     class Meta:
@@ -28,3 +29,12 @@ class StockMovementForm(forms.ModelForm):
             'status': forms.TextInput(attrs={'class': 'input input-sm w-full'}),
         }
 
+    def __init__(self, *args, hub_id=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Choices come from the cached zone directory; validation is limited to the hub's zones.
+        choices = [('', '---')]
+        if hub_id is not None:
+            choices += [(z['id'], f"{z['warehouse_name']} / {z['name']}") for z in services.zone_directory(hub_id)]
+        for field in ('source_zone', 'dest_zone'):
+            self.fields[field].queryset = Zone.objects.filter(hub_id=hub_id, is_deleted=False)
+            self.fields[field].choices = choices
@@ -0,0 +1,121 @@
+"""
+Background movement imports.
+
+Uploads from the movements list are stored as ``ImportJob`` rows and run by the
+export job workers (``WAREHOUSE_EXPORT_WORKER``): ``python manage.py
+run_export_worker`` by default, or the in-process thread pool once the upload
+request commits. A
+job validates inline (no process pool) and commits the file chunk by chunk
+through ``imports.import_movements``, saving its counts after every chunk for
+the UI to poll. Committed chunks are never rolled back, so a job that stopped
+halfway is marked failed rather than run again.
+"""
+import csv
+import datetime
+import io
+import logging
+import tempfile
+import zipfile
+
+from django.core.files import File
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from .export_jobs import EXPORT_RETENTION_DAYS, EXPORT_STALE_AFTER, submit_job, worker_mode
+from .imports import import_movements
+from .models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+INVALID_FILE_ERRORS = (UnicodeDecodeError, csv.Error, zipfile.BadZipFile, KeyError, ValueError)
+
+
+def enqueue_import(hub_id, upload, user_id=None):
+    """Store an uploaded file and queue its import."""
+    job = ImportJob(hub_id=hub_id, created_by=user_id, filename=upload.name[:255])
+    job.source.save(upload.name, upload, save=False)
+    job.save()
+    if worker_mode() == 'thread':
+        transaction.on_commit(lambda: submit_job(run_import_job, job.pk))
+    return job
+
+
+def claim_import(pk=None):
+    """Mark the oldest queued import (or import ``pk``) running and return it, or None."""
+    with transaction.atomic():
+        jobs = ImportJob.objects.filter(status='queued').order_by('created_at')
+        if pk is not None:
+            jobs = jobs.filter(pk=pk)
+        if connection.features.has_select_for_update_skip_locked:
+            jobs = jobs.select_for_update(skip_locked=True)
+        else:
+            jobs = jobs.select_for_update()
+        job = jobs.first()
+        if job is None:
+            return None
+        job.status, job.started_at = 'running', timezone.now()
+        job.save(update_fields=['status', 'started_at', 'updated_at'])
+    return job
+
+
+def _progress(job):
+    def save(result):
+        ImportJob.objects.filter(pk=job.pk).update(
+            rows_created=result['created'], rows_rejected=result['rejected'], updated_at=timezone.now(),
+        )
+    return save
+
+
+def run_import_job(pk=None):
+    """Claim and run one import. Returns the job, or None when nothing was queued."""
+    job = claim_import(pk)
+    if job is None:
+        return None
+    result = None
+    try:
+        with tempfile.TemporaryFile() as tmp:
+            report = io.TextIOWrapper(tmp, encoding='utf-8', newline='')
+            with job.source.open('rb') as source:
+                result = import_movements(job.hub_id, source, job.filename, rejected=report, progress=_progress(job))
+            report.flush()
+            report.detach()
+            if result['rejected']:
+                tmp.seek(0)
+                job.rejected_file.save(f'rejected-{job.pk.hex[:8]}.csv', File(tmp), save=False)
+        job.status = 'done'
+    except INVALID_FILE_ERRORS:
+        job.status, job.error = 'failed', _('Invalid file.')
+    except Exception as exc:
+        logger.exception('Import job %s failed', job.pk)
+        job.status, job.error = 'failed', str(exc)[:1000]
+    job.refresh_from_db(fields=['rows_created', 'rows_rejected'])
+    if result is not None:
+        job.rows_created, job.rows_rejected, job.errors = result['created'], result['rejected'], result['errors']
+    job.finished_at = timezone.now()
+    job.save(update_fields=[
+        'rows_created', 'rows_rejected', 'errors', 'rejected_file', 'status', 'error', 'finished_at', 'updated_at',
+    ])
+    return job
+
+
+def fail_stale_imports():
+    """Mark imports whose worker died failed; their committed chunks stay. Returns how many."""
+    return ImportJob.objects.filter(
+        status='running', updated_at__lt=timezone.now() - EXPORT_STALE_AFTER,
+    ).update(
+        status='failed', error=_('The import stopped before it finished.'), finished_at=timezone.now(), updated_at=timezone.now(),
+    )
+
+
+def purge_import_jobs(days=EXPORT_RETENTION_DAYS):
+    """Delete finished imports older than ``days`` together with their files."""
+    old = ImportJob.all_objects.filter(created_at__lt=timezone.now() - datetime.timedelta(days=days))
+    count = 0
+    for job in old.exclude(status__in=('queued', 'running')).only('id', 'source', 'rejected_file').iterator():
+        for field in (job.source, job.rejected_file):
+            if field:
+                field.delete(save=False)
+        ImportJob.all_objects.filter(pk=job.pk).delete()
+        count += 1
+    return count
@@ -0,0 +1,196 @@
+"""
+Bulk stock movement imports from CSV or xlsx files.
+
+The file is read row by row (``csv.DictReader`` or openpyxl's read-only
+workbook) and cut into chunks of ``IMPORT_CHUNK_SIZE`` rows. Chunks are
+validated with ``services.clean_movement_row`` in a process pool, against a zone
+lookup built once per import, while the main process commits the chunks that
+are ready, in order, each in its own transaction through
+``services.check_movement_stock`` (zone locks, no overdrawn zones) and
+``services.create_movements``. At most two chunks per worker are in flight, so
+memory stays bounded whatever the file size. Rejected rows are written to an
+optional CSV report as they come, with their row number and errors.
+
+Only the ``import_movements`` management command forks the pool: web workers
+run threads, and forking a threaded process is unsafe. Uploads from the
+movements list are queued as ``ImportJob`` rows (see ``import_jobs``) and
+validated inline.
+"""
+import csv
+import io
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+
+from . import services
+
+IMPORT_CHUNK_SIZE = 5000
+IMPORT_ERROR_PREVIEW = 100
+IMPORT_MAX_WORKERS = 4
+REJECTED_EXTRA_COLUMNS = ('row', 'errors')
+
+_worker_zones = None
+
+
+def import_workers():
+    """Validation processes for the management command; 0 validates in the calling process."""
+    workers = getattr(settings, 'WAREHOUSE_IMPORT_WORKERS', None)
+    if workers is None:
+        workers = min(IMPORT_MAX_WORKERS, os.cpu_count() or 1)
+    return max(0, workers)
+
+
+def _header(value):
+    return str(value or '').strip().lower()
+
+
+def read_rows(fileobj, filename):
+    """
+    Return ``(headers, rows)`` for an uploaded CSV or xlsx file.
+
+    ``rows`` is an iterator of dicts keyed by the lower-cased header.
+    """
+    if filename.lower().endswith('.xlsx'):
+        rows = _xlsx_rows(fileobj)
+        return next(rows), rows
+
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(text)
+    headers = [_header(h) for h in reader.fieldnames or ()]
+    reader.fieldnames = headers
+    return headers, reader
+
+
+def _xlsx_rows(fileobj):
+    """
+    Yield the header list, then one dict per non-blank row.
+
+    A read-only workbook keeps its file open until closed; closing (or
+    exhausting) the generator closes it.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        values = workbook.active.iter_rows(values_only=True)
+        headers = [_header(h) for h in next(values, ())]
+        yield headers
+        for row in values:
+            if any(v is not None for v in row):
+                yield dict(zip(headers, row))
+    finally:
+        workbook.close()
+
+
+def _init_worker(zones):
+    global _worker_zones
+    _worker_zones = zones
+
+
+def clean_chunk(chunk, zones=None):
+    """
+    Validate ``[(number, row), ...]``. Returns ``(valid, rejected)``.
+
+    ``valid`` holds ``(number, cleaned)`` and ``rejected`` ``(number, row, errors)``. Runs in the pool workers, where
+    the zones come from the initializer.
+    """
+    zones = _worker_zones if zones is None else zones
+    valid, rejected = [], []
+    for number, row in chunk:
+        cleaned, errors = services.clean_movement_row(row, zones)
+        if errors:
+            rejected.append((number, row, {field: str(message) for field, message in errors.items()}))
+        else:
+            valid.append((number, cleaned))
+    return valid, rejected
+
+
+def _chunks(rows, size):
+    numbered = enumerate(rows, start=1)
+    while True:
+        chunk = list(islice(numbered, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class _RejectedReport:
+    """CSV of rejected rows: the original columns plus row number and errors."""
+
+    def __init__(self, fileobj, headers):
+        self.writer = None
+        if fileobj is not None:
+            self.columns = [h for h in headers if h not in REJECTED_EXTRA_COLUMNS]
+            self.writer = csv.writer(fileobj)
+            self.writer.writerow([*REJECTED_EXTRA_COLUMNS, *self.columns])
+
+    def write(self, number, row, errors):
+        if self.writer is not None:
+            message = '; '.join(f'{field}: {text}' for field, text in errors.items())
+            self.writer.writerow([number, message, *(row.get(c) for c in self.columns)])
+
+
+def import_movements(hub_id, fileobj, filename, rejected=None, chunk_size=IMPORT_CHUNK_SIZE, workers=0, progress=None):
+    """
+    Import movements from an uploaded file, committing valid rows chunk by chunk.
+
+    Rejected rows go to the ``rejected`` text file (if given) and the first
+    ``IMPORT_ERROR_PREVIEW`` of them to the result. ``workers`` > 0 validates in
+    a forked process pool; only pass it from a single-threaded process. Inside
+    ``transaction.atomic`` the rows are validated inline instead.
+    ``progress(result)`` is called after every chunk. A failure while committing
+    stops the import; chunks committed before it stay. Returns a dict with
+    ``created``, ``rejected`` and ``errors``.
+    """
+    headers, rows = read_rows(fileobj, filename)
+    zones = services.hub_zone_lookup(hub_id)
+    report = _RejectedReport(rejected, headers)
+    result = {'created': 0, 'rejected': 0, 'errors': []}
+
+    def commit(chunk, valid, rejected_rows):
+        short = []
+        if valid:
+            with transaction.atomic():
+                valid, short = services.check_movement_stock(hub_id, valid)
+                if valid:
+                    result['created'] += len(services.create_movements(hub_id, [cleaned for _number, cleaned in valid]))
+            if short:
+                rows_by_number = dict(chunk)
+                rejected_rows = sorted(
+                    rejected_rows + [(e['row'], rows_by_number[e['row']], e['errors']) for e in short],
+                    key=lambda rejected_row: rejected_row[0],
+                )
+        for number, row, errors in rejected_rows:
+            report.write(number, row, errors)
+            if len(result['errors']) < IMPORT_ERROR_PREVIEW:
+                result['errors'].append({'row': number, 'errors': errors})
+        result['rejected'] += len(rejected_rows)
+        if progress is not None:
+            progress(result)
+
+    # Spawned workers would start without Django configured, so the pool needs
+    # fork; and children must not share the socket of an open transaction.
+    if not workers or connection.in_atomic_block or 'fork' not in multiprocessing.get_all_start_methods():
+        for chunk in _chunks(rows, chunk_size):
+            commit(chunk, *clean_chunk(chunk, zones))
+        return result
+
+    # Children must not inherit open database sockets; the parent reconnects on its next query.
+    connections.close_all()
+    pending = deque()
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(zones,)) as pool:
+        for chunk in _chunks(rows, chunk_size):
+            pending.append((chunk, pool.submit(clean_chunk, chunk)))
+            if len(pending) >= workers * 2:
+                chunk, future = pending.popleft()
+                commit(chunk, *future.result())
+        while pending:
+            chunk, future = pending.popleft()
+            commit(chunk, *future.result())
+    return result
@@ -0,0 +1,187 @@
+"""
+Opt-in request instrumentation for the warehouse views.
+
+Set ``WAREHOUSE_INSTRUMENTATION = True`` in the Django settings to enable it.
+Every view decorated with ``instrumented`` then records its query count, total
+and slowest SQL time, template render time and serialized rows. The figures go
+out as a ``Server-Timing`` header and as one JSON log line on the
+``warehouse.perf`` logger. Streaming exports are measured until the last chunk
+is sent, so their log line covers the whole download (the header only covers
+the work done before streaming starts).
+"""
+import contextvars
+import functools
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.template.base import Template
+
+logger = logging.getLogger('warehouse.perf')
+
+SLOWEST_SQL_MAX_LENGTH = 300
+
+_current = contextvars.ContextVar('warehouse_request_metrics', default=None)
+_template_hook_installed = False
+
+
+def enabled():
+    return getattr(settings, 'WAREHOUSE_INSTRUMENTATION', False)
+
+
+class RequestMetrics:
+    """Counters of one instrumented request; also a database execute wrapper."""
+
+    def __init__(self, view):
+        self.view = view
+        self.branch = ''
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_sql = ''
+        self.render_ms = 0.0
+        self.rows = 0
+        self.total_ms = 0.0
+        self._render_depth = 0
+        self._started = time.perf_counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.queries += 1
+            self.sql_ms += elapsed
+            if elapsed > self.slowest_ms:
+                self.slowest_ms = elapsed
+                self.slowest_sql = sql[:SLOWEST_SQL_MAX_LENGTH]
+
+    @property
+    def name(self):
+        return f'{self.view}.{self.branch}' if self.branch else self.view
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self._started) * 1000
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.sql_ms:.1f};desc="{self.queries} queries"',
+            f'db-max;dur={self.slowest_ms:.1f}',
+            f'render;dur={self.render_ms:.1f}',
+            f'rows;desc="{self.rows}"',
+            f'total;dur={self.total_ms:.1f};desc="{self.name}"',
+        ])
+
+    def as_dict(self):
+        return {
+            'view': self.name, 'queries': self.queries, 'sql_ms': round(self.sql_ms, 1),
+            'slowest_ms': round(self.slowest_ms, 1), 'slowest_sql': self.slowest_sql,
+            'render_ms': round(self.render_ms, 1), 'rows': self.rows, 'total_ms': round(self.total_ms, 1),
+        }
+
+
+def current():
+    """Metrics of the instrumented request running in this context, or None."""
+    return _current.get()
+
+
+def set_branch(branch):
+    """Label the code path taken by the current view (e.g. ``export_csv``)."""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.branch = branch
+
+
+def record_rows(count):
+    """Add ``count`` serialized rows to the current request."""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.rows += count
+
+
+def _install_template_hook():
+    """
+    Time template rendering through ``Template._render``.
+
+    Nested renders (includes, extends) run inside the outermost one, so only
+    the outermost render of a request is timed. Requests without metrics pay
+    one context variable lookup.
+    """
+    global _template_hook_installed
+    if _template_hook_installed:
+        return
+    original = Template._render
+
+    @functools.wraps(original)
+    def _render(self, context):
+        metrics = _current.get()
+        if metrics is None:
+            return original(self, context)
+        metrics._render_depth += 1
+        started = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            metrics._render_depth -= 1
+            if not metrics._render_depth:
+                metrics.render_ms += (time.perf_counter() - started) * 1000
+
+    Template._render = _render
+    _template_hook_installed = True
+
+
+def _report(metrics):
+    metrics.finish()
+    logger.info(json.dumps(metrics.as_dict()), extra={'warehouse_metrics': metrics.as_dict()})
+
+
+def _measured_stream(metrics, content):
+    """Re-enter the request's metrics around every chunk of a streaming response."""
+    iterator = iter(content)
+    try:
+        while True:
+            token = _current.set(metrics)
+            try:
+                with connection.execute_wrapper(metrics):
+                    chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                _current.reset(token)
+            yield chunk
+    finally:
+        _report(metrics)
+
+
+def instrumented(name):
+    """
+    Measure a view when ``WAREHOUSE_INSTRUMENTATION`` is on.
+
+    Apply it directly below ``login_required`` so the measurement includes the
+    template rendering done by ``htmx_view``.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not enabled():
+                return view(request, *args, **kwargs)
+            _install_template_hook()
+            metrics = RequestMetrics(name)
+            token = _current.set(metrics)
+            try:
+                with connection.execute_wrapper(metrics):
+                    response = view(request, *args, **kwargs)
+            finally:
+                _current.reset(token)
+            metrics.finish()
+            response['Server-Timing'] = metrics.server_timing()
+            if response.streaming:
+                response.streaming_content = _measured_stream(metrics, response.streaming_content)
+            else:
+                _report(metrics)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,34 @@
+"""Move closed movement periods and purged soft-deleted movements to the archive tables."""
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from warehouse.services import ARCHIVE_BATCH_SIZE, archive_cutoff, archive_movements
+
+
+class Command(BaseCommand):
+    help = 'Move done/cancelled movements of closed months and old soft-deleted movements out of the hot table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', dest='hub_id', default=None, help='Only process this hub_id.')
+        parser.add_argument('--months', type=int, default=None,
+                            help='Months kept in the hot table (default: WAREHOUSE_HOT_MONTHS or 12).')
+        parser.add_argument('--purge-days', type=int, default=None,
+                            help='Soft-deleted movements older than this many days are moved '
+                                 '(default: WAREHOUSE_PURGE_DELETED_DAYS or 30).')
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options['months'] is not None and options['months'] < 0:
+            raise CommandError('--months cannot be negative.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        cutoff = archive_cutoff(months=options['months'])
+        purge_before = None
+        if options['purge_days'] is not None:
+            purge_before = timezone.now() - datetime.timedelta(days=options['purge_days'])
+        moved = archive_movements(
+            hub_id=options['hub_id'], cutoff=cutoff, purge_before=purge_before, batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Archived {moved} movements created before {cutoff:%Y-%m-%d}.'))
@@ -0,0 +1,124 @@
+"""Generate a large synthetic warehouse data set for the benchmark suite."""
+import datetime
+import math
+import random
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from warehouse import services
+from warehouse.models import MovementRollup, StockMovement, StockMovementLine, Warehouse, Zone, ZoneBalance, ZoneProductBalance
+
+BATCH_SIZE = 5000
+RACKS_PER_AISLE = 10
+LEVELS_PER_RACK = 5
+NOTE_WORDS = ('damaged', 'urgent', 'cycle count', 'supplier return', 'cross dock', 'replenishment')
+STATUS_WEIGHTS = (('done', 80), ('pending', 10), ('in_progress', 6), ('cancelled', 4))
+TYPE_WEIGHTS = (('inbound', 35), ('outbound', 35), ('transfer', 25), ('adjustment', 5))
+
+
+def clear_hub(hub_id):
+    """Hard-delete every warehouse row of a hub."""
+    for model in (MovementRollup, ZoneProductBalance, ZoneBalance, StockMovementLine, StockMovement, Zone, Warehouse):
+        model.all_objects.filter(hub_id=hub_id).delete()
+
+
+def generate(hub_id, warehouses=20, zones=10000, movements=1000000, lines=0, days=365, seed=1, stdout=None):
+    """
+    Create warehouses, a zone tree per warehouse and ``movements`` stock movements.
+
+    Zones come from ``services.generate_bins`` (aisle → 10 racks → 5 bins), so the
+    zone count is rounded up to whole aisles. Movements are bulk-inserted one day
+    at a time over the last ``days`` days and the ledgers are rebuilt at the end.
+    The same ``seed`` always gives the same data. Returns a dict of counts.
+    """
+    rng = random.Random(seed)
+    per_aisle = 1 + RACKS_PER_AISLE + RACKS_PER_AISLE * LEVELS_PER_RACK
+    aisles = max(1, math.ceil(zones / warehouses / per_aisle))
+    for number in range(1, warehouses + 1):
+        warehouse = Warehouse.objects.create(hub_id=hub_id, name=f'Bench Warehouse {number:03d}', code=f'BW{number:03d}')
+        services.generate_bins(
+            hub_id, warehouse.pk, f'01-{aisles:02d}', f'01-{RACKS_PER_AISLE:02d}', f'1-{LEVELS_PER_RACK}',
+            prefix=f'W{number:03d}-',
+        )
+    bins = list(Zone.objects.filter(hub_id=hub_id, zone_type='bin').values_list('pk', flat=True))
+    if stdout:
+        stdout.write(f'{warehouses} warehouses, {Zone.objects.filter(hub_id=hub_id).count()} zones.')
+
+    types = [t for t, weight in TYPE_WEIGHTS for _ in range(weight)]
+    statuses = [s for s, weight in STATUS_WEIGHTS for _ in range(weight)]
+    today = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    per_day = math.ceil(movements / days)
+    created = 0
+    for day in range(days):
+        count = min(per_day, movements - created)
+        if count <= 0:
+            break
+        batch = []
+        for i in range(created, created + count):
+            movement_type = rng.choice(types)
+            source = rng.choice(bins) if movement_type in ('outbound', 'transfer') else None
+            dest = rng.choice(bins) if movement_type in ('inbound', 'transfer', 'adjustment') else None
+            batch.append(StockMovement(
+                id=uuid.UUID(int=rng.getrandbits(128), version=4), hub_id=hub_id,
+                reference=f'BM-{i:07d}', movement_type=movement_type, status=rng.choice(statuses),
+                source_zone_id=source, dest_zone_id=dest, quantity=Decimal(rng.randint(1, 100)),
+                notes=rng.choice(NOTE_WORDS) if rng.random() < 0.2 else '',
+            ))
+        with transaction.atomic():
+            StockMovement.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+            # created_at is auto_now_add; spread the history over past days.
+            StockMovement.objects.filter(pk__in=[m.pk for m in batch]).update(
+                created_at=today - datetime.timedelta(days=days - 1 - day),
+            )
+            if lines:
+                StockMovementLine.objects.bulk_create([
+                    StockMovementLine(
+                        hub_id=hub_id, movement_id=m.pk, product_ref=f'SKU-{rng.randint(1, 5000):05d}',
+                        quantity=m.quantity / lines,
+                    )
+                    for m in batch for _ in range(lines)
+                ], batch_size=BATCH_SIZE)
+        created += count
+        if stdout and day % 30 == 0:
+            stdout.write(f'{created} movements...')
+
+    balances = services.rebuild_zone_balances(hub_id=hub_id)
+    product_balances = services.rebuild_product_balances(hub_id=hub_id)
+    rollups = services.rebuild_movement_rollups(hub_id=hub_id)
+    return {
+        'warehouses': warehouses, 'zones': Zone.objects.filter(hub_id=hub_id).count(), 'movements': created,
+        'balances': balances, 'product_balances': product_balances, 'rollups': rollups,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Generate a large, reproducible warehouse data set for benchmarking.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', dest='hub_id', required=True, help='hub_id to generate the data for.')
+        parser.add_argument('--warehouses', type=int, default=20)
+        parser.add_argument('--zones', type=int, default=10000, help='Approximate number of zones (rounded up to whole aisles).')
+        parser.add_argument('--movements', type=int, default=1000000)
+        parser.add_argument('--lines', type=int, default=0, help='Product lines per movement.')
+        parser.add_argument('--days', type=int, default=365, help='Days of history to spread movements over.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--clear', action='store_true', help='Delete the hub\'s existing warehouse data first.')
+
+    def handle(self, *args, **options):
+        try:
+            hub_id = uuid.UUID(options['hub_id'])
+        except ValueError:
+            raise CommandError('--hub must be a UUID.')
+        if options['warehouses'] < 1 or options['days'] < 1:
+            raise CommandError('--warehouses and --days must be positive.')
+        if options['clear']:
+            clear_hub(hub_id)
+        counts = generate(
+            hub_id, warehouses=options['warehouses'], zones=options['zones'], movements=options['movements'],
+            lines=options['lines'], days=options['days'], seed=options['seed'], stdout=self.stdout,
+        )
+        self.stdout.write(self.style.SUCCESS(', '.join(f'{count} {name}' for name, count in counts.items())))
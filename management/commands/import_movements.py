@@ -0,0 +1,39 @@
+"""Import stock movements from a large CSV or xlsx file."""
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+from warehouse.imports import IMPORT_CHUNK_SIZE, import_movements, import_workers
+
+
+class Command(BaseCommand):
+    help = 'Import stock movements from a CSV or xlsx file, validating in parallel and committing in chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or xlsx file to import.')
+        parser.add_argument('--hub', dest='hub_id', required=True, help='hub_id to import the movements into.')
+        parser.add_argument('--rejected', help='Write rejected rows with their errors to this CSV file.')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help='Rows per validation chunk and transaction.')
+        parser.add_argument('--workers', type=int, default=None, help='Validation processes (0 validates inline; default WAREHOUSE_IMPORT_WORKERS or up to 4).')
+
+    def handle(self, *args, **options):
+        try:
+            hub_id = uuid.UUID(options['hub_id'])
+        except ValueError:
+            raise CommandError('--hub must be a UUID.')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive.')
+        rejected = open(options['rejected'], 'w', encoding='utf-8', newline='') if options['rejected'] else None
+        try:
+            with open(options['path'], 'rb') as fileobj:
+                result = import_movements(
+                    hub_id, fileobj, options['path'], rejected=rejected,
+                    chunk_size=options['chunk_size'],
+                    workers=import_workers() if options['workers'] is None else options['workers'],
+                )
+        except OSError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if rejected is not None:
+                rejected.close()
+        self.stdout.write(self.style.SUCCESS(f"Imported {result['created']} movements, rejected {result['rejected']} rows."))
@@ -0,0 +1,34 @@
+"""Backfill and compact the hourly/daily MovementRollup tables."""
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from warehouse.services import compact_movement_rollups, rebuild_movement_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute movement rollups from StockMovement history and compact old hourly buckets.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', dest='hub_id', default=None, help='Only process this hub_id.')
+        parser.add_argument('--since', default=None, help='Only rebuild buckets from this date on (YYYY-MM-DD).')
+        parser.add_argument('--compact', action='store_true', help='Compact after rebuilding.')
+        parser.add_argument('--compact-only', action='store_true', help='Skip the rebuild and only compact.')
+        parser.add_argument('--keep-hourly-days', type=int, default=90,
+                            help='Hourly buckets older than this many days are dropped on compaction.')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = timezone.make_aware(datetime.datetime.strptime(options['since'], '%Y-%m-%d'))
+            except ValueError as exc:
+                raise CommandError(f'Invalid --since date: {options["since"]}') from exc
+
+        if not options['compact_only']:
+            written = rebuild_movement_rollups(hub_id=options['hub_id'], since=since)
+            self.stdout.write(self.style.SUCCESS(f'Wrote {written} rollup rows.'))
+        if options['compact'] or options['compact_only']:
+            deleted = compact_movement_rollups(hub_id=options['hub_id'], keep_hourly_days=options['keep_hourly_days'])
+            self.stdout.write(self.style.SUCCESS(f'Compacted {deleted} rollup rows.'))
@@ -0,0 +1,16 @@
+"""Recompute the ZoneBalance and ZoneProductBalance ledgers from StockMovement history."""
+from django.core.management.base import BaseCommand
+
+from warehouse.services import rebuild_product_balances, rebuild_zone_balances
+
+
+class Command(BaseCommand):
+    help = 'Recompute per-zone and per-product stock balances from the full StockMovement history.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', dest='hub_id', default=None, help='Only rebuild balances for this hub_id.')
+
+    def handle(self, *args, **options):
+        count = rebuild_zone_balances(hub_id=options['hub_id'])
+        product_count = rebuild_product_balances(hub_id=options['hub_id'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} zone balances and {product_count} product balances.'))
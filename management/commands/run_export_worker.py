@@ -0,0 +1,39 @@
+"""Run queued warehouse export and import jobs."""
+import time
+
+from django.core.management.base import BaseCommand
+
+from warehouse.export_jobs import purge_export_jobs, requeue_stale_jobs, run_export_job
+from warehouse.import_jobs import fail_stale_imports, purge_import_jobs, run_import_job
+
+PURGE_INTERVAL = 60 * 60
+
+
+class Command(BaseCommand):
+    help = 'Process queued export and import jobs (the default WAREHOUSE_EXPORT_WORKER = "command").'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the queued jobs and exit instead of polling.')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between polls when the queue is empty.')
+
+    def handle(self, *args, **options):
+        last_purge = 0
+        while True:
+            if time.monotonic() - last_purge > PURGE_INTERVAL:
+                requeue_stale_jobs()
+                fail_stale_imports()
+                purged = purge_export_jobs() + purge_import_jobs()
+                if purged:
+                    self.stdout.write(f'Purged {purged} old export and import jobs.')
+                last_purge = time.monotonic()
+            job = run_import_job()
+            if job is not None:
+                self.stdout.write(f'{job.pk}: import {job.status}, {job.rows_created} created, {job.rows_rejected} rejected.')
+                continue
+            job = run_export_job()
+            if job is not None:
+                self.stdout.write(f'{job.pk}: {job.status}, {job.rows_written} rows.')
+                continue
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,35 @@
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouse', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZoneBalance',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('hub_id', models.UUIDField(blank=True, db_index=True, editable=False, help_text='Hub this record belongs to (for multi-tenancy)', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.UUIDField(blank=True, help_text='UUID of the user who created this record', null=True)),
+                ('updated_by', models.UUIDField(blank=True, help_text='UUID of the user who last updated this record', null=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag - record is hidden but not removed')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when record was soft deleted', null=True)),
+                ('on_hand', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='On Hand')),
+                ('last_movement_id', models.UUIDField(blank=True, null=True, verbose_name='Last Movement')),
+                ('last_movement_at', models.DateTimeField(blank=True, null=True, verbose_name='Last Movement At')),
+                ('zone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='warehouse.zone')),
+            ],
+            options={
+                'db_table': 'warehouse_zonebalance',
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(fields=('hub_id', 'zone'), name='warehouse_zonebalance_hub_zone_uniq')],
+            },
+        ),
+    ]
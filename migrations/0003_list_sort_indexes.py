@@ -0,0 +1,63 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouse', '0002_zonebalance'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='warehouse',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'code', 'id'], name='wh_warehouse_code_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='warehouse',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'name', 'id'], name='wh_warehouse_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='warehouse',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'is_active', 'id'], name='wh_warehouse_is_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='warehouse',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'created_at', 'id'], name='wh_warehouse_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='zone',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'code', 'id'], name='wh_zone_code_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='zone',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'warehouse', 'code', 'id'], name='wh_zone_warehouse_code_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'reference', 'id'], name='wh_movement_reference_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'movement_type', 'id'], name='wh_movement_movement_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'source_zone', 'id'], name='wh_movement_source_zone_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'dest_zone', 'id'], name='wh_movement_dest_zone_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'status', 'id'], name='wh_movement_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'quantity', 'id'], name='wh_movement_quantity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'created_at', 'id'], name='wh_movement_created_at_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouse', '0003_list_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovementRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('hub_id', models.UUIDField(blank=True, db_index=True, editable=False, help_text='Hub this record belongs to (for multi-tenancy)', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.UUIDField(blank=True, help_text='UUID of the user who created this record', null=True)),
+                ('updated_by', models.UUIDField(blank=True, help_text='UUID of the user who last updated this record', null=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag - record is hidden but not removed')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when record was soft deleted', null=True)),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4, verbose_name='Period')),
+                ('bucket', models.DateTimeField(verbose_name='Bucket')),
+                ('warehouse_id', models.UUIDField(verbose_name='Warehouse')),
+                ('zone_id', models.UUIDField(verbose_name='Zone')),
+                ('direction', models.CharField(choices=[('in', 'In'), ('out', 'Out')], max_length=3, verbose_name='Direction')),
+                ('movement_type', models.CharField(choices=[('inbound', 'Inbound'), ('outbound', 'Outbound'), ('transfer', 'Transfer'), ('adjustment', 'Adjustment')], max_length=20, verbose_name='Movement Type')),
+                ('status', models.CharField(max_length=20, verbose_name='Status')),
+                ('quantity', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Quantity')),
+                ('movement_count', models.IntegerField(default=0, verbose_name='Movements')),
+            ],
+            options={
+                'db_table': 'warehouse_movementrollup',
+                'abstract': False,
+                'indexes': [models.Index(fields=['hub_id', 'period', 'warehouse_id', 'bucket'], name='wh_rollup_warehouse_idx')],
+                'constraints': [models.UniqueConstraint(fields=('hub_id', 'period', 'bucket', 'zone_id', 'direction', 'movement_type', 'status'), name='warehouse_movementrollup_key_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,89 @@
+"""
+PostgreSQL search structures for the warehouse datatables.
+
+StockMovement gets a trigger-maintained ``search_vector`` tsvector column with a
+GIN index and an expression index for reference prefix lookups; Warehouse gets
+trigram indexes matching the ``icontains`` filters of warehouses_list. The
+column is not declared on the model, so other backends are left untouched.
+"""
+from django.db import DatabaseError, migrations, transaction
+
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce({t}reference, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce({t}movement_type, '') || ' ' || coalesce({t}status, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce({t}notes, '')), 'C')"
+)
+
+FORWARD_SQL = [
+    'ALTER TABLE warehouse_stockmovement ADD COLUMN IF NOT EXISTS search_vector tsvector',
+    f"""
+    CREATE OR REPLACE FUNCTION warehouse_stockmovement_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {SEARCH_VECTOR_SQL.format(t='NEW.')};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER IF EXISTS warehouse_stockmovement_search_vector_trg ON warehouse_stockmovement',
+    """
+    CREATE TRIGGER warehouse_stockmovement_search_vector_trg
+    BEFORE INSERT OR UPDATE OF reference, movement_type, status, notes ON warehouse_stockmovement
+    FOR EACH ROW EXECUTE FUNCTION warehouse_stockmovement_search_vector()
+    """,
+    f'UPDATE warehouse_stockmovement SET search_vector = {SEARCH_VECTOR_SQL.format(t="")}',
+    'CREATE INDEX IF NOT EXISTS wh_movement_search_idx ON warehouse_stockmovement '
+    'USING gin (search_vector) WHERE NOT is_deleted',
+    'CREATE INDEX IF NOT EXISTS wh_movement_ref_prefix_idx ON warehouse_stockmovement '
+    '(hub_id, upper(reference::text) text_pattern_ops) WHERE NOT is_deleted',
+]
+
+TRIGRAM_SQL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS wh_warehouse_name_trgm_idx ON warehouse_warehouse USING gin (upper(name::text) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS wh_warehouse_code_trgm_idx ON warehouse_warehouse USING gin (upper(code::text) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS wh_warehouse_address_trgm_idx ON warehouse_warehouse USING gin (upper(address::text) gin_trgm_ops)',
+]
+
+REVERSE_SQL = [
+    'DROP INDEX IF EXISTS wh_warehouse_address_trgm_idx',
+    'DROP INDEX IF EXISTS wh_warehouse_code_trgm_idx',
+    'DROP INDEX IF EXISTS wh_warehouse_name_trgm_idx',
+    'DROP INDEX IF EXISTS wh_movement_ref_prefix_idx',
+    'DROP INDEX IF EXISTS wh_movement_search_idx',
+    'DROP TRIGGER IF EXISTS warehouse_stockmovement_search_vector_trg ON warehouse_stockmovement',
+    'DROP FUNCTION IF EXISTS warehouse_stockmovement_search_vector()',
+    'ALTER TABLE warehouse_stockmovement DROP COLUMN IF EXISTS search_vector',
+]
+
+
+def forwards(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in FORWARD_SQL:
+        schema_editor.execute(sql)
+    # pg_trgm may not be installable by the application role; the trigram
+    # indexes are an optimisation, so skip them rather than fail the migration.
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            for sql in TRIGRAM_SQL:
+                schema_editor.execute(sql)
+    except DatabaseError:
+        pass
+
+
+def backwards(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in REVERSE_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouse', '0004_movementrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
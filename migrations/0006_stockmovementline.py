@@ -0,0 +1,62 @@
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouse', '0005_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovementLine',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('hub_id', models.UUIDField(blank=True, db_index=True, editable=False, help_text='Hub this record belongs to (for multi-tenancy)', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.UUIDField(blank=True, help_text='UUID of the user who created this record', null=True)),
+                ('updated_by', models.UUIDField(blank=True, help_text='UUID of the user who last updated this record', null=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag - record is hidden but not removed')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when record was soft deleted', null=True)),
+                ('product_ref', models.CharField(max_length=64, verbose_name='Product')),
+                ('lot', models.CharField(blank=True, max_length=64, verbose_name='Lot')),
+                ('serial', models.CharField(blank=True, max_length=64, verbose_name='Serial')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Quantity')),
+                ('unit', models.CharField(default='unit', max_length=16, verbose_name='Unit')),
+                ('movement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='warehouse.stockmovement')),
+            ],
+            options={
+                'db_table': 'warehouse_stockmovementline',
+                'abstract': False,
+                'indexes': [
+                    models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'product_ref', 'lot'], name='wh_line_product_idx'),
+                    models.Index(condition=models.Q(('serial', ''), _negated=True), fields=['hub_id', 'serial'], name='wh_line_serial_idx'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='ZoneProductBalance',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('hub_id', models.UUIDField(blank=True, db_index=True, editable=False, help_text='Hub this record belongs to (for multi-tenancy)', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.UUIDField(blank=True, help_text='UUID of the user who created this record', null=True)),
+                ('updated_by', models.UUIDField(blank=True, help_text='UUID of the user who last updated this record', null=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag - record is hidden but not removed')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when record was soft deleted', null=True)),
+                ('product_ref', models.CharField(max_length=64, verbose_name='Product')),
+                ('lot', models.CharField(blank=True, max_length=64, verbose_name='Lot')),
+                ('on_hand', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='On Hand')),
+                ('zone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_balances', to='warehouse.zone')),
+            ],
+            options={
+                'db_table': 'warehouse_zoneproductbalance',
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(fields=('hub_id', 'product_ref', 'zone', 'lot'), name='warehouse_zoneproductbalance_key_uniq')],
+            },
+        ),
+    ]
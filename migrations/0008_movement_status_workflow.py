@@ -0,0 +1,125 @@
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, Max, OuterRef, Subquery, Sum
+
+MOVEMENT_STATUSES = ('pending', 'in_progress', 'done', 'cancelled')
+STATUS_ALIASES = {
+    'in progress': 'in_progress', 'in-progress': 'in_progress', 'started': 'in_progress',
+    'complete': 'done', 'completed': 'done', 'canceled': 'cancelled',
+}
+
+
+def _normalize(value):
+    key = (value or '').strip().lower()
+    key = STATUS_ALIASES.get(key, key)
+    return key if key in MOVEMENT_STATUSES else 'pending'
+
+
+def normalize_statuses(apps, schema_editor):
+    """Map free-text statuses onto the workflow and merge the affected rollup rows."""
+    StockMovement = apps.get_model('warehouse', 'StockMovement')
+    MovementRollup = apps.get_model('warehouse', 'MovementRollup')
+
+    legacy = StockMovement.objects.exclude(status__in=MOVEMENT_STATUSES).values_list('status', flat=True).distinct()
+    for value in list(legacy):
+        StockMovement.objects.filter(status=value).update(status=_normalize(value))
+
+    key_fields = ('hub_id', 'period', 'bucket', 'zone_id', 'direction', 'movement_type')
+    for pk in list(MovementRollup.objects.exclude(status__in=MOVEMENT_STATUSES).values_list('pk', flat=True)):
+        rollup = MovementRollup.objects.get(pk=pk)
+        target = _normalize(rollup.status)
+        merged = MovementRollup.objects.filter(status=target, **{f: getattr(rollup, f) for f in key_fields}).update(
+            quantity=F('quantity') + rollup.quantity,
+            movement_count=F('movement_count') + rollup.movement_count,
+        )
+        if merged:
+            rollup.delete()
+        else:
+            rollup.status = target
+            rollup.save(update_fields=['status'])
+
+
+def rebuild_balances(apps, schema_editor):
+    """
+    Recompute the zone and product balances of hubs with cancelled movements.
+
+    Cancelled movements used to be posted to the balances like any other; the
+    ledger now leaves them out, so a later edit or delete of one would never
+    reverse its stock. Rebuilt from live, non-cancelled history.
+    """
+    StockMovement = apps.get_model('warehouse', 'StockMovement')
+    StockMovementLine = apps.get_model('warehouse', 'StockMovementLine')
+    ZoneBalance = apps.get_model('warehouse', 'ZoneBalance')
+    ZoneProductBalance = apps.get_model('warehouse', 'ZoneProductBalance')
+
+    hubs = list(StockMovement.objects.filter(status='cancelled').values_list('hub_id', flat=True).distinct())
+    for hub_id in hubs:
+        movements = StockMovement.objects.filter(hub_id=hub_id, is_deleted=False).exclude(status='cancelled')
+        lines = StockMovementLine.objects.filter(hub_id=hub_id, is_deleted=False, movement__is_deleted=False).exclude(
+            movement__status='cancelled',
+        )
+        zones, products = {}, {}
+        for zone_field, sign in (('dest_zone', 1), ('source_zone', -1)):
+            newest = movements.filter(**{f'{zone_field}_id': OuterRef(f'{zone_field}_id')}).order_by('-created_at', '-id')
+            rows = (
+                movements.exclude(**{f'{zone_field}__isnull': True})
+                .values(f'{zone_field}_id')
+                .annotate(total=Sum('quantity'), last_at=Max('created_at'), last_id=Subquery(newest.values('id')[:1]))
+                .order_by()
+            )
+            for row in rows:
+                on_hand, last_at, last_id = zones.get(row[f'{zone_field}_id'], (Decimal('0'), None, None))
+                if last_at is None or (row['last_at'] and row['last_at'] > last_at):
+                    last_at, last_id = row['last_at'], row['last_id']
+                zones[row[f'{zone_field}_id']] = (on_hand + sign * (row['total'] or 0), last_at, last_id)
+            rows = (
+                lines.exclude(**{f'movement__{zone_field}__isnull': True})
+                .values(f'movement__{zone_field}_id', 'product_ref', 'lot').annotate(total=Sum('quantity')).order_by()
+            )
+            for row in rows:
+                key = (row[f'movement__{zone_field}_id'], row['product_ref'], row['lot'])
+                products[key] = products.get(key, Decimal('0')) + sign * (row['total'] or 0)
+
+        ZoneBalance._base_manager.filter(hub_id=hub_id).delete()
+        ZoneBalance.objects.bulk_create([
+            ZoneBalance(hub_id=hub_id, zone_id=zone_id, on_hand=on_hand, last_movement_id=last_id, last_movement_at=last_at)
+            for zone_id, (on_hand, last_at, last_id) in zones.items()
+        ], batch_size=1000)
+        ZoneProductBalance._base_manager.filter(hub_id=hub_id).delete()
+        ZoneProductBalance.objects.bulk_create([
+            ZoneProductBalance(hub_id=hub_id, zone_id=zone_id, product_ref=product_ref, lot=lot, on_hand=on_hand)
+            for (zone_id, product_ref, lot), on_hand in products.items()
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouse', '0007_stockmovement_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_statuses, migrations.RunPython.noop),
+        migrations.RunPython(rebuild_balances, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('in_progress', 'In Progress'), ('done', 'Done'), ('cancelled', 'Cancelled')], default='pending', max_length=20, verbose_name='Status'),
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Started At'),
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='done_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Done At'),
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='cancelled_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Cancelled At'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouse', '0008_movement_status_workflow'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='zone',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'name', 'id'], name='wh_zone_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='zone',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'created_at', 'id'], name='wh_zone_created_at_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def backfill_paths(apps, schema_editor):
+    """Existing zones become roots of their warehouse."""
+    Zone = apps.get_model('warehouse', 'Zone')
+    batch = []
+    for zone in Zone.objects.only('id').iterator(chunk_size=BATCH_SIZE):
+        zone.path = f'{zone.id.hex}/'
+        batch.append(zone)
+        if len(batch) >= BATCH_SIZE:
+            Zone.objects.bulk_update(batch, ['path'])
+            batch = []
+    Zone.objects.bulk_update(batch, ['path'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouse', '0009_zone_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='zone',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='warehouse.zone'),
+        ),
+        migrations.AddField(
+            model_name='zone',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=330, verbose_name='Path'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='zone',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Depth'),
+        ),
+        migrations.AlterField(
+            model_name='zone',
+            name='zone_type',
+            field=models.CharField(choices=[('area', 'Area'), ('aisle', 'Aisle'), ('rack', 'Rack'), ('bin', 'Bin'), ('storage', 'Storage'), ('receiving', 'Receiving'), ('picking', 'Picking'), ('shipping', 'Shipping')], default='storage', max_length=30, verbose_name='Zone Type'),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='zone',
+            index=models.Index(fields=['hub_id', 'path'], name='wh_zone_path_idx', opclasses=['uuid_ops', 'varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,44 @@
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouse', '0010_zone_tree'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('hub_id', models.UUIDField(blank=True, db_index=True, editable=False, help_text='Hub this record belongs to (for multi-tenancy)', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.UUIDField(blank=True, help_text='UUID of the user who created this record', null=True)),
+                ('updated_by', models.UUIDField(blank=True, help_text='UUID of the user who last updated this record', null=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag - record is hidden but not removed')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when record was soft deleted', null=True)),
+                ('kind', models.CharField(choices=[('stock_movements', 'Stock Movements'), ('warehouses', 'Warehouses')], max_length=30, verbose_name='Kind')),
+                ('export_format', models.CharField(choices=[('csv', 'CSV'), ('excel', 'Excel')], max_length=10, verbose_name='Format')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='Parameters')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=10, verbose_name='Status')),
+                ('total_rows', models.IntegerField(blank=True, null=True, verbose_name='Total Rows')),
+                ('rows_written', models.IntegerField(default=0, verbose_name='Rows Written')),
+                ('file', models.FileField(blank=True, upload_to='warehouse/exports/%Y/%m/', verbose_name='File')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Started At')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+            ],
+            options={
+                'db_table': 'warehouse_exportjob',
+                'abstract': False,
+                'indexes': [
+                    models.Index(fields=['status', 'created_at'], name='wh_export_status_idx'),
+                    models.Index(fields=['hub_id', 'created_by', 'created_at'], name='wh_export_owner_idx'),
+                ],
+            },
+        ),
+    ]
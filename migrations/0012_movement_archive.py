@@ -0,0 +1,68 @@
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouse', '0011_exportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovementArchive',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('hub_id', models.UUIDField(blank=True, db_index=True, editable=False, help_text='Hub this record belongs to (for multi-tenancy)', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.UUIDField(blank=True, help_text='UUID of the user who created this record', null=True)),
+                ('updated_by', models.UUIDField(blank=True, help_text='UUID of the user who last updated this record', null=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag - record is hidden but not removed')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when record was soft deleted', null=True)),
+                ('reference', models.CharField(max_length=50, verbose_name='Reference')),
+                ('movement_type', models.CharField(choices=[('inbound', 'Inbound'), ('outbound', 'Outbound'), ('transfer', 'Transfer'), ('adjustment', 'Adjustment')], max_length=20, verbose_name='Movement Type')),
+                ('source_zone', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='warehouse.zone')),
+                ('dest_zone', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='warehouse.zone')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Quantity')),
+                ('notes', models.TextField(blank=True, verbose_name='Notes')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('in_progress', 'In Progress'), ('done', 'Done'), ('cancelled', 'Cancelled')], default='pending', max_length=20, verbose_name='Status')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Started At')),
+                ('done_at', models.DateTimeField(blank=True, null=True, verbose_name='Done At')),
+                ('cancelled_at', models.DateTimeField(blank=True, null=True, verbose_name='Cancelled At')),
+                ('idempotency_key', models.CharField(blank=True, editable=False, max_length=64, null=True, verbose_name='Idempotency Key')),
+            ],
+            options={
+                'db_table': 'warehouse_stockmovementarchive',
+                'abstract': False,
+                'indexes': [
+                    models.Index(fields=['hub_id', 'created_at', 'id'], name='wh_archive_created_idx'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockMovementLineArchive',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('hub_id', models.UUIDField(blank=True, db_index=True, editable=False, help_text='Hub this record belongs to (for multi-tenancy)', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.UUIDField(blank=True, help_text='UUID of the user who created this record', null=True)),
+                ('updated_by', models.UUIDField(blank=True, help_text='UUID of the user who last updated this record', null=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag - record is hidden but not removed')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when record was soft deleted', null=True)),
+                ('movement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='warehouse.stockmovementarchive')),
+                ('product_ref', models.CharField(max_length=64, verbose_name='Product')),
+                ('lot', models.CharField(blank=True, max_length=64, verbose_name='Lot')),
+                ('serial', models.CharField(blank=True, max_length=64, verbose_name='Serial')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Quantity')),
+                ('unit', models.CharField(default='unit', max_length=16, verbose_name='Unit')),
+            ],
+            options={
+                'db_table': 'warehouse_stockmovementlinearchive',
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouse', '0012_movement_archive'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'movement_type', 'status', 'created_at'], name='wh_movement_type_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'status', 'created_at'], name='wh_movement_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'source_zone', 'created_at'], name='wh_movement_source_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'dest_zone', 'created_at'], name='wh_movement_dest_date_idx'),
+        ),
+    ]
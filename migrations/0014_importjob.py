@@ -0,0 +1,44 @@
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouse', '0013_movement_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('hub_id', models.UUIDField(blank=True, db_index=True, editable=False, help_text='Hub this record belongs to (for multi-tenancy)', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.UUIDField(blank=True, help_text='UUID of the user who created this record', null=True)),
+                ('updated_by', models.UUIDField(blank=True, help_text='UUID of the user who last updated this record', null=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag - record is hidden but not removed')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when record was soft deleted', null=True)),
+                ('filename', models.CharField(max_length=255, verbose_name='File Name')),
+                ('source', models.FileField(upload_to='warehouse/imports/%Y/%m/', verbose_name='Source File')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=10, verbose_name='Status')),
+                ('rows_created', models.IntegerField(default=0, verbose_name='Rows Created')),
+                ('rows_rejected', models.IntegerField(default=0, verbose_name='Rows Rejected')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='Errors')),
+                ('rejected_file', models.FileField(blank=True, upload_to='warehouse/imports/%Y/%m/', verbose_name='Rejected Rows')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Started At')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+            ],
+            options={
+                'db_table': 'warehouse_importjob',
+                'abstract': False,
+                'indexes': [
+                    models.Index(fields=['status', 'created_at'], name='wh_import_status_idx'),
+                    models.Index(fields=['hub_id', 'created_by', 'created_at'], name='wh_import_owner_idx'),
+                ],
+            },
+        ),
+    ]
@@ -10,6 +10,70 @@ MOVEMENT_TYPE = [
     ('adjustment', _('Adjustment')),
 ]
 
+MOVEMENT_STATUS = [
+    ('pending', _('Pending')),
+    ('in_progress', _('In Progress')),
+    ('done', _('Done')),
+    ('cancelled', _('Cancelled')),
+]
+
+# Allowed status changes; done and cancelled are final.
+STATUS_TRANSITIONS = {
+    'pending': ('in_progress', 'cancelled'),
+    'in_progress': ('done', 'cancelled'),
+    'done': (),
+    'cancelled': (),
+}
+
+# Timestamp field recorded when a movement enters a status.
+STATUS_TIMESTAMP_FIELDS = {
+    'in_progress': 'started_at',
+    'done': 'done_at',
+    'cancelled': 'cancelled_at',
+}
+
+ZONE_TYPE = [
+    ('area', _('Area')),
+    ('aisle', _('Aisle')),
+    ('rack', _('Rack')),
+    ('bin', _('Bin')),
+    ('storage', _('Storage')),
+    ('receiving', _('Receiving')),
+    ('picking', _('Picking')),
+    ('shipping', _('Shipping')),
+]
+
+# Each level of a zone path is the zone id as 32 hex digits plus a slash.
+ZONE_PATH_STEP = 33
+ZONE_MAX_DEPTH = 10
+
+ROLLUP_PERIOD = [
+    ('hour', _('Hour')),
+    ('day', _('Day')),
+]
+
+ROLLUP_DIRECTION = [
+    ('in', _('In')),
+    ('out', _('Out')),
+]
+
+EXPORT_KIND = [
+    ('stock_movements', _('Stock Movements')),
+    ('warehouses', _('Warehouses')),
+]
+
+EXPORT_FORMAT = [
+    ('csv', _('CSV')),
+    ('excel', _('Excel')),
+]
+
+EXPORT_STATUS = [
+    ('queued', _('Queued')),
+    ('running', _('Running')),
+    ('done', _('Done')),
+    ('failed', _('Failed')),
+]
+
 class Warehouse(HubBaseModel):
     name = models.CharField(max_length=255, verbose_name=_('Name'))
     code = models.CharField(max_length=20, blank=True, verbose_name=_('Code'))
@@ -18,36 +82,325 @@ class Warehouse(HubBaseModel):
 
     class Meta(HubBaseModel.Meta):
         db_table = 'warehouse_warehouse'
+        indexes = [
+            models.Index(fields=['hub_id', field, 'id'], name=f'wh_warehouse_{field}_idx', condition=models.Q(is_deleted=False))
+            for field in ('code', 'name', 'is_active', 'created_at')
+        ]
 
     def __str__(self):
         return self.name
 
 
 class Zone(HubBaseModel):
+    """
+    A location inside a warehouse: area, aisle, rack, bin...
+
+    Locations form a tree through ``parent``. ``path`` is the materialized list
+    of ancestor ids ending with the zone's own id, so every location under a
+    node is one ``path__startswith`` range scan on ``wh_zone_path_idx``.
+    """
     warehouse = models.ForeignKey('Warehouse', on_delete=models.CASCADE, related_name='zones')
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='children')
     name = models.CharField(max_length=255, verbose_name=_('Name'))
     code = models.CharField(max_length=20, blank=True, verbose_name=_('Code'))
-    zone_type = models.CharField(max_length=30, default='storage', verbose_name=_('Zone Type'))
+    zone_type = models.CharField(max_length=30, choices=ZONE_TYPE, default='storage', verbose_name=_('Zone Type'))
+    path = models.CharField(max_length=ZONE_PATH_STEP * ZONE_MAX_DEPTH, editable=False, verbose_name=_('Path'))
+    depth = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name=_('Depth'))
 
     class Meta(HubBaseModel.Meta):
         db_table = 'warehouse_zone'
+        indexes = [
+            models.Index(fields=['hub_id', 'code', 'id'], name='wh_zone_code_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'warehouse', 'code', 'id'], name='wh_zone_warehouse_code_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'name', 'id'], name='wh_zone_name_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'created_at', 'id'], name='wh_zone_created_at_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'path'], name='wh_zone_path_idx', opclasses=['uuid_ops', 'varchar_pattern_ops']),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if not self.path:
+            self.set_parent(self.parent)
+        super().save(*args, **kwargs)
+
+    def set_parent(self, parent):
+        """Attach the zone under ``parent`` (or make it a root) and derive path and depth."""
+        self.parent = parent
+        self.path = f'{parent.path if parent else ""}{self.pk.hex}/'
+        self.depth = parent.depth + 1 if parent else 0
+
 
 class StockMovement(HubBaseModel):
+    is_archived = False
+
     reference = models.CharField(max_length=50, verbose_name=_('Reference'))
     movement_type = models.CharField(max_length=20, choices=MOVEMENT_TYPE, verbose_name=_('Movement Type'))
     source_zone = models.ForeignKey('Zone', on_delete=models.SET_NULL, null=True, blank=True, related_name='outgoing')
     dest_zone = models.ForeignKey('Zone', on_delete=models.SET_NULL, null=True, blank=True, related_name='incoming')
     quantity = models.DecimalField(max_digits=10, decimal_places=2, verbose_name=_('Quantity'))
     notes = models.TextField(blank=True, verbose_name=_('Notes'))
-    status = models.CharField(max_length=20, default='pending', verbose_name=_('Status'))
+    status = models.CharField(max_length=20, choices=MOVEMENT_STATUS, default='pending', verbose_name=_('Status'))
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Started At'))
+    done_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Done At'))
+    cancelled_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Cancelled At'))
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True, editable=False, verbose_name=_('Idempotency Key'))
 
     class Meta(HubBaseModel.Meta):
         db_table = 'warehouse_stockmovement'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['hub_id', 'idempotency_key'], name='warehouse_stockmovement_idempotency_uniq',
+                condition=models.Q(idempotency_key__isnull=False),
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['hub_id', field, 'id'], name=f'wh_movement_{field}_idx', condition=models.Q(is_deleted=False))
+            for field in ('reference', 'movement_type', 'source_zone', 'dest_zone', 'status', 'quantity', 'created_at')
+        ] + [
+            # List filters: equality on the facet columns, then a created_at range.
+            models.Index(fields=['hub_id', *fields, 'created_at'], name=name, condition=models.Q(is_deleted=False))
+            for name, fields in (
+                ('wh_movement_type_status_idx', ('movement_type', 'status')),
+                ('wh_movement_status_date_idx', ('status',)),
+                ('wh_movement_source_date_idx', ('source_zone',)),
+                ('wh_movement_dest_date_idx', ('dest_zone',)),
+            )
+        ]
+
+    def __str__(self):
+        return self.reference
+
+
+class StockMovementLine(HubBaseModel):
+    """
+    Product-level line of a StockMovement.
+
+    The header's zones apply to every line: a line moves ``quantity`` of
+    ``product_ref`` (optionally a lot or a serial number) out of the source
+    zone and into the destination zone.
+    """
+    movement = models.ForeignKey('StockMovement', on_delete=models.CASCADE, related_name='lines')
+    product_ref = models.CharField(max_length=64, verbose_name=_('Product'))
+    lot = models.CharField(max_length=64, blank=True, verbose_name=_('Lot'))
+    serial = models.CharField(max_length=64, blank=True, verbose_name=_('Serial'))
+    quantity = models.DecimalField(max_digits=10, decimal_places=2, verbose_name=_('Quantity'))
+    unit = models.CharField(max_length=16, default='unit', verbose_name=_('Unit'))
+
+    class Meta(HubBaseModel.Meta):
+        db_table = 'warehouse_stockmovementline'
+        indexes = [
+            models.Index(fields=['hub_id', 'product_ref', 'lot'], name='wh_line_product_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'serial'], name='wh_line_serial_idx', condition=~models.Q(serial='')),
+        ]
+
+    def __str__(self):
+        return f'{self.product_ref} x {self.quantity}'
+
+
+class StockMovementArchive(HubBaseModel):
+    """
+    Closed or purged StockMovement rows moved out of the hot table.
+
+    Same columns as StockMovement, filled by ``services.archive_movements`` with
+    ``INSERT ... SELECT`` so ids and timestamps are kept. Read-only: balances
+    already include these movements, and the rebuild functions read both tables.
+    """
+    is_archived = True
+
+    reference = models.CharField(max_length=50, verbose_name=_('Reference'))
+    movement_type = models.CharField(max_length=20, choices=MOVEMENT_TYPE, verbose_name=_('Movement Type'))
+    source_zone = models.ForeignKey('Zone', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    dest_zone = models.ForeignKey('Zone', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    quantity = models.DecimalField(max_digits=10, decimal_places=2, verbose_name=_('Quantity'))
+    notes = models.TextField(blank=True, verbose_name=_('Notes'))
+    status = models.CharField(max_length=20, choices=MOVEMENT_STATUS, default='pending', verbose_name=_('Status'))
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Started At'))
+    done_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Done At'))
+    cancelled_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Cancelled At'))
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True, editable=False, verbose_name=_('Idempotency Key'))
+
+    class Meta(HubBaseModel.Meta):
+        db_table = 'warehouse_stockmovementarchive'
+        indexes = [
+            models.Index(fields=['hub_id', 'created_at', 'id'], name='wh_archive_created_idx'),
+        ]
 
     def __str__(self):
         return self.reference
 
+
+class StockMovementLineArchive(HubBaseModel):
+    """Lines of archived movements (see StockMovementArchive)."""
+    movement = models.ForeignKey('StockMovementArchive', on_delete=models.CASCADE, related_name='lines')
+    product_ref = models.CharField(max_length=64, verbose_name=_('Product'))
+    lot = models.CharField(max_length=64, blank=True, verbose_name=_('Lot'))
+    serial = models.CharField(max_length=64, blank=True, verbose_name=_('Serial'))
+    quantity = models.DecimalField(max_digits=10, decimal_places=2, verbose_name=_('Quantity'))
+    unit = models.CharField(max_length=16, default='unit', verbose_name=_('Unit'))
+
+    class Meta(HubBaseModel.Meta):
+        db_table = 'warehouse_stockmovementlinearchive'
+
+    def __str__(self):
+        return f'{self.product_ref} x {self.quantity}'
+
+
+class ZoneBalance(HubBaseModel):
+    """
+    Materialized on-hand quantity per zone.
+
+    Maintained incrementally by ``services.apply_movement_changes`` from every
+    StockMovement write path; ``rebuild_zone_balances`` recomputes it from history.
+    """
+    zone = models.ForeignKey('Zone', on_delete=models.CASCADE, related_name='balances')
+    on_hand = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name=_('On Hand'))
+    last_movement_id = models.UUIDField(null=True, blank=True, verbose_name=_('Last Movement'))
+    last_movement_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Last Movement At'))
+
+    class Meta(HubBaseModel.Meta):
+        db_table = 'warehouse_zonebalance'
+        constraints = [
+            models.UniqueConstraint(fields=['hub_id', 'zone'], name='warehouse_zonebalance_hub_zone_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.zone_id}: {self.on_hand}'
+
+
+class ZoneProductBalance(HubBaseModel):
+    """
+    Materialized on-hand quantity per zone, product and lot.
+
+    Maintained from StockMovementLine rows alongside ``ZoneBalance``, so the
+    availability of a SKU in a zone is a single unique-index read.
+    """
+    zone = models.ForeignKey('Zone', on_delete=models.CASCADE, related_name='product_balances')
+    product_ref = models.CharField(max_length=64, verbose_name=_('Product'))
+    lot = models.CharField(max_length=64, blank=True, verbose_name=_('Lot'))
+    on_hand = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name=_('On Hand'))
+
+    class Meta(HubBaseModel.Meta):
+        db_table = 'warehouse_zoneproductbalance'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['hub_id', 'product_ref', 'zone', 'lot'], name='warehouse_zoneproductbalance_key_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.product_ref} @ {self.zone_id}: {self.on_hand}'
+
+
+class MovementRollup(HubBaseModel):
+    """
+    Movement totals per time bucket, zone, direction, type and status.
+
+    One movement contributes an ``out`` row for its source zone and an ``in`` row
+    for its destination zone, in both the hourly and the daily series. Zone and
+    warehouse are stored as plain ids so history survives zone deletion.
+    """
+    period = models.CharField(max_length=4, choices=ROLLUP_PERIOD, verbose_name=_('Period'))
+    bucket = models.DateTimeField(verbose_name=_('Bucket'))
+    warehouse_id = models.UUIDField(verbose_name=_('Warehouse'))
+    zone_id = models.UUIDField(verbose_name=_('Zone'))
+    direction = models.CharField(max_length=3, choices=ROLLUP_DIRECTION, verbose_name=_('Direction'))
+    movement_type = models.CharField(max_length=20, choices=MOVEMENT_TYPE, verbose_name=_('Movement Type'))
+    status = models.CharField(max_length=20, verbose_name=_('Status'))
+    quantity = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name=_('Quantity'))
+    movement_count = models.IntegerField(default=0, verbose_name=_('Movements'))
+
+    class Meta(HubBaseModel.Meta):
+        db_table = 'warehouse_movementrollup'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['hub_id', 'period', 'bucket', 'zone_id', 'direction', 'movement_type', 'status'],
+                name='warehouse_movementrollup_key_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['hub_id', 'period', 'warehouse_id', 'bucket'], name='wh_rollup_warehouse_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.period} {self.bucket:%Y-%m-%d %H:00} {self.direction} {self.quantity}'
+
+
+class ExportJob(HubBaseModel):
+    """
+    Background export of a datatable to a downloadable file.
+
+    ``params`` holds the list's search and sort state when the job was queued.
+    Jobs are claimed and written by ``export_jobs.run_export_job``; progress is
+    kept in ``rows_written`` so the UI can poll it.
+    """
+    kind = models.CharField(max_length=30, choices=EXPORT_KIND, verbose_name=_('Kind'))
+    export_format = models.CharField(max_length=10, choices=EXPORT_FORMAT, verbose_name=_('Format'))
+    params = models.JSONField(default=dict, blank=True, verbose_name=_('Parameters'))
+    status = models.CharField(max_length=10, choices=EXPORT_STATUS, default='queued', verbose_name=_('Status'))
+    total_rows = models.IntegerField(null=True, blank=True, verbose_name=_('Total Rows'))
+    rows_written = models.IntegerField(default=0, verbose_name=_('Rows Written'))
+    file = models.FileField(upload_to='warehouse/exports/%Y/%m/', blank=True, verbose_name=_('File'))
+    error = models.TextField(blank=True, verbose_name=_('Error'))
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Started At'))
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Finished At'))
+
+    class Meta(HubBaseModel.Meta):
+        db_table = 'warehouse_exportjob'
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='wh_export_status_idx'),
+            models.Index(fields=['hub_id', 'created_by', 'created_at'], name='wh_export_owner_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind}.{self.export_format} ({self.status})'
+
+    @property
+    def is_finished(self):
+        return self.status in ('done', 'failed')
+
+    @property
+    def progress(self):
+        """Percentage of rows written, or None while the total is unknown."""
+        if self.status == 'done':
+            return 100
+        if not self.total_rows:
+            return None
+        return min(99, self.rows_written * 100 // self.total_rows)
+
+
+
+class ImportJob(HubBaseModel):
+    """
+    Background import of an uploaded movements file.
+
+    The upload is kept in ``source`` until ``import_jobs.run_import_job`` has
+    committed it chunk by chunk; the counts move after every chunk so the UI
+    can poll them. Rejected rows end up in ``rejected_file``, the first of them
+    also in ``errors``.
+    """
+    filename = models.CharField(max_length=255, verbose_name=_('File Name'))
+    source = models.FileField(upload_to='warehouse/imports/%Y/%m/', verbose_name=_('Source File'))
+    status = models.CharField(max_length=10, choices=EXPORT_STATUS, default='queued', verbose_name=_('Status'))
+    rows_created = models.IntegerField(default=0, verbose_name=_('Rows Created'))
+    rows_rejected = models.IntegerField(default=0, verbose_name=_('Rows Rejected'))
+    errors = models.JSONField(default=list, blank=True, verbose_name=_('Errors'))
+    rejected_file = models.FileField(upload_to='warehouse/imports/%Y/%m/', blank=True, verbose_name=_('Rejected Rows'))
+    error = models.TextField(blank=True, verbose_name=_('Error'))
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Started At'))
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Finished At'))
+
+    class Meta(HubBaseModel.Meta):
+        db_table = 'warehouse_importjob'
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='wh_import_status_idx'),
+            models.Index(fields=['hub_id', 'created_by', 'created_at'], name='wh_import_owner_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.filename} ({self.status})'
+
+    @property
+    def is_finished(self):
+        return self.status in ('done', 'failed')
@@ -19,6 +19,7 @@ NAVIGATION = [
 {'label': _('Warehouses'), 'icon': 'home-outline', 'id': 'warehouses'},
 {'label': _('Zones'), 'icon': 'grid-outline', 'id': 'zones'},
 {'label': _('Movements'), 'icon': 'swap-horizontal-outline', 'id': 'movements'},
+{'label': _('Reports'), 'icon': 'list-outline', 'id': 'reports'},
 {'label': _('Settings'), 'icon': 'settings-outline', 'id': 'settings'},
 ]
 
@@ -29,6 +30,10 @@ PERMISSIONS = [
 'warehouse.add_warehouse',
 'warehouse.change_warehouse',
 'warehouse.delete_warehouse',
+'warehouse.view_zone',
+'warehouse.add_zone',
+'warehouse.change_zone',
+'warehouse.delete_zone',
 'warehouse.view_stockmovement',
 'warehouse.add_stockmovement',
 'warehouse.manage_settings',
@@ -39,13 +44,17 @@ ROLE_PERMISSIONS = {
     "manager": [
         "add_stockmovement",
         "add_warehouse",
+        "add_zone",
         "change_warehouse",
+        "change_zone",
         "view_stockmovement",
         "view_warehouse",
+        "view_zone",
     ],
     "employee": [
         "add_warehouse",
         "view_stockmovement",
         "view_warehouse",
+        "view_zone",
     ],
 }
@@ -0,0 +1,139 @@
+"""
+Conditional responses and rendered page caching for the hub's read views.
+
+Every write goes through ``services.mark_hub_changed``, which moves the hub to a
+new data version once it commits. Views decorated with ``hub_cached`` answer
+``If-None-Match`` / ``If-Modified-Since`` with ``304 Not Modified`` while that
+version holds. They also keep their rendered HTMX fragments (list rows, content
+partials) in the cache, keyed by hub, version and the full request, so a repeated
+sort, page or refresh skips the queries and the rendering. Responses that used
+the CSRF token are never stored, since the token belongs to one session. Set
+``WAREHOUSE_FRAGMENT_CACHE = False`` to keep the conditional responses only.
+Writes made outside the module (e.g. in the Django admin) show up once the
+cached fragment expires.
+"""
+import asyncio
+import functools
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils import timezone
+from django.utils.http import http_date
+
+from . import services
+from .instrumentation import set_branch
+
+FRAGMENT_CACHE_TIMEOUT = 60 * 5
+VARY_HEADERS = ('HX-Request', 'HX-Target')
+
+
+def fragment_cache_enabled():
+    return getattr(settings, 'WAREHOUSE_FRAGMENT_CACHE', True)
+
+
+def _fingerprint(request, name, version):
+    """Everything a rendered response depends on besides the hub's data."""
+    parts = (
+        name, version, request.get_full_path(), request.headers.get('HX-Request', ''),
+        request.headers.get('HX-Target', ''), getattr(request, 'LANGUAGE_CODE', ''),
+        request.session.get('local_user_id', ''), timezone.localdate().isoformat(),
+    )
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def _cacheable(request, response):
+    return (
+        request.headers.get('HX-Request') == 'true' and response.status_code == 200
+        and not response.streaming and not response.cookies
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE') and not request.META.get('CSRF_COOKIE_USED')
+    )
+
+
+def _validators(request, name, version):
+    """``(fingerprint, etag, last_modified)`` of a request at a data version."""
+    fingerprint = _fingerprint(request, name, version)
+    # The browser's copy may hold this session's CSRF token, so its ETag is per session.
+    etag = '"%s"' % hashlib.sha1(f'{fingerprint}:{request.session.session_key}'.encode()).hexdigest()[:32]
+    return fingerprint, etag, int(services.version_modified(version).timestamp())
+
+
+def _cached_response(cached):
+    set_branch('cached')
+    content, content_type = cached
+    return HttpResponse(content, content_type=content_type)
+
+
+def _finish(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, VARY_HEADERS)
+    return response
+
+
+def _bypass(request):
+    return request.method not in ('GET', 'HEAD') or 'export' in request.GET
+
+
+def hub_cached(name, timeout=FRAGMENT_CACHE_TIMEOUT):
+    """
+    Serve 304s and cached HTMX fragments while the hub's data version holds.
+
+    Apply it below ``instrumented``, so cache hits are still measured. Exports
+    (``?export=``) and non-GET requests go straight to the view. Async views get
+    an async wrapper, which needs the session loaded (``async_views`` loads it
+    while checking the login).
+    """
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if _bypass(request):
+                    return await view(request, *args, **kwargs)
+                hub_id = request.session.get('hub_id')
+                version = await services.ahub_data_version(hub_id)
+                fingerprint, etag, last_modified = _validators(request, name, version)
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if response is not None:
+                    set_branch('not_modified')
+                else:
+                    key = f'warehouse:page:{hub_id}:{version}:{fingerprint}'
+                    cached = await cache.aget(key) if fragment_cache_enabled() else None
+                    if cached is not None:
+                        response = _cached_response(cached)
+                    else:
+                        response = await view(request, *args, **kwargs)
+                        if response.status_code != 200 or response.streaming:
+                            return response
+                        if fragment_cache_enabled() and _cacheable(request, response):
+                            await cache.aset(key, (response.content, response['Content-Type']), timeout)
+                return _finish(response, etag, last_modified)
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if _bypass(request):
+                return view(request, *args, **kwargs)
+            hub_id = request.session.get('hub_id')
+            version = services.hub_data_version(hub_id)
+            fingerprint, etag, last_modified = _validators(request, name, version)
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is not None:
+                set_branch('not_modified')
+            else:
+                key = f'warehouse:page:{hub_id}:{version}:{fingerprint}'
+                cached = cache.get(key) if fragment_cache_enabled() else None
+                if cached is not None:
+                    response = _cached_response(cached)
+                else:
+                    response = view(request, *args, **kwargs)
+                    if response.status_code != 200 or response.streaming:
+                        return response
+                    if fragment_cache_enabled() and _cacheable(request, response):
+                        cache.set(key, (response.content, response['Content-Type']), timeout)
+            return _finish(response, etag, last_modified)
+        return wrapper
+    return decorator
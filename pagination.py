@@ -0,0 +1,175 @@
+"""
+Keyset (cursor) pagination for the warehouse datatables.
+
+Offset pagination counts the whole result and re-scans every preceding row on
+each page. Keyset pagination seeks straight to ``(sort value, id)`` through the
+composite list indexes, so page 5,000 costs the same as page 1.
+``apaginate`` is the offset paginator of the async views.
+"""
+import base64
+import binascii
+import datetime
+import json
+import uuid
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+
+KEYSET_CHUNK_SIZE = 500
+
+
+class KeysetPage:
+    """Page-like result consumed by the list templates in cursor mode."""
+
+    is_keyset = True
+
+    def __init__(self, object_list, per_page, next_cursor=None, prev_cursor=None, estimated_count=None):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.estimated_count = estimated_count
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+
+def _serialize(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+def _row_value(row, name):
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def encode_cursor(field, descending, value, pk, direction):
+    payload = json.dumps(
+        {'f': field, 'o': 'desc' if descending else 'asc', 'v': _serialize(value), 'id': str(pk), 'd': direction},
+        separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a cursor token into a dict. Raises ValueError on malformed input."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if data['d'] not in ('next', 'prev') or data['o'] not in ('asc', 'desc'):
+            raise ValueError(token)
+        return {'field': data['f'], 'dir': data['o'], 'value': data['v'], 'pk': data['id'], 'direction': data['d']}
+    except (KeyError, TypeError, json.JSONDecodeError, UnicodeDecodeError, binascii.Error) as exc:
+        raise ValueError(token) from exc
+
+
+def cursor_ordering(token):
+    """
+    ``(field, dir)`` a cursor was issued for, or None.
+
+    Cursors carry their own ordering so a stale ``sort`` input on the page
+    cannot make the next page seek on the wrong column.
+    """
+    try:
+        data = decode_cursor(token)
+    except ValueError:
+        return None
+    return data['field'], data['dir']
+
+
+def estimate_count(qs):
+    """
+    Cheap row-count estimate for a filtered queryset.
+
+    Uses the planner's estimate on PostgreSQL; falls back to an exact count elsewhere.
+    """
+    if connection.vendor != 'postgresql':
+        return qs.count()
+    sql, params = qs.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def keyset_paginate(qs, field, descending=False, cursor=None, per_page=KEYSET_CHUNK_SIZE, estimate=False):
+    """
+    Fetch one page of ``qs`` ordered by ``(field, id)`` after/before ``cursor``.
+
+    ``field`` must be a non-nullable concrete field. ``qs`` may be a ``values()``
+    queryset as long as it selects ``field`` and ``id``. Malformed cursors
+    restart from the first page.
+    """
+    per_page = per_page or KEYSET_CHUNK_SIZE
+    model_field = qs.model._meta.get_field(field)
+    estimated_count = estimate_count(qs) if estimate else None
+
+    backwards = False
+    if cursor:
+        try:
+            data = decode_cursor(cursor)
+            if data['field'] != field or (data['dir'] == 'desc') != descending:
+                raise ValueError(cursor)
+            value = model_field.to_python(data['value'])
+            pk = qs.model._meta.pk.to_python(data['pk'])
+        except (ValueError, ValidationError):
+            cursor = None
+        else:
+            backwards = data['direction'] == 'prev'
+            op = 'gt' if descending == backwards else 'lt'
+            qs = qs.filter(Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'pk__{op}': pk}))
+
+    descending_scan = descending != backwards
+    ordering = (f'-{field}', '-pk') if descending_scan else (field, 'pk')
+    rows = list(qs.order_by(*ordering)[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    has_next = True if backwards else has_more
+    has_prev = has_more if backwards else cursor is not None
+    next_cursor = prev_cursor = None
+    pk_name = qs.model._meta.pk.attname
+    if rows and has_next:
+        last = rows[-1]
+        next_cursor = encode_cursor(field, descending, _row_value(last, field), _row_value(last, pk_name), 'next')
+    if rows and has_prev:
+        first = rows[0]
+        prev_cursor = encode_cursor(field, descending, _row_value(first, field), _row_value(first, pk_name), 'prev')
+    return KeysetPage(rows, per_page, next_cursor, prev_cursor, estimated_count)
+
+
+async def apaginate(qs, per_page, number):
+    """
+    ``Paginator(qs, per_page).get_page(number)`` for async views.
+
+    The count and the page rows run on the async ORM; ``per_page=0`` shows
+    every row on one page, as in the list views.
+    """
+    count = await qs.acount()
+    paginator = Paginator(qs, per_page if per_page > 0 else max(count, 1))
+    paginator.count = count
+    page = paginator.get_page(number)
+    page.object_list = [obj async for obj in page.object_list]
+    return page
@@ -0,0 +1,152 @@
+"""
+Warehouse Management Module Queries
+
+Queryset and filter builders of the warehouse and movement datatables, shared
+by the list views and the background export jobs.
+"""
+import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from . import services
+from .models import MOVEMENT_STATUS, MOVEMENT_TYPE, StockMovement, Warehouse, Zone
+from .search import rank_stock_movements, search_stock_movements
+
+
+# ======================================================================
+# Warehouse
+# ======================================================================
+
+WAREHOUSE_SORT_FIELDS = {
+    'code': 'code',
+    'name': 'name',
+    'is_active': 'is_active',
+    'address': 'address',
+    'created_at': 'created_at',
+}
+
+
+def hub_warehouses(hub_id):
+    return Warehouse.objects.filter(hub_id=hub_id, is_deleted=False).only('id', 'name', 'code').order_by('name', 'id')
+
+
+def warehouses_queryset(hub_id, search_query='', sort_field='code', sort_dir='asc'):
+    """Warehouse datatable rows for a search and sort state."""
+    qs = Warehouse.objects.filter(hub_id=hub_id, is_deleted=False)
+
+    if search_query:
+        qs = qs.filter(Q(name__icontains=search_query) | Q(code__icontains=search_query) | Q(address__icontains=search_query))
+
+    order_by = WAREHOUSE_SORT_FIELDS.get(sort_field, 'code')
+    if sort_dir == 'desc':
+        return qs.order_by(f'-{order_by}', '-id')
+    return qs.order_by(order_by, 'id')
+
+
+# ======================================================================
+# StockMovement
+# ======================================================================
+
+STOCK_MOVEMENT_SORT_FIELDS = {
+    'reference': 'reference',
+    'movement_type': 'movement_type',
+    'source_zone': 'source_zone',
+    'dest_zone': 'dest_zone',
+    'status': 'status',
+    'quantity': 'quantity',
+    'created_at': 'created_at',
+}
+
+# Columns rendered by stock_movements_list.html; notes is never shown in the table.
+STOCK_MOVEMENT_LIST_FIELDS = (
+    'id', 'reference', 'movement_type', 'status', 'quantity', 'created_at',
+    'source_zone__name', 'source_zone__warehouse__name',
+    'dest_zone__name', 'dest_zone__warehouse__name',
+)
+
+
+def stock_movement_rows(hub_id):
+    """Base datatable queryset: zones and warehouses joined, only displayed columns loaded."""
+    return (
+        StockMovement.objects.filter(hub_id=hub_id, is_deleted=False)
+        .select_related('source_zone', 'source_zone__warehouse', 'dest_zone', 'dest_zone__warehouse')
+        .only(*STOCK_MOVEMENT_LIST_FIELDS)
+    )
+
+
+def stock_movement_sort(search_query, sort_field):
+    """Sort key of the movements list: ``relevance`` when searching without a chosen sort."""
+    if search_query and not sort_field:
+        return 'relevance'
+    return sort_field or 'reference'
+
+
+def stock_movements_queryset(hub_id, search_query='', sort_field='reference', sort_dir='asc', filters=None):
+    """Movement datatable rows for a search, filter and sort state."""
+    qs = filter_stock_movements(stock_movement_rows(hub_id), hub_id, filters or {})
+
+    if search_query:
+        qs = search_stock_movements(qs, search_query)
+
+    if sort_field == 'relevance' and search_query:
+        return rank_stock_movements(qs, search_query)
+    order_by = STOCK_MOVEMENT_SORT_FIELDS.get(sort_field, 'reference')
+    if sort_dir == 'desc':
+        return qs.order_by(f'-{order_by}', '-id')
+    return qs.order_by(order_by, 'id')
+
+
+def stock_movement_filters(hub_id, data):
+    """
+    Validated list filters from GET (or stored export) ``data``.
+
+    ``type``, ``status``, ``warehouse`` and ``zone`` must be known values of the
+    hub; ``from``/``to`` dates become a ``[start, end)`` datetime range.
+    Invalid values are dropped.
+    """
+    filters = {}
+    if data.get('type') in dict(MOVEMENT_TYPE):
+        filters['movement_type'] = data['type']
+    if data.get('status') in dict(MOVEMENT_STATUS):
+        filters['status'] = data['status']
+    warehouse_id = str(data.get('warehouse') or '').strip()
+    if warehouse_id and any(str(w.pk) == warehouse_id for w in hub_warehouses(hub_id)):
+        filters['warehouse'] = warehouse_id
+    zone = services.zone_entry(hub_id, str(data.get('zone') or '').strip() or None)
+    if zone:
+        filters['zone'] = str(zone['id'])
+    for key, name, days in (('from', 'date_from', 0), ('to', 'date_to', 1)):
+        try:
+            value = parse_date(str(data.get(key) or '').strip())
+        except ValueError:
+            value = None
+        if value is not None:
+            filters[name] = timezone.make_aware(datetime.datetime.combine(value + datetime.timedelta(days=days), datetime.time.min))
+    return filters
+
+
+def filter_stock_movements(qs, hub_id, filters, facets=True):
+    """
+    Apply ``stock_movement_filters`` to a StockMovement or StockMovementArchive queryset.
+
+    ``facets=False`` leaves out the type, status and warehouse filters, for the
+    facet counts query.
+    """
+    if filters.get('date_from'):
+        qs = qs.filter(created_at__gte=filters['date_from'])
+    if filters.get('date_to'):
+        qs = qs.filter(created_at__lt=filters['date_to'])
+    if filters.get('zone'):
+        qs = qs.filter(Q(source_zone_id=filters['zone']) | Q(dest_zone_id=filters['zone']))
+    if not facets:
+        return qs
+    if filters.get('movement_type'):
+        qs = qs.filter(movement_type=filters['movement_type'])
+    if filters.get('status'):
+        qs = qs.filter(status=filters['status'])
+    if filters.get('warehouse'):
+        zones = Zone.all_objects.filter(hub_id=hub_id, warehouse_id=filters['warehouse']).values('id')
+        qs = qs.filter(Q(source_zone_id__in=zones) | Q(dest_zone_id__in=zones))
+    return qs
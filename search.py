@@ -0,0 +1,57 @@
+"""
+Search backend for the warehouse datatables.
+
+On PostgreSQL, stock movements are matched against the trigger-maintained
+``search_vector`` column (GIN index, see migration 0005) with prefix terms, OR a
+prefix match on ``reference`` served by an expression index, and can be ranked
+by ``ts_rank``. Other backends fall back to the original ``icontains`` scan,
+as does the movement archive, which has no ``search_vector`` column.
+"""
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+MAX_SEARCH_TERMS = 8
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+_VECTOR = '"warehouse_stockmovement"."search_vector"'
+
+
+def uses_fulltext():
+    return connection.vendor == 'postgresql'
+
+
+def prefix_tsquery(text):
+    """Turn free text into an AND-ed prefix tsquery (``abc:* & de:*``), or '' if no terms."""
+    terms = _TERM_RE.findall(text.lower())[:MAX_SEARCH_TERMS]
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+def search_archived_movements(qs, query):
+    """Filter a StockMovement or StockMovementArchive queryset with ``icontains``."""
+    return qs.filter(
+        Q(reference__icontains=query) | Q(movement_type__icontains=query)
+        | Q(notes__icontains=query) | Q(status__icontains=query)
+    )
+
+
+def search_stock_movements(qs, query):
+    """Filter a StockMovement queryset by free-text ``query``."""
+    if not uses_fulltext():
+        return search_archived_movements(qs, query)
+    tsquery = prefix_tsquery(query)
+    if not tsquery:
+        return qs.filter(reference__istartswith=query)
+    match = RawSQL(f"{_VECTOR} @@ to_tsquery('simple', %s)", (tsquery,), output_field=BooleanField())
+    return qs.filter(Q(reference__istartswith=query) | Q(match))
+
+
+def rank_stock_movements(qs, query):
+    """Order a searched queryset by relevance (PostgreSQL), best matches first."""
+    tsquery = prefix_tsquery(query)
+    if not uses_fulltext() or not tsquery:
+        return qs.order_by('reference', 'id')
+    rank = RawSQL(f"ts_rank({_VECTOR}, to_tsquery('simple', %s))", (tsquery,), output_field=FloatField())
+    return qs.annotate(search_rank=rank).order_by('-search_rank', 'id')
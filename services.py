@@ -0,0 +1,1627 @@
+"""
+Warehouse Management Module Services
+
+Stock ledger and rollup maintenance, batch movement ingestion and cached
+dashboard aggregates. Every write path that creates, edits or removes a
+StockMovement calls ``apply_movement_changes`` inside its transaction, so the
+materialized ``ZoneBalance`` and ``MovementRollup`` rows never drift from the
+movement history; every other write calls ``mark_hub_changed`` so cached reads
+are dropped once it commits.
+"""
+import datetime
+import hashlib
+import time
+import uuid
+from decimal import Decimal, InvalidOperation
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import CharField, Count, F, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Concat, Substr, TruncDay, TruncHour
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from .models import (
+    MOVEMENT_STATUS, MOVEMENT_TYPE, STATUS_TIMESTAMP_FIELDS, STATUS_TRANSITIONS, ZONE_MAX_DEPTH, ZONE_PATH_STEP, ZONE_TYPE, MovementRollup, StockMovement, StockMovementArchive,
+    StockMovementLine, StockMovementLineArchive, Warehouse, Zone, ZoneBalance, ZoneProductBalance,
+)
+
+SNAPSHOT_FIELDS = (
+    'id', 'hub_id', 'created_at', 'movement_type', 'status',
+    'quantity', 'source_zone_id', 'dest_zone_id',
+)
+
+
+def snapshot(movement):
+    """Detached copy of the ledger-relevant fields of a movement."""
+    return SimpleNamespace(**{f: getattr(movement, f) for f in SNAPSHOT_FIELDS})
+
+
+def _quantity(movement):
+    return Decimal(str(movement.quantity or 0))
+
+
+# ======================================================================
+# Cache invalidation
+# ======================================================================
+
+def mark_hub_changed(hub_id, zones=False):
+    """
+    Drop the hub's cached aggregates and move it to a new data version (facet
+    counts, cached pages, ETags) once the current transaction commits.
+
+    Pass ``zones=True`` after writes to zones or warehouse names, so the zone
+    directory is rebuilt too.
+    """
+    transaction.on_commit(lambda: cache.delete(_dashboard_cache_key(hub_id)))
+    transaction.on_commit(lambda: _bump_hub_version(hub_id, 'data'))
+    if zones:
+        transaction.on_commit(lambda: bump_zone_directory(hub_id))
+
+
+# ======================================================================
+# Zone directory
+# ======================================================================
+
+ZONE_DIRECTORY_TIMEOUT = 60 * 60 * 24
+# Entries per cache item; 500 worst-case entries stay well under memcached's 1 MB item limit.
+ZONE_DIRECTORY_CHUNK = 500
+ZONE_SEARCH_LIMIT = 20
+
+
+def _new_version():
+    """A version stamp: the current time in nanoseconds (hex) and a random suffix."""
+    return f'{time.time_ns():x}-{uuid.uuid4().hex[:8]}'
+
+
+def _hub_version(hub_id, name):
+    """Current version of a per-hub cache family (``zones``, ``data``)."""
+    key = f'warehouse:{name}:version:{hub_id}'
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        cache.set(key, version, None)
+    return version
+
+
+async def _ahub_version(hub_id, name):
+    """``_hub_version`` for async views."""
+    key = f'warehouse:{name}:version:{hub_id}'
+    version = await cache.aget(key)
+    if version is None:
+        version = _new_version()
+        await cache.aset(key, version, None)
+    return version
+
+
+def _bump_hub_version(hub_id, name):
+    cache.set(f'warehouse:{name}:version:{hub_id}', _new_version(), None)
+
+
+def hub_data_version(hub_id):
+    """Version of the hub's warehouse data; moves on every ``mark_hub_changed`` commit."""
+    return _hub_version(hub_id, 'data')
+
+
+async def ahub_data_version(hub_id):
+    return await _ahub_version(hub_id, 'data')
+
+
+def version_modified(version):
+    """When a data version started, as an aware datetime."""
+    return datetime.datetime.fromtimestamp(int(version.split('-')[0], 16) / 1e9, tz=datetime.timezone.utc)
+
+
+def hub_data_modified(hub_id):
+    """When the current data version started, as an aware datetime."""
+    return version_modified(hub_data_version(hub_id))
+
+
+def bump_zone_directory(hub_id):
+    """Start a new directory version; the old entry simply expires."""
+    _bump_hub_version(hub_id, 'zones')
+
+
+def _zone_directory_rows(hub_id):
+    return (
+        Zone.objects.filter(hub_id=hub_id, is_deleted=False, warehouse__is_deleted=False)
+        .values('id', 'code', 'name', 'zone_type', 'warehouse_id', 'warehouse__name')
+        .order_by('warehouse__name', 'name', 'id')
+    )
+
+
+ZONE_DIRECTORY_FIELDS = ('id', 'code', 'name', 'zone_type', 'warehouse_id', 'warehouse_name')
+
+
+def _zone_directory_entry(row):
+    return {
+        'id': row['id'], 'code': row['code'], 'name': row['name'], 'zone_type': row['zone_type'],
+        'warehouse_id': row['warehouse_id'], 'warehouse_name': row['warehouse__name'],
+    }
+
+
+def compute_zone_directory(hub_id):
+    """Zones of live warehouses as small dicts, ordered by warehouse and zone name."""
+    return [_zone_directory_entry(row) for row in _zone_directory_rows(hub_id)]
+
+
+def _zone_directory_key(hub_id, version):
+    return f'warehouse:zones:{hub_id}:{version}'
+
+
+def _zone_directory_items(key, directory):
+    """
+    Cache items of a directory: the chunk count under ``key``, then the entries
+    as tuples (no repeated dict keys), ``ZONE_DIRECTORY_CHUNK`` per item.
+    """
+    chunks = [
+        [tuple(entry[f] for f in ZONE_DIRECTORY_FIELDS) for entry in directory[start:start + ZONE_DIRECTORY_CHUNK]]
+        for start in range(0, len(directory), ZONE_DIRECTORY_CHUNK)
+    ]
+    return {key: len(chunks), **{f'{key}:{i}': chunk for i, chunk in enumerate(chunks)}}
+
+
+def _zone_directory_from_chunks(count, chunks):
+    """Directory from the cached chunks, or None when one of them was evicted."""
+    if len(chunks) < count:
+        return None
+    return [dict(zip(ZONE_DIRECTORY_FIELDS, values)) for chunk in chunks for values in chunk]
+
+
+def zone_directory(hub_id):
+    """
+    Cached ``compute_zone_directory``, versioned per hub.
+
+    Zone and warehouse writes call ``mark_hub_changed(hub_id, zones=True)``,
+    which moves the hub to a new version key after commit. The entries are
+    stored in chunks, so a hub with tens of thousands of zones fits memcached.
+    """
+    key = _zone_directory_key(hub_id, _hub_version(hub_id, 'zones'))
+    count = cache.get(key)
+    if count is not None:
+        keys = [f'{key}:{i}' for i in range(count)]
+        found = cache.get_many(keys)
+        directory = _zone_directory_from_chunks(count, [found[k] for k in keys if k in found])
+        if directory is not None:
+            return directory
+    directory = compute_zone_directory(hub_id)
+    cache.set_many(_zone_directory_items(key, directory), ZONE_DIRECTORY_TIMEOUT)
+    return directory
+
+
+async def azone_directory(hub_id):
+    """``zone_directory`` for async views: async cache calls and ORM iteration."""
+    key = _zone_directory_key(hub_id, await _ahub_version(hub_id, 'zones'))
+    count = await cache.aget(key)
+    if count is not None:
+        keys = [f'{key}:{i}' for i in range(count)]
+        found = await cache.aget_many(keys)
+        directory = _zone_directory_from_chunks(count, [found[k] for k in keys if k in found])
+        if directory is not None:
+            return directory
+    directory = [_zone_directory_entry(row) async for row in _zone_directory_rows(hub_id)]
+    await cache.aset_many(_zone_directory_items(key, directory), ZONE_DIRECTORY_TIMEOUT)
+    return directory
+
+
+def zone_index(hub_id, directory=None):
+    """
+    Directory entries keyed by zone id (as a string).
+
+    Build it once per request and pass it to ``zone_entry`` when several zones
+    are resolved; ``directory`` skips the cache read when already loaded.
+    """
+    return {str(entry['id']): entry for entry in (zone_directory(hub_id) if directory is None else directory)}
+
+
+def zone_entry(hub_id, zone_id, index=None):
+    """Directory entry of one zone, or None. Pass ``index`` (from ``zone_index``) to skip the directory load."""
+    if zone_id is None:
+        return None
+    if index is None:
+        index = zone_index(hub_id)
+    return index.get(str(zone_id))
+
+
+def search_zones(hub_id, query, warehouse_id=None, limit=ZONE_SEARCH_LIMIT, directory=None):
+    """
+    Type-ahead search of the directory by code or name.
+
+    Code prefix matches come first, then any other code or name containing
+    ``query``. Runs in memory; a 10k-zone directory scans in a few milliseconds.
+    Pass ``directory`` when it is already loaded (the async view does).
+    """
+    query = query.strip().lower()
+    warehouse_id = str(warehouse_id) if warehouse_id else None
+    prefix, other = [], []
+    for entry in zone_directory(hub_id) if directory is None else directory:
+        if warehouse_id and str(entry['warehouse_id']) != warehouse_id:
+            continue
+        code = entry['code'].lower()
+        if not query or code.startswith(query):
+            prefix.append(entry)
+        elif query in code or query in entry['name'].lower():
+            other.append(entry)
+        if len(prefix) >= limit:
+            break
+    return (prefix + other)[:limit]
+
+
+# ======================================================================
+# Movement facets
+# ======================================================================
+
+FACET_CACHE_TIMEOUT = 60 * 10
+FACET_GROUP_FIELDS = ('movement_type', 'status', 'source_zone__warehouse_id', 'dest_zone__warehouse_id')
+
+
+def movement_facet_rows(hub_id, movements, state):
+    """
+    ``(movement_type, status, source warehouse, dest warehouse, count)`` rows of
+    ``movements``, from one grouped query.
+
+    Cached per hub version and filter ``state`` (the filters applied to
+    ``movements``), so toggling facet values re-counts in memory.
+    """
+    digest = hashlib.sha1(repr(state).encode()).hexdigest()
+    key = f'warehouse:facets:{hub_id}:{hub_data_version(hub_id)}:{digest}'
+    rows = cache.get(key)
+    if rows is None:
+        rows = [
+            (row['movement_type'], row['status'], *(str(row[f]) if row[f] else '' for f in FACET_GROUP_FIELDS[2:]), row['count'])
+            for row in movements.order_by().values(*FACET_GROUP_FIELDS).annotate(count=Count('id'))
+        ]
+        cache.set(key, rows, FACET_CACHE_TIMEOUT)
+    return rows
+
+
+def movement_facets(rows, movement_type='', status='', warehouse_id=''):
+    """
+    Counts per movement type, status and warehouse from ``movement_facet_rows``.
+
+    Each facet is counted with the other facets' selections applied but not its
+    own, so every option shows how many rows picking it would give. A transfer
+    between two warehouses counts for both.
+    """
+    facets = {'movement_type': {}, 'status': {}, 'warehouse': {}}
+    warehouse_id = str(warehouse_id or '')
+    for row_type, row_status, source, dest, count in rows:
+        type_ok = not movement_type or row_type == movement_type
+        status_ok = not status or row_status == status
+        warehouse_ok = not warehouse_id or warehouse_id in (source, dest)
+        if status_ok and warehouse_ok:
+            facets['movement_type'][row_type] = facets['movement_type'].get(row_type, 0) + count
+        if type_ok and warehouse_ok:
+            facets['status'][row_status] = facets['status'].get(row_status, 0) + count
+        if type_ok and status_ok:
+            for warehouse in {source, dest} - {''}:
+                facets['warehouse'][warehouse] = facets['warehouse'].get(warehouse, 0) + count
+    return facets
+
+
+# ======================================================================
+# Zone balances
+# ======================================================================
+
+def zone_deltas(added=(), removed=()):
+    """
+    Net on-hand change per zone for a set of added and removed movements.
+
+    Returns ``{zone_id: (delta, last_movement)}`` where ``last_movement`` is the
+    most recent added movement touching the zone (or None). Cancelled movements
+    hold no stock and are skipped.
+    """
+    deltas = {}
+    for sign, movements in ((1, added), (-1, removed)):
+        for m in movements:
+            if m.status == 'cancelled':
+                continue
+            qty = _quantity(m) * sign
+            for zone_id, zone_qty in ((m.source_zone_id, -qty), (m.dest_zone_id, qty)):
+                if not zone_id:
+                    continue
+                delta, last = deltas.get(zone_id, (Decimal('0'), None))
+                if sign > 0 and (last is None or m.created_at >= last.created_at):
+                    last = m
+                deltas[zone_id] = (delta + zone_qty, last)
+    return {z: v for z, v in deltas.items() if v[0] or v[1] is not None}
+
+
+def apply_zone_deltas(hub_id, deltas):
+    """Apply ``zone_deltas`` output to ZoneBalance with atomic increments."""
+    if not deltas:
+        return
+    existing = set(
+        ZoneBalance.objects.filter(hub_id=hub_id, zone_id__in=deltas).values_list('zone_id', flat=True)
+    )
+    missing = [ZoneBalance(hub_id=hub_id, zone_id=z) for z in deltas if z not in existing]
+    if missing:
+        ZoneBalance.objects.bulk_create(missing, ignore_conflicts=True)
+
+    now = timezone.now()
+    # Deterministic order keeps concurrent writers from deadlocking on row locks.
+    for zone_id in sorted(deltas, key=str):
+        delta, last = deltas[zone_id]
+        fields = {'on_hand': F('on_hand') + delta, 'updated_at': now}
+        if last is not None:
+            fields['last_movement_id'] = last.id
+            fields['last_movement_at'] = last.created_at
+        ZoneBalance.objects.filter(hub_id=hub_id, zone_id=zone_id).update(**fields)
+
+
+def apply_movement_changes(hub_id, added=(), removed=()):
+    """
+    Propagate movement writes to the derived stock tables.
+
+    ``added`` are movements as they now exist, ``removed`` are snapshots of
+    their previous state (edits pass the same movement in both). Must run in
+    the caller's transaction.
+    """
+    apply_zone_deltas(hub_id, zone_deltas(added, removed))
+    apply_product_deltas(hub_id, product_deltas(added, removed))
+    apply_rollup_deltas(hub_id, rollup_deltas(added, removed))
+    mark_hub_changed(hub_id)
+
+
+def zone_on_hand(hub_id, zone_id):
+    """Current on-hand quantity of a zone: one indexed row read."""
+    value = ZoneBalance.objects.filter(hub_id=hub_id, zone_id=zone_id).values_list('on_hand', flat=True).first()
+    return value if value is not None else Decimal('0')
+
+
+def rebuild_zone_balances(hub_id=None):
+    """
+    Recompute ZoneBalance from the full movement history, archive included.
+
+    Each zone's ``last_movement_id``/``last_movement_at`` is its newest
+    movement, as the incremental ledger records it. Returns the number of
+    balance rows written.
+    """
+    totals = {}
+    for model, zone_field, sign in _history((('dest_zone', 1), ('source_zone', -1)), StockMovement, StockMovementArchive):
+        movements = model.objects.filter(is_deleted=False).exclude(status='cancelled')
+        if hub_id:
+            movements = movements.filter(hub_id=hub_id)
+        newest = movements.filter(**{f'{zone_field}_id': OuterRef(f'{zone_field}_id')}).order_by('-created_at', '-id')
+        rows = (
+            movements.exclude(**{f'{zone_field}__isnull': True})
+            .values('hub_id', f'{zone_field}_id')
+            .annotate(total=Sum('quantity'), last_at=Max('created_at'), last_id=Subquery(newest.values('id')[:1]))
+            .order_by()
+        )
+        for row in rows:
+            key = (row['hub_id'], row[f'{zone_field}_id'])
+            on_hand, last_at, last_id = totals.get(key, (Decimal('0'), None, None))
+            if last_at is None or (row['last_at'] and row['last_at'] > last_at):
+                last_at, last_id = row['last_at'], row['last_id']
+            totals[key] = (on_hand + sign * (row['total'] or 0), last_at, last_id)
+
+    with transaction.atomic():
+        balances = ZoneBalance.all_objects.all()
+        if hub_id:
+            balances = balances.filter(hub_id=hub_id)
+        balances.delete()
+        ZoneBalance.objects.bulk_create(
+            [
+                ZoneBalance(hub_id=hub, zone_id=zone_id, on_hand=on_hand, last_movement_id=last_id, last_movement_at=last_at)
+                for (hub, zone_id), (on_hand, last_at, last_id) in totals.items()
+            ],
+            batch_size=1000,
+        )
+    return len(totals)
+
+
+# ======================================================================
+# Product balances
+# ======================================================================
+
+def product_deltas(added=(), removed=()):
+    """
+    Net on-hand change per ``(zone_id, product_ref, lot)`` for added and removed movements.
+
+    Lines are summed with one grouped query; the zones come from the movement
+    states passed in, so an edit that moves a header re-posts its lines. Movements
+    whose additions and removals cancel out (unchanged zones) are not queried.
+    """
+    postings = {}
+    for sign, movements in ((1, added), (-1, removed)):
+        for m in movements:
+            if m.status == 'cancelled':
+                continue
+            for zone_id, direction in ((m.source_zone_id, -1), (m.dest_zone_id, 1)):
+                if zone_id:
+                    key = (m.id, zone_id)
+                    postings[key] = postings.get(key, 0) + sign * direction
+    postings = {k: v for k, v in postings.items() if v}
+    if not postings:
+        return {}
+
+    lines = (
+        StockMovementLine.objects.filter(movement_id__in={m for m, _z in postings}, is_deleted=False)
+        .values('movement_id', 'product_ref', 'lot')
+        .annotate(total=Sum('quantity'))
+        .order_by()
+    )
+    by_movement = {}
+    for row in lines:
+        by_movement.setdefault(row['movement_id'], []).append(row)
+
+    deltas = {}
+    for (movement_id, zone_id), factor in postings.items():
+        for row in by_movement.get(movement_id, ()):
+            key = (zone_id, row['product_ref'], row['lot'])
+            deltas[key] = deltas.get(key, Decimal('0')) + factor * (row['total'] or 0)
+    return {k: v for k, v in deltas.items() if v}
+
+
+def apply_product_deltas(hub_id, deltas):
+    """Apply ``product_deltas`` output to ZoneProductBalance with atomic increments."""
+    if not deltas:
+        return
+    ZoneProductBalance.objects.bulk_create(
+        [ZoneProductBalance(hub_id=hub_id, zone_id=z, product_ref=p, lot=lot) for z, p, lot in deltas],
+        ignore_conflicts=True,
+    )
+    now = timezone.now()
+    for zone_id, product_ref, lot in sorted(deltas, key=lambda k: (k[1], str(k[0]), k[2])):
+        ZoneProductBalance.objects.filter(
+            hub_id=hub_id, product_ref=product_ref, zone_id=zone_id, lot=lot,
+        ).update(on_hand=F('on_hand') + deltas[(zone_id, product_ref, lot)], updated_at=now)
+
+
+def product_availability(hub_id, product_ref, zone_id=None, under=None):
+    """
+    On-hand quantity of a product per zone and lot, read from the balance index.
+
+    ``under`` is a zone path and limits the result to that location's subtree.
+    Returns ``[{'zone_id', 'lot', 'on_hand'}]`` for non-zero balances.
+    """
+    balances = ZoneProductBalance.objects.filter(hub_id=hub_id, product_ref=product_ref).exclude(on_hand=0)
+    if zone_id:
+        balances = balances.filter(zone_id=zone_id)
+    if under:
+        balances = balances.filter(zone__hub_id=hub_id, zone__path__startswith=under)
+    return list(balances.values('zone_id', 'lot', 'on_hand').order_by('zone_id', 'lot'))
+
+
+def product_on_hand(hub_id, product_ref, zone_id):
+    """Total on-hand quantity of a product in a zone, across lots."""
+    total = ZoneProductBalance.objects.filter(
+        hub_id=hub_id, product_ref=product_ref, zone_id=zone_id,
+    ).aggregate(total=Sum('on_hand'))['total']
+    return total if total is not None else Decimal('0')
+
+
+def rebuild_product_balances(hub_id=None):
+    """
+    Recompute ZoneProductBalance from the lines of live movements, archive included.
+
+    Returns the number of balance rows written.
+    """
+    totals = {}
+    for model, zone_field, sign in _history((('dest_zone', 1), ('source_zone', -1)), StockMovementLine, StockMovementLineArchive):
+        lines = model.objects.filter(is_deleted=False, movement__is_deleted=False).exclude(
+            movement__status='cancelled',
+        )
+        if hub_id:
+            lines = lines.filter(hub_id=hub_id)
+        rows = (
+            lines.exclude(**{f'movement__{zone_field}__isnull': True})
+            .values('hub_id', f'movement__{zone_field}_id', 'product_ref', 'lot')
+            .annotate(total=Sum('quantity'))
+            .order_by()
+        )
+        for row in rows:
+            key = (row['hub_id'], row[f'movement__{zone_field}_id'], row['product_ref'], row['lot'])
+            totals[key] = totals.get(key, Decimal('0')) + sign * (row['total'] or 0)
+
+    with transaction.atomic():
+        balances = ZoneProductBalance.all_objects.all()
+        if hub_id:
+            balances = balances.filter(hub_id=hub_id)
+        balances.delete()
+        ZoneProductBalance.objects.bulk_create(
+            [
+                ZoneProductBalance(hub_id=hub, zone_id=zone_id, product_ref=product_ref, lot=lot, on_hand=on_hand)
+                for (hub, zone_id, product_ref, lot), on_hand in totals.items()
+            ],
+            batch_size=1000,
+        )
+    return len(totals)
+
+
+# ======================================================================
+# Movement rollups
+# ======================================================================
+
+ROLLUP_TRUNC = {'hour': TruncHour, 'day': TruncDay}
+
+
+def truncate_bucket(value, period):
+    """Start of the hour/day containing ``value`` in the current timezone."""
+    local = timezone.localtime(value)
+    if period == 'day':
+        local = local.replace(hour=0)
+    return local.replace(minute=0, second=0, microsecond=0)
+
+
+def rollup_deltas(added=(), removed=()):
+    """
+    Net rollup change per key for a set of added and removed movements.
+
+    Returns ``{(period, bucket, zone_id, direction, movement_type, status): [quantity, count]}``.
+    """
+    deltas = {}
+    for sign, movements in ((1, added), (-1, removed)):
+        for m in movements:
+            qty = _quantity(m) * sign
+            for direction, zone_id in (('out', m.source_zone_id), ('in', m.dest_zone_id)):
+                if not zone_id:
+                    continue
+                for period in ROLLUP_TRUNC:
+                    key = (period, truncate_bucket(m.created_at, period), zone_id, direction, m.movement_type, m.status)
+                    entry = deltas.setdefault(key, [Decimal('0'), 0])
+                    entry[0] += qty
+                    entry[1] += sign
+    return {k: v for k, v in deltas.items() if v[0] or v[1]}
+
+
+def apply_rollup_deltas(hub_id, deltas):
+    """Apply ``rollup_deltas`` output with per-key increments, creating missing rows."""
+    if not deltas:
+        return
+    zone_ids = {key[2] for key in deltas}
+    warehouses = dict(Zone.all_objects.filter(pk__in=zone_ids).values_list('pk', 'warehouse_id'))
+    for key in sorted(deltas, key=lambda k: (k[0], k[1], str(k[2]), k[3], k[4], k[5])):
+        quantity, count = deltas[key]
+        period, bucket, zone_id, direction, movement_type, status = key
+        if zone_id not in warehouses:
+            continue
+        lookup = {
+            'hub_id': hub_id, 'period': period, 'bucket': bucket, 'zone_id': zone_id,
+            'direction': direction, 'movement_type': movement_type, 'status': status,
+        }
+        increment = {'quantity': F('quantity') + quantity, 'movement_count': F('movement_count') + count}
+        if MovementRollup.objects.filter(**lookup).update(**increment):
+            continue
+        try:
+            with transaction.atomic():
+                MovementRollup.objects.create(
+                    warehouse_id=warehouses.get(zone_id), quantity=quantity, movement_count=count, **lookup,
+                )
+        except IntegrityError:
+            MovementRollup.objects.filter(**lookup).update(**increment)
+
+
+def rebuild_movement_rollups(hub_id=None, since=None):
+    """
+    Recompute rollups from raw movements (archive included), optionally only
+    buckets from ``since`` on.
+
+    Returns the number of rollup rows written.
+    """
+    rollups = MovementRollup.all_objects.all()
+    if hub_id:
+        rollups = rollups.filter(hub_id=hub_id)
+    if since:
+        since = truncate_bucket(since, 'day')
+        rollups = rollups.filter(bucket__gte=since)
+
+    written = 0
+    with transaction.atomic():
+        rollups.delete()
+        for period, trunc in ROLLUP_TRUNC.items():
+            for model, direction, zone_field in _history((('out', 'source_zone'), ('in', 'dest_zone')), StockMovement, StockMovementArchive):
+                movements = model.objects.filter(is_deleted=False)
+                if hub_id:
+                    movements = movements.filter(hub_id=hub_id)
+                if since:
+                    movements = movements.filter(created_at__gte=since)
+                rows = (
+                    movements.exclude(**{f'{zone_field}__isnull': True})
+                    .annotate(bucket=trunc('created_at'))
+                    .values('hub_id', 'bucket', f'{zone_field}_id', f'{zone_field}__warehouse_id', 'movement_type', 'status')
+                    .annotate(total=Sum('quantity'), count=Count('id'))
+                    .order_by()
+                )
+                batch = []
+                for row in rows.iterator(chunk_size=2000):
+                    batch.append(MovementRollup(
+                        hub_id=row['hub_id'], period=period, bucket=row['bucket'],
+                        zone_id=row[f'{zone_field}_id'], warehouse_id=row[f'{zone_field}__warehouse_id'],
+                        direction=direction, movement_type=row['movement_type'], status=row['status'],
+                        quantity=row['total'] or 0, movement_count=row['count'],
+                    ))
+                    if len(batch) >= 1000:
+                        MovementRollup.objects.bulk_create(batch)
+                        written += len(batch)
+                        batch = []
+                MovementRollup.objects.bulk_create(batch)
+                written += len(batch)
+    return written
+
+
+def compact_movement_rollups(hub_id=None, keep_hourly_days=90):
+    """
+    Drop empty rollup rows and hourly rows older than ``keep_hourly_days``.
+
+    Daily rows are kept forever; returns the number of rows deleted.
+    """
+    rollups = MovementRollup.all_objects.all()
+    if hub_id:
+        rollups = rollups.filter(hub_id=hub_id)
+    cutoff = timezone.now() - datetime.timedelta(days=keep_hourly_days)
+    deleted, _detail = rollups.filter(
+        Q(movement_count=0, quantity=0) | Q(period='hour', bucket__lt=cutoff)
+    ).delete()
+    return deleted
+
+
+def throughput_report(hub_id, period='day', start=None, end=None, warehouse_id=None, status=None, under=None):
+    """
+    In/out quantity and movement counts per bucket, read only from rollups.
+
+    Cancelled movements are left out unless ``status`` asks for them. ``under``
+    (a zone path) sums the rollups of every location in that subtree, so a
+    transfer between two of its bins counts both in and out. Returns a list of ``{'bucket', 'in_quantity', 'in_count', 'out_quantity', 'out_count'}`` ordered by bucket.
+    """
+    rollups = MovementRollup.objects.filter(hub_id=hub_id, period=period)
+    if under:
+        rollups = rollups.filter(zone_id__in=Zone.all_objects.filter(hub_id=hub_id, path__startswith=under).values('id'))
+    if start:
+        rollups = rollups.filter(bucket__gte=start)
+    if end:
+        rollups = rollups.filter(bucket__lt=end)
+    if warehouse_id:
+        rollups = rollups.filter(warehouse_id=warehouse_id)
+    if status:
+        rollups = rollups.filter(status=status)
+    else:
+        rollups = rollups.exclude(status='cancelled')
+
+    series = {}
+    rows = rollups.values('bucket', 'direction').annotate(quantity=Sum('quantity'), count=Sum('movement_count')).order_by('bucket')
+    for row in rows:
+        entry = series.setdefault(row['bucket'], {
+            'bucket': row['bucket'], 'in_quantity': Decimal('0'), 'in_count': 0,
+            'out_quantity': Decimal('0'), 'out_count': 0,
+        })
+        entry[f'{row["direction"]}_quantity'] += row['quantity'] or Decimal('0')
+        entry[f'{row["direction"]}_count'] += row['count'] or 0
+    return list(series.values())
+
+
+# ======================================================================
+# Movement posting
+# ======================================================================
+
+class PostingError(Exception):
+    """A movement cannot be posted, e.g. because it would take a zone negative."""
+
+
+NEGATIVE_STOCK_CHECK_TYPES = {'outbound', 'transfer'}
+IDEMPOTENCY_KEY_MAX_LENGTH = StockMovement._meta.get_field('idempotency_key').max_length
+
+
+def lock_zone_balances(hub_id, zone_ids):
+    """
+    ``SELECT ... FOR UPDATE`` the ZoneBalance rows of ``zone_ids``.
+
+    Missing rows are created first so there is always a row to lock. Rows are
+    locked in zone order, so postings touching the same zones queue without
+    deadlocking while postings on other zones proceed in parallel. Returns
+    ``{zone_id: on_hand}``.
+    """
+    zone_ids = sorted({z for z in zone_ids if z}, key=str)
+    if not zone_ids:
+        return {}
+    ZoneBalance.objects.bulk_create(
+        [ZoneBalance(hub_id=hub_id, zone_id=z) for z in zone_ids], ignore_conflicts=True,
+    )
+    rows = (
+        ZoneBalance.objects.select_for_update()
+        .filter(hub_id=hub_id, zone_id__in=zone_ids)
+        .order_by('zone_id')
+        .values_list('zone_id', 'on_hand')
+    )
+    return dict(rows)
+
+
+def _movement_for_key(hub_id, idempotency_key):
+    return StockMovement.all_objects.filter(hub_id=hub_id, idempotency_key=idempotency_key).first()
+
+
+def post_movement(hub_id, values, pk=None, idempotency_key=None):
+    """
+    Create (or, with ``pk``, update) a movement under zone row locks.
+
+    ``values`` are StockMovement field values. A repeated ``idempotency_key``
+    returns the movement of the first request instead of posting it again.
+    Unknown movement types, outbound and transfer movements that would take
+    their source zone below zero, and status changes outside
+    ``STATUS_TRANSITIONS`` raise PostingError. Returns ``(movement, created)``.
+    """
+    values = dict(values)
+    try:
+        values['quantity'] = clean_quantity(values.get('quantity', ''))
+    except InvalidOperation:
+        raise PostingError(_('Enter a valid quantity.'))
+    idempotency_key = str(idempotency_key or '').strip() or None
+    if idempotency_key and len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise PostingError(_('Invalid idempotency key.'))
+    if pk is not None:
+        idempotency_key = None
+    elif idempotency_key:
+        existing = _movement_for_key(hub_id, idempotency_key)
+        if existing is not None:
+            return existing, False
+
+    try:
+        with transaction.atomic():
+            removed = []
+            if pk is None:
+                movement = StockMovement(hub_id=hub_id, idempotency_key=idempotency_key)
+            else:
+                movement = StockMovement.objects.select_for_update().get(hub_id=hub_id, pk=pk, is_deleted=False)
+                removed.append(snapshot(movement))
+            previous_status = movement.status if pk is not None else None
+            for field, value in values.items():
+                setattr(movement, field, value)
+            if movement.movement_type not in MOVEMENT_TYPES:
+                raise PostingError(_('Select a valid movement type.'))
+            movement.status = movement.status or previous_status or 'pending'
+            if movement.status not in MOVEMENT_STATUSES:
+                raise PostingError(_('Select a valid status.'))
+            if movement.status != previous_status:
+                if previous_status is not None and movement.status not in STATUS_TRANSITIONS[previous_status]:
+                    raise PostingError(_('Cannot change status from %(from)s to %(to)s.') % {
+                        'from': previous_status, 'to': movement.status,
+                    })
+                if movement.status in STATUS_TIMESTAMP_FIELDS:
+                    setattr(movement, STATUS_TIMESTAMP_FIELDS[movement.status], timezone.now())
+
+            zone_ids = {movement.source_zone_id, movement.dest_zone_id}
+            zone_ids.update(z for m in removed for z in (m.source_zone_id, m.dest_zone_id))
+            balances = lock_zone_balances(hub_id, zone_ids)
+            source = movement.source_zone_id
+            if movement.movement_type in NEGATIVE_STOCK_CHECK_TYPES and source:
+                delta = zone_deltas([movement], removed).get(source, (Decimal('0'), None))[0]
+                available = balances.get(source, Decimal('0'))
+                if delta < 0 and available + delta < 0:
+                    name = Zone.all_objects.filter(pk=source).values_list('name', flat=True).first()
+                    raise PostingError(_('Not enough stock in %(zone)s: %(available)s available.') % {
+                        'zone': name, 'available': available,
+                    })
+
+            movement.save()
+            apply_movement_changes(hub_id, added=[movement], removed=removed)
+    except IntegrityError:
+        # A concurrent request with the same key committed first.
+        existing = _movement_for_key(hub_id, idempotency_key) if idempotency_key else None
+        if existing is None:
+            raise
+        return existing, False
+    return movement, pk is None
+
+
+def transition_movements(hub_id, ids, status):
+    """
+    Move the movements in ``ids`` to ``status`` with one conditional UPDATE.
+
+    Only movements whose current status may reach ``status`` change; the rest
+    are left as they are. The matching rows are locked and snapshotted first so
+    the ledger and rollups follow the change. Returns the number transitioned.
+    """
+    allowed_from = [source for source, targets in STATUS_TRANSITIONS.items() if status in targets]
+    if not allowed_from:
+        raise PostingError(_('Select a valid status.'))
+    now = timezone.now()
+    changes = {'status': status, 'updated_at': now, STATUS_TIMESTAMP_FIELDS[status]: now}
+    with transaction.atomic():
+        qs = StockMovement.objects.filter(hub_id=hub_id, is_deleted=False, pk__in=ids, status__in=allowed_from)
+        removed = [snapshot(m) for m in qs.select_for_update().only(*SNAPSHOT_FIELDS)]
+        if not removed:
+            return 0
+        count = qs.update(**changes)
+        added = [SimpleNamespace(**{**vars(m), 'status': status}) for m in removed]
+        apply_movement_changes(hub_id, added=added, removed=removed)
+    return count
+
+
+# ======================================================================
+# Batch ingestion
+# ======================================================================
+
+MOVEMENT_TYPES = {value for value, _label in MOVEMENT_TYPE}
+MOVEMENT_STATUSES = {value for value, _label in MOVEMENT_STATUS}
+INGEST_BATCH_SIZE = 1000
+INGEST_MAX_ROWS = 50000
+
+_REFERENCE_MAX_LENGTH = StockMovement._meta.get_field('reference').max_length
+_QUANTITY_FIELD = StockMovement._meta.get_field('quantity')
+_QUANTITY_MAX = Decimal(10) ** (_QUANTITY_FIELD.max_digits - _QUANTITY_FIELD.decimal_places)
+_LINE_TEXT_FIELDS = ('product_ref', 'lot', 'serial', 'unit')
+_LINE_MAX_LENGTH = {f: StockMovementLine._meta.get_field(f).max_length for f in _LINE_TEXT_FIELDS}
+
+
+def clean_quantity(value):
+    """Parse a non-negative quantity that fits the quantity columns; raises InvalidOperation."""
+    try:
+        quantity = Decimal(str(value).strip())
+    except (InvalidOperation, ValueError):
+        raise InvalidOperation(value)
+    if not quantity.is_finite() or quantity < 0 or quantity >= _QUANTITY_MAX:
+        raise InvalidOperation(value)
+    return quantity.quantize(Decimal(1).scaleb(-_QUANTITY_FIELD.decimal_places))
+
+
+def clean_movement_lines(row):
+    """
+    Validate the product lines of a raw movement dict.
+
+    Lines come from ``row['lines']`` (a list of dicts) or, for flat CSV rows, a
+    single line built from ``product_ref``/``lot``/``serial``/``unit`` columns
+    and the row quantity. Returns ``(lines, error)`` with ``error`` a message or None.
+    """
+    raw_lines = row.get('lines')
+    if raw_lines is None:
+        if not str(row.get('product_ref') or '').strip():
+            return [], None
+        raw_lines = [{f: row.get(f) for f in _LINE_TEXT_FIELDS} | {'quantity': row.get('quantity', '')}]
+    if not isinstance(raw_lines, list):
+        return [], _('Lines must be a list.')
+
+    lines = []
+    for number, raw in enumerate(raw_lines, start=1):
+        if not isinstance(raw, dict):
+            return [], _('Line %(n)d: invalid line.') % {'n': number}
+        line = {f: str(raw.get(f) or '').strip() for f in _LINE_TEXT_FIELDS}
+        line['unit'] = line['unit'] or 'unit'
+        if not line['product_ref']:
+            return [], _('Line %(n)d: product is required.') % {'n': number}
+        too_long = [f for f in _LINE_TEXT_FIELDS if len(line[f]) > _LINE_MAX_LENGTH[f]]
+        if too_long:
+            return [], _('Line %(n)d: %(field)s is too long.') % {'n': number, 'field': too_long[0]}
+        try:
+            line['quantity'] = clean_quantity(raw.get('quantity', ''))
+        except InvalidOperation:
+            return [], _('Line %(n)d: enter a valid quantity.') % {'n': number}
+        if line['serial'] and line['quantity'] != 1:
+            return [], _('Line %(n)d: serialised lines must have quantity 1.') % {'n': number}
+        lines.append(line)
+    return lines, None
+
+
+def _zone_ref(value):
+    return str(value or '').strip()
+
+
+def zone_lookup(hub_id, refs):
+    """
+    Resolve zone ids or codes to zone ids with a single query.
+
+    Returns ``{ref: zone_id}``; codes shared by several zones map to None.
+    """
+    refs = {r for r in (_zone_ref(v) for v in refs) if r}
+    if not refs:
+        return {}
+    ids, codes = set(), set()
+    for ref in refs:
+        try:
+            ids.add(uuid.UUID(ref))
+        except ValueError:
+            codes.add(ref)
+    rows = Zone.objects.filter(hub_id=hub_id, is_deleted=False).filter(
+        Q(pk__in=ids) | Q(code__in=codes)
+    ).values_list('pk', 'code')
+
+    lookup = {}
+    for pk, code in rows:
+        if pk in ids:
+            lookup[str(pk)] = pk
+        if code in codes:
+            lookup[code] = None if code in lookup else pk
+    return lookup
+
+
+def hub_zone_lookup(hub_id):
+    """
+    ``zone_lookup`` for every zone of a hub, by id and by code, from the zone directory.
+
+    Used by imports too large to collect their zone references up front.
+    """
+    lookup = {}
+    for entry in zone_directory(hub_id):
+        pk, code = entry['id'], entry['code']
+        lookup[str(pk)] = pk
+        if code:
+            lookup[code] = None if code in lookup else pk
+    return lookup
+
+
+def clean_movement_row(row, zones):
+    """
+    Validate one raw movement dict against ``zones`` (from ``zone_lookup``).
+
+    Pure function: returns ``(cleaned, errors)`` where ``cleaned`` holds
+    StockMovement field values plus the cleaned ``lines``, and ``errors`` maps
+    field name to message.
+    """
+    errors = {}
+    cleaned = {}
+
+    reference = str(row.get('reference') or '').strip()
+    if not reference:
+        errors['reference'] = _('This field is required.')
+    elif len(reference) > _REFERENCE_MAX_LENGTH:
+        errors['reference'] = _('Ensure this value has at most %(max)d characters.') % {'max': _REFERENCE_MAX_LENGTH}
+    cleaned['reference'] = reference
+
+    movement_type = str(row.get('movement_type') or '').strip().lower()
+    if movement_type not in MOVEMENT_TYPES:
+        errors['movement_type'] = _('Select a valid movement type.')
+    cleaned['movement_type'] = movement_type
+
+    lines, line_error = clean_movement_lines(row)
+    if line_error:
+        errors['lines'] = line_error
+    cleaned['lines'] = lines
+
+    raw_quantity = row.get('quantity', '')
+    try:
+        if lines and not str(raw_quantity or '').strip():
+            cleaned['quantity'] = clean_quantity(sum(line['quantity'] for line in lines))
+        else:
+            cleaned['quantity'] = clean_quantity(raw_quantity)
+    except InvalidOperation:
+        errors['quantity'] = _('Enter a valid quantity.')
+
+    for field in ('source_zone', 'dest_zone'):
+        ref = _zone_ref(row.get(field))
+        cleaned[f'{field}_id'] = None
+        if not ref:
+            continue
+        if ref not in zones:
+            errors[field] = _('Unknown zone: %(ref)s') % {'ref': ref}
+        elif zones[ref] is None:
+            errors[field] = _('Ambiguous zone code: %(ref)s') % {'ref': ref}
+        else:
+            cleaned[f'{field}_id'] = zones[ref]
+
+    if not errors.keys() & {'movement_type', 'source_zone', 'dest_zone'}:
+        source, dest = cleaned['source_zone_id'], cleaned['dest_zone_id']
+        if movement_type == 'inbound' and not dest:
+            errors['dest_zone'] = _('Inbound movements need a destination zone.')
+        elif movement_type == 'outbound' and not source:
+            errors['source_zone'] = _('Outbound movements need a source zone.')
+        elif movement_type == 'transfer' and (not source or not dest or source == dest):
+            errors['dest_zone'] = _('Transfers need two different zones.')
+        elif movement_type == 'adjustment' and not (source or dest):
+            errors['dest_zone'] = _('Adjustments need a zone.')
+
+    cleaned['notes'] = str(row.get('notes') or '').strip()
+    status = str(row.get('status') or '').strip().lower() or 'pending'
+    if status not in MOVEMENT_STATUSES:
+        errors['status'] = _('Select a valid status.')
+    cleaned['status'] = status
+    return cleaned, errors
+
+
+def create_movements(hub_id, cleaned_rows):
+    """
+    bulk_create validated rows and their lines, then post them to the ledger.
+
+    Caller owns the transaction.
+    """
+    now = timezone.now()
+    movements = []
+    for values in cleaned_rows:
+        movement = StockMovement(hub_id=hub_id, **{k: v for k, v in values.items() if k != 'lines'})
+        if movement.status in STATUS_TIMESTAMP_FIELDS:
+            setattr(movement, STATUS_TIMESTAMP_FIELDS[movement.status], now)
+        movements.append(movement)
+    movements = StockMovement.objects.bulk_create(movements, batch_size=INGEST_BATCH_SIZE)
+    StockMovementLine.objects.bulk_create(
+        [
+            StockMovementLine(hub_id=hub_id, movement_id=movement.id, **line)
+            for movement, values in zip(movements, cleaned_rows)
+            for line in values.get('lines', ())
+        ],
+        batch_size=INGEST_BATCH_SIZE,
+    )
+    apply_movement_changes(hub_id, added=movements)
+    return movements
+
+
+def check_movement_stock(hub_id, numbered_rows):
+    """
+    Lock the zones a batch touches and drop the rows that would overdraw one.
+
+    ``numbered_rows`` are ``(number, cleaned)`` pairs in batch order. Like
+    ``post_movement``, outbound and transfer rows must leave their source zone
+    at zero or above, counting the locked on-hand plus the rows accepted before
+    them. Returns ``(accepted, errors)``: the accepted pairs and
+    ``[{'row': n, 'errors': {...}}]``. Run it in the transaction that creates
+    the accepted rows, so they post under the same locks.
+    """
+    running = lock_zone_balances(hub_id, [
+        zone_id for _number, values in numbered_rows for zone_id in (values['source_zone_id'], values['dest_zone_id'])
+    ])
+    accepted, short = [], []
+    for number, values in numbered_rows:
+        if values['status'] == 'cancelled':
+            accepted.append((number, values))
+            continue
+        source, dest, quantity = values['source_zone_id'], values['dest_zone_id'], values['quantity']
+        if source and values['movement_type'] in NEGATIVE_STOCK_CHECK_TYPES:
+            available = running.get(source, Decimal('0'))
+            if available - quantity < 0:
+                short.append((number, source, available))
+                continue
+        if source:
+            running[source] = running.get(source, Decimal('0')) - quantity
+        if dest:
+            running[dest] = running.get(dest, Decimal('0')) + quantity
+        accepted.append((number, values))
+
+    if not short:
+        return accepted, []
+    names = dict(Zone.all_objects.filter(pk__in={zone_id for _n, zone_id, _a in short}).values_list('pk', 'name'))
+    errors = [
+        {'row': number, 'errors': {'source_zone': _('Not enough stock in %(zone)s: %(available)s available.') % {
+            'zone': names.get(zone_id), 'available': available,
+        }}}
+        for number, zone_id, available in short
+    ]
+    return accepted, errors
+
+
+def ingest_movements(hub_id, rows, all_or_nothing=False):
+    """
+    Validate and insert a batch of raw movement dicts.
+
+    Zones are resolved with one query for the whole batch and valid rows are
+    inserted with ``bulk_create`` in a single transaction, under the zone locks
+    of ``check_movement_stock``. Returns ``(movements, errors)`` with ``errors``
+    as ``[{'row': n, 'errors': {...}}]`` (1-based row numbers). With
+    ``all_or_nothing`` any error rejects the batch.
+    """
+    zones = zone_lookup(hub_id, [r.get(f) for r in rows for f in ('source_zone', 'dest_zone')])
+    valid, errors = [], []
+    for number, row in enumerate(rows, start=1):
+        cleaned, row_errors = clean_movement_row(row, zones)
+        if row_errors:
+            errors.append({'row': number, 'errors': row_errors})
+        else:
+            valid.append((number, cleaned))
+
+    if not valid or (errors and all_or_nothing):
+        return [], errors
+    with transaction.atomic():
+        valid, stock_errors = check_movement_stock(hub_id, valid)
+        if stock_errors:
+            errors = sorted(errors + stock_errors, key=lambda error: error['row'])
+        if not valid or (stock_errors and all_or_nothing):
+            return [], errors
+        movements = create_movements(hub_id, [cleaned for _number, cleaned in valid])
+    return movements, errors
+
+
+# ======================================================================
+# Location tree
+# ======================================================================
+
+def attach_zone(zone, parent):
+    """
+    Place an unsaved zone under ``parent``, or at the root when it is None.
+
+    The zone takes the parent's warehouse. Raises ``ZoneSetupError`` when the
+    tree would get deeper than ``ZONE_MAX_DEPTH``.
+    """
+    if parent is not None:
+        if parent.depth + 1 >= ZONE_MAX_DEPTH:
+            raise ZoneSetupError(_('Locations can be nested at most %(max)d levels deep.') % {'max': ZONE_MAX_DEPTH})
+        zone.warehouse_id = parent.warehouse_id
+    zone.set_parent(parent)
+    return zone
+
+
+def move_zone(hub_id, zone, parent, warehouse_id=None):
+    """
+    Re-parent a saved zone and rewrite the paths of its whole subtree.
+
+    Descendants are updated with one UPDATE that swaps the path prefix. The
+    subtree follows the parent's warehouse, or ``warehouse_id`` when the zone
+    becomes a root.
+    """
+    if parent is not None and parent.path.startswith(zone.path):
+        raise ZoneSetupError(_('A location cannot be moved under itself.'))
+    old_path, old_depth = zone.path, zone.depth
+    subtree = Zone.all_objects.filter(hub_id=hub_id, path__startswith=old_path)
+    height = (subtree.aggregate(depth=Max('depth'))['depth'] or old_depth) - old_depth
+    new_depth = parent.depth + 1 if parent else 0
+    if new_depth + height >= ZONE_MAX_DEPTH:
+        raise ZoneSetupError(_('Locations can be nested at most %(max)d levels deep.') % {'max': ZONE_MAX_DEPTH})
+
+    zone.set_parent(parent)
+    zone.warehouse_id = parent.warehouse_id if parent else (warehouse_id or zone.warehouse_id)
+    with transaction.atomic():
+        subtree.update(
+            path=Concat(Value(zone.path), Substr('path', len(old_path) + 1), output_field=CharField()),
+            depth=F('depth') + (zone.depth - old_depth),
+            warehouse_id=zone.warehouse_id, updated_at=timezone.now(),
+        )
+        Zone.all_objects.filter(pk=zone.pk).update(parent=parent)
+    mark_hub_changed(hub_id, zones=True)
+    return zone
+
+
+def delete_zones(hub_id, paths):
+    """Soft-delete the locations with the given paths and everything under them."""
+    if not paths:
+        return 0
+    under = Q()
+    for path in paths:
+        under |= Q(path__startswith=path)
+    deleted = Zone.objects.filter(under, hub_id=hub_id, is_deleted=False).update(is_deleted=True, deleted_at=timezone.now())
+    mark_hub_changed(hub_id, zones=True)
+    return deleted
+
+
+def subtree_on_hand(hub_id, path):
+    """On-hand quantity of a location and everything under it: one indexed range join."""
+    total = ZoneBalance.objects.filter(
+        hub_id=hub_id, zone__hub_id=hub_id, zone__path__startswith=path, zone__is_deleted=False,
+    ).aggregate(total=Sum('on_hand'))['total']
+    return total if total is not None else Decimal('0')
+
+
+def tree_on_hand(hub_id, depth=0, under=None, warehouse_id=None):
+    """
+    On-hand quantity rolled up to the locations at ``depth``.
+
+    Every balance is grouped by the prefix of its zone path that names its
+    ancestor at ``depth``, so aisle totals of a whole warehouse are one grouped
+    query. ``under`` limits the roll-up to one subtree. Returns
+    ``{zone_id: on_hand}``.
+    """
+    balances = ZoneBalance.objects.filter(hub_id=hub_id, zone__hub_id=hub_id, zone__is_deleted=False, zone__depth__gte=depth)
+    if under:
+        balances = balances.filter(zone__path__startswith=under)
+    if warehouse_id:
+        balances = balances.filter(zone__warehouse_id=warehouse_id)
+    rows = (
+        balances.annotate(node=Substr('zone__path', 1, ZONE_PATH_STEP * (depth + 1)))
+        .values('node')
+        .annotate(on_hand=Sum('on_hand'))
+        .order_by()
+    )
+    return {uuid.UUID(row['node'][-ZONE_PATH_STEP:-1]): row['on_hand'] or Decimal('0') for row in rows}
+
+
+# ======================================================================
+# Zone setup
+# ======================================================================
+
+BIN_MAX_COUNT = 50000
+ZONE_UPSERT_BATCH_SIZE = 1000
+
+ZONE_TYPES = {value for value, _label in ZONE_TYPE}
+
+_ZONE_CODE_MAX_LENGTH = Zone._meta.get_field('code').max_length
+_ZONE_NAME_MAX_LENGTH = Zone._meta.get_field('name').max_length
+
+
+class ZoneSetupError(ValueError):
+    """Invalid bin generator pattern or zone import input."""
+
+
+def bin_labels(spec):
+    """
+    Expand a bin label pattern into a list of labels.
+
+    ``'1-12'`` gives numbers (zero-padded to the width of the widest bound, so
+    ``'01-12'`` and ``'1-12'`` both give ``01..12``), ``'A-D'`` gives letters and
+    ``'A,B,X1'`` gives the listed labels.
+    """
+    spec = str(spec or '').strip()
+    if not spec:
+        raise ZoneSetupError(_('Enter a label pattern.'))
+    if ',' in spec:
+        labels = [part.strip() for part in spec.split(',') if part.strip()]
+    elif '-' in spec:
+        start, _sep, end = (part.strip() for part in spec.partition('-'))
+        if start.isdigit() and end.isdigit():
+            width = max(len(start), len(end))
+            labels = [str(n).zfill(width) for n in range(int(start), int(end) + 1)]
+        elif len(start) == len(end) == 1 and start.isalpha() and end.isalpha():
+            labels = [chr(c) for c in range(ord(start.upper()), ord(end.upper()) + 1)]
+        else:
+            raise ZoneSetupError(_('Invalid range: %(spec)s') % {'spec': spec})
+    else:
+        labels = [spec]
+    if not labels:
+        raise ZoneSetupError(_('Invalid range: %(spec)s') % {'spec': spec})
+    return labels
+
+
+def generate_bins(hub_id, warehouse_id, aisles, racks, levels, prefix='', separator='-', zone_type='bin', parent=None):
+    """
+    Build an aisle → rack → bin location tree with a single bulk_create.
+
+    Patterns are expanded with ``bin_labels``; codes look like ``<prefix><aisle>``,
+    ``<prefix><aisle>-<rack>`` and ``<prefix><aisle>-<rack>-<level>``, and the
+    aisles hang under ``parent`` when one is given. Codes that already exist in
+    the warehouse are reused as nodes and not created again, so re-running a
+    generator only adds the missing locations. Returns the number of zones created.
+    """
+    combos = [bin_labels(aisles), bin_labels(racks), bin_labels(levels)]
+    total = len(combos[0]) * len(combos[1]) * len(combos[2])
+    if total > BIN_MAX_COUNT:
+        raise ZoneSetupError(_('At most %(max)d bins can be generated at once.') % {'max': BIN_MAX_COUNT})
+    if parent is not None:
+        warehouse_id = parent.warehouse_id
+    tree = [
+        (f'{prefix}{aisle}', [
+            (f'{prefix}{aisle}{separator}{rack}', [
+                f'{prefix}{aisle}{separator}{rack}{separator}{level}' for level in combos[2]
+            ])
+            for rack in combos[1]
+        ])
+        for aisle in combos[0]
+    ]
+    codes = [code for aisle, rack_nodes in tree for rack, bins in rack_nodes for code in (aisle, rack, *bins)]
+    if max(len(code) for code in codes) > _ZONE_CODE_MAX_LENGTH:
+        raise ZoneSetupError(_('Bin codes can have at most %(max)d characters.') % {'max': _ZONE_CODE_MAX_LENGTH})
+
+    nodes = {
+        zone.code: zone
+        for zone in Zone.objects.filter(hub_id=hub_id, warehouse_id=warehouse_id, is_deleted=False, code__in=set(codes))
+        .only('id', 'code', 'warehouse_id', 'path', 'depth')
+    }
+    new = []
+
+    def node(code, node_type, node_parent):
+        zone = nodes.get(code)
+        if zone is None:
+            zone = Zone(hub_id=hub_id, warehouse_id=warehouse_id, code=code, name=code, zone_type=node_type)
+            attach_zone(zone, node_parent)
+            nodes[code] = zone
+            new.append(zone)
+        return zone
+
+    zone_type = zone_type or 'bin'
+    if zone_type not in ZONE_TYPES:
+        raise ZoneSetupError(_('Select a valid zone type.'))
+    for aisle, rack_nodes in tree:
+        aisle_zone = node(aisle, 'aisle', parent)
+        for rack, bins in rack_nodes:
+            rack_zone = node(rack, 'rack', aisle_zone)
+            for code in bins:
+                node(code, zone_type, rack_zone)
+    Zone.objects.bulk_create(new, batch_size=INGEST_BATCH_SIZE)
+    mark_hub_changed(hub_id, zones=True)
+    return len(new)
+
+
+def upsert_zones(hub_id, rows, warehouse_id=None):
+    """
+    Create or update zones from raw dicts, matched on ``(warehouse, code)``.
+
+    Each row needs ``code`` and either a ``warehouse`` column (id or code) or
+    the default ``warehouse_id``; ``name``, ``zone_type`` and ``parent`` (the
+    code of a location in the same warehouse, existing or on an earlier row)
+    are optional. Rows are processed in batches of ``ZONE_UPSERT_BATCH_SIZE``:
+    one lookup, one bulk_update and one bulk_create per batch; only zones whose
+    parent changes are moved one by one. Returns ``(created, updated, errors)``
+    with 1-based row numbers in ``errors``.
+    """
+    warehouses = {}
+    for pk, code in Warehouse.objects.filter(hub_id=hub_id, is_deleted=False).values_list('pk', 'code'):
+        warehouses[str(pk)] = pk
+        if code:
+            warehouses.setdefault(code, pk)
+    default_warehouse = warehouses.get(str(warehouse_id)) if warehouse_id else None
+
+    cleaned, errors = {}, []
+    for number, row in enumerate(rows, start=1):
+        code = str(row.get('code') or '').strip()
+        ref = str(row.get('warehouse') or '').strip()
+        target = warehouses.get(ref) if ref else default_warehouse
+        name = str(row.get('name') or '').strip() or code
+        zone_type = str(row.get('zone_type') or '').strip()
+        parent = str(row.get('parent') or '').strip()
+        row_errors = {}
+        if not code:
+            row_errors['code'] = _('This field is required.')
+        elif len(code) > _ZONE_CODE_MAX_LENGTH:
+            row_errors['code'] = _('Ensure this value has at most %(max)d characters.') % {'max': _ZONE_CODE_MAX_LENGTH}
+        elif parent == code:
+            row_errors['parent'] = _('A location cannot be moved under itself.')
+        if target is None:
+            row_errors['warehouse'] = _('Unknown warehouse: %(ref)s') % {'ref': ref}
+        if len(name) > _ZONE_NAME_MAX_LENGTH:
+            row_errors['name'] = _('Value too long.')
+        if zone_type and zone_type not in ZONE_TYPES:
+            row_errors['zone_type'] = _('Select a valid zone type.')
+        if row_errors:
+            errors.append({'row': number, 'errors': row_errors})
+            continue
+        # Later rows win when a file repeats a code.
+        cleaned[(target, code)] = {'row': number, 'name': name, 'zone_type': zone_type, 'parent': parent}
+
+    created = updated = 0
+    items = list(cleaned.items())
+    now = timezone.now()
+    for start in range(0, len(items), ZONE_UPSERT_BATCH_SIZE):
+        batch = dict(items[start:start + ZONE_UPSERT_BATCH_SIZE])
+        known = {}
+        codes = {c for _w, c in batch} | {v['parent'] for v in batch.values() if v['parent']}
+        for zone in Zone.objects.filter(
+            hub_id=hub_id, is_deleted=False,
+            warehouse_id__in={w for w, _c in batch}, code__in=codes,
+        ).only('id', 'warehouse_id', 'parent_id', 'code', 'name', 'zone_type', 'path', 'depth'):
+            known.setdefault((zone.warehouse_id, zone.code), zone)
+
+        to_update, to_create, to_move = [], [], []
+        for (target, code), values in batch.items():
+            parent = None
+            if values['parent']:
+                parent = known.get((target, values['parent']))
+                if parent is None:
+                    errors.append({'row': values['row'], 'errors': {
+                        'parent': _('Unknown location: %(ref)s') % {'ref': values['parent']},
+                    }})
+                    continue
+            zone = known.get((target, code))
+            if zone is None:
+                zone = Zone(
+                    hub_id=hub_id, warehouse_id=target, code=code,
+                    name=values['name'], zone_type=values['zone_type'] or 'storage',
+                )
+                try:
+                    attach_zone(zone, parent)
+                except ZoneSetupError as exc:
+                    errors.append({'row': values['row'], 'errors': {'parent': str(exc)}})
+                    continue
+                known[(target, code)] = zone
+                to_create.append(zone)
+                continue
+            if parent is not None and zone.parent_id != parent.pk:
+                to_move.append((values['row'], zone, parent))
+            zone_type = values['zone_type'] or zone.zone_type
+            if zone.name != values['name'] or zone.zone_type != zone_type:
+                zone.name, zone.zone_type, zone.updated_at = values['name'], zone_type, now
+                to_update.append(zone)
+        with transaction.atomic():
+            Zone.objects.bulk_update(to_update, ['name', 'zone_type', 'updated_at'])
+            Zone.objects.bulk_create(to_create)
+        for number, zone, parent in to_move:
+            # An earlier move in this batch may have rewritten either path.
+            zone.refresh_from_db(fields=['path', 'depth'])
+            parent.refresh_from_db(fields=['path', 'depth', 'warehouse_id'])
+            try:
+                move_zone(hub_id, zone, parent)
+            except ZoneSetupError as exc:
+                errors.append({'row': number, 'errors': {'parent': str(exc)}})
+                continue
+            if zone not in to_update:
+                updated += 1
+        created += len(to_create)
+        updated += len(to_update)
+
+    if created or updated:
+        mark_hub_changed(hub_id, zones=True)
+    errors.sort(key=lambda e: e['row'])
+    return created, updated, errors
+
+
+# ======================================================================
+# Movement archive
+# ======================================================================
+
+ARCHIVE_HOT_MONTHS = 12
+ARCHIVE_PURGE_DELETED_DAYS = 30
+ARCHIVE_BATCH_SIZE = 5000
+ARCHIVE_CLOSED_STATUSES = ('done', 'cancelled')
+
+
+def _history(pairs, *models):
+    """``(model, *pair)`` for every model and pair: hot table and archive read alike."""
+    for model in models:
+        for pair in pairs:
+            yield (model, *pair)
+
+
+def archive_cutoff(months=None, now=None):
+    """Start of the oldest month kept hot (``WAREHOUSE_HOT_MONTHS``, default 12)."""
+    if months is None:
+        months = getattr(settings, 'WAREHOUSE_HOT_MONTHS', ARCHIVE_HOT_MONTHS)
+    today = timezone.localtime(now).date()
+    month_index = today.year * 12 + today.month - 1 - months
+    start = datetime.date(month_index // 12, month_index % 12 + 1, 1)
+    return timezone.make_aware(datetime.datetime.combine(start, datetime.time.min))
+
+
+def archivable_movements(hub_id=None, cutoff=None, purge_before=None):
+    """
+    Hot rows to move out: closed movements (done or cancelled) created before
+    ``cutoff``, and soft-deleted movements deleted before ``purge_before``.
+    """
+    if cutoff is None:
+        cutoff = archive_cutoff()
+    if purge_before is None:
+        days = getattr(settings, 'WAREHOUSE_PURGE_DELETED_DAYS', ARCHIVE_PURGE_DELETED_DAYS)
+        purge_before = timezone.now() - datetime.timedelta(days=days)
+    movements = StockMovement.all_objects.filter(
+        Q(created_at__lt=cutoff, status__in=ARCHIVE_CLOSED_STATUSES)
+        | Q(is_deleted=True, deleted_at__lt=purge_before)
+    )
+    if hub_id:
+        movements = movements.filter(hub_id=hub_id)
+    return movements
+
+
+def _copy_rows(source_qs, target_model):
+    """``INSERT INTO target SELECT ...`` the rows of ``source_qs``, keeping every column as is."""
+    fields = [f.attname for f in target_model._meta.concrete_fields]
+    select_sql, params = source_qs.order_by().values_list(*fields).query.sql_with_params()
+    columns = ', '.join(connection.ops.quote_name(f.column) for f in target_model._meta.concrete_fields)
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {connection.ops.quote_name(target_model._meta.db_table)} ({columns}) {select_sql}', params)
+        return cursor.rowcount
+
+
+def archive_movements(hub_id=None, cutoff=None, purge_before=None, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Move ``archivable_movements`` and their lines to the archive tables.
+
+    Works in batches, one transaction each: the batch is locked, copied with
+    ``INSERT ... SELECT`` and deleted from the hot tables. Balances and rollups
+    are left alone, since they already count these movements. Returns the
+    number of movements moved.
+    """
+    moved = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                archivable_movements(hub_id, cutoff, purge_before)
+                .order_by().select_for_update().values_list('pk', 'hub_id')[:batch_size]
+            )
+            if not batch:
+                return moved
+            ids = [pk for pk, _hub in batch]
+            _copy_rows(StockMovement.all_objects.filter(pk__in=ids), StockMovementArchive)
+            _copy_rows(StockMovementLine.all_objects.filter(movement_id__in=ids), StockMovementLineArchive)
+            StockMovementLine.all_objects.filter(movement_id__in=ids).delete()
+            StockMovement.all_objects.filter(pk__in=ids).delete()
+            for hub in {hub for _pk, hub in batch}:
+                mark_hub_changed(hub)
+        moved += len(batch)
+
+
+def archive_boundary(hub_id):
+    """Creation time of the newest archived movement of a hub, or None."""
+    return StockMovementArchive.all_objects.filter(hub_id=hub_id).aggregate(last=Max('created_at'))['last']
+
+
+def reaches_archive(hub_id, date_from=None, date_to=None):
+    """
+    Whether a list date range needs the archive table too.
+
+    Only an explicit range does: the default list reads the hot table alone.
+    """
+    if date_from is None and date_to is None:
+        return False
+    boundary = archive_boundary(hub_id)
+    return boundary is not None and (date_from is None or date_from <= boundary)
+
+
+# ======================================================================
+# Dashboard aggregates
+# ======================================================================
+
+DASHBOARD_CACHE_TIMEOUT = 60 * 15
+
+
+def _dashboard_cache_key(hub_id):
+    return f'warehouse:dashboard:{hub_id}'
+
+
+def _dashboard_queries(hub_id, today):
+    """The three independent grouped queries behind the dashboard: movements, warehouses, balances."""
+    today_start = timezone.make_aware(datetime.datetime.combine(today, datetime.time.min))
+    today_filter = Q(created_at__gte=today_start) & ~Q(status='cancelled')
+    return (
+        StockMovement.objects.filter(hub_id=hub_id, is_deleted=False)
+        .values('movement_type', 'status')
+        .annotate(
+            count=Count('id'), quantity=Sum('quantity'),
+            today_quantity=Sum('quantity', filter=today_filter),
+        )
+        .order_by(),
+        Warehouse.objects.filter(hub_id=hub_id, is_deleted=False).values('id', 'name', 'is_active').order_by('name'),
+        ZoneBalance.objects.filter(hub_id=hub_id, is_deleted=False, zone__is_deleted=False)
+        .values('zone__warehouse_id')
+        .annotate(zones=Count('id'), on_hand=Sum('on_hand'))
+        .order_by(),
+    )
+
+
+def _dashboard_stats(today, rows, warehouse_rows, balances):
+    by_type, by_status = {}, {}
+    total_movements = 0
+    today_by_type = {value: Decimal('0') for value in MOVEMENT_TYPES}
+    for row in rows:
+        quantity = row['quantity'] or Decimal('0')
+        total_movements += row['count']
+        for bucket, key in ((by_type, row['movement_type']), (by_status, row['status'])):
+            entry = bucket.setdefault(key, {'count': 0, 'quantity': Decimal('0')})
+            entry['count'] += row['count']
+            entry['quantity'] += quantity
+        if row['movement_type'] in today_by_type:
+            today_by_type[row['movement_type']] += row['today_quantity'] or Decimal('0')
+
+    warehouses = {
+        w['id']: {'id': w['id'], 'name': w['name'], 'is_active': w['is_active'], 'zones': 0, 'on_hand': Decimal('0')}
+        for w in warehouse_rows
+    }
+    for row in balances:
+        entry = warehouses.get(row['zone__warehouse_id'])
+        if entry is not None:
+            entry['zones'] = row['zones']
+            entry['on_hand'] = row['on_hand'] or Decimal('0')
+
+    return {
+        'date': today,
+        'total_warehouses': len(warehouses),
+        'total_stock_movements': total_movements,
+        'movements_by_type': by_type,
+        'movements_by_status': by_status,
+        'inbound_today': today_by_type['inbound'],
+        'outbound_today': today_by_type['outbound'],
+        'warehouses': list(warehouses.values()),
+    }
+
+
+def compute_dashboard_stats(hub_id):
+    """Aggregate movement volumes and per-warehouse stock with three grouped queries."""
+    today = timezone.localdate()
+    return _dashboard_stats(today, *_dashboard_queries(hub_id, today))
+
+
+async def acompute_dashboard_stats(hub_id):
+    """
+    ``compute_dashboard_stats`` on the async ORM.
+
+    The three queries run one after another: Django runs a request's async ORM
+    calls on one thread and connection, so gathering them would not overlap
+    them. The event loop serves other requests while each one waits.
+    """
+    today = timezone.localdate()
+    results = []
+    for qs in _dashboard_queries(hub_id, today):
+        results.append([row async for row in qs])
+    return _dashboard_stats(today, *results)
+
+
+def dashboard_stats(hub_id):
+    """Cached ``compute_dashboard_stats``; recomputed on a write or when the day rolls over."""
+    key = _dashboard_cache_key(hub_id)
+    stats = cache.get(key)
+    if stats is None or stats['date'] != timezone.localdate():
+        stats = compute_dashboard_stats(hub_id)
+        cache.set(key, stats, DASHBOARD_CACHE_TIMEOUT)
+    return stats
+
+
+async def adashboard_stats(hub_id):
+    """``dashboard_stats`` for async views."""
+    key = _dashboard_cache_key(hub_id)
+    stats = await cache.aget(key)
+    if stats is None or stats['date'] != timezone.localdate():
+        stats = await acompute_dashboard_stats(hub_id)
+        await cache.aset(key, stats, DASHBOARD_CACHE_TIMEOUT)
+    return stats
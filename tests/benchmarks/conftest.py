@@ -0,0 +1,85 @@
+"""
+Fixtures for the warehouse benchmark suite.
+
+The suite only runs with ``WAREHOUSE_BENCH=1``. The data set is generated once
+per session with ``generate_benchmark_data`` and is sized by
+``WAREHOUSE_BENCH_MOVEMENTS`` and ``WAREHOUSE_BENCH_ZONES``.
+"""
+import json
+import os
+import pathlib
+import time
+import uuid
+
+import pytest
+
+BENCH_HUB_ID = uuid.UUID('00000000-0000-4000-8000-00000000be9c')
+BASELINE_PATH = pathlib.Path(__file__).with_name('baseline.json')
+
+
+def bench_scale():
+    return {
+        'movements': int(os.environ.get('WAREHOUSE_BENCH_MOVEMENTS', 20000)),
+        'zones': int(os.environ.get('WAREHOUSE_BENCH_ZONES', 1000)),
+        'warehouses': int(os.environ.get('WAREHOUSE_BENCH_WAREHOUSES', 10)),
+    }
+
+
+@pytest.fixture(scope='session')
+def baseline():
+    return json.loads(BASELINE_PATH.read_text())
+
+
+@pytest.fixture(scope='session')
+def bench_data(django_db_setup, django_db_blocker):
+    """Generate the benchmark data set once and remove it after the session."""
+    from warehouse.management.commands.generate_benchmark_data import clear_hub, generate
+    with django_db_blocker.unblock():
+        clear_hub(BENCH_HUB_ID)
+        counts = generate(BENCH_HUB_ID, **bench_scale())
+    yield counts
+    with django_db_blocker.unblock():
+        clear_hub(BENCH_HUB_ID)
+
+
+@pytest.fixture(autouse=True)
+def no_fragment_cache(settings):
+    """Measure the query and render path, not cached fragments."""
+    settings.WAREHOUSE_FRAGMENT_CACHE = False
+
+
+@pytest.fixture
+def hub_id(bench_data):
+    """Benchmarks run against the generated hub."""
+    return BENCH_HUB_ID
+
+
+try:
+    import pytest_benchmark  # noqa: F401
+except ImportError:
+    class _SimpleBenchmark:
+        """Minimal stand-in for pytest-benchmark's fixture: times a few rounds."""
+
+        def __init__(self):
+            self.timings = []
+
+        def __call__(self, func, *args, **kwargs):
+            return self.pedantic(func, args=args, kwargs=kwargs, rounds=3)
+
+        def pedantic(self, func, args=(), kwargs=None, setup=None, rounds=1, iterations=1, warmup_rounds=0):
+            result = None
+            for _ in range(rounds):
+                if setup is not None:
+                    setup()
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    result = func(*args, **(kwargs or {}))
+                self.timings.append((time.perf_counter() - started) / iterations)
+            return result
+
+    @pytest.fixture
+    def benchmark(request):
+        bench = _SimpleBenchmark()
+        yield bench
+        if bench.timings:
+            print(f'\n{request.node.name}: min {min(bench.timings) * 1000:.1f} ms over {len(bench.timings)} rounds')
@@ -0,0 +1,157 @@
+"""
+Benchmarks for the list, search, export and bulk paths at realistic scale.
+
+Run with ``WAREHOUSE_BENCH=1 pytest tests/benchmarks`` (add
+``WAREHOUSE_BENCH_MOVEMENTS=1000000 WAREHOUSE_BENCH_ZONES=10000`` for the full
+data set). Every case also checks its query count against ``baseline.json``.
+"""
+import os
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(not os.environ.get('WAREHOUSE_BENCH'), reason='set WAREHOUSE_BENCH=1 to run benchmarks'),
+]
+
+HTMX = {'HTTP_HX_REQUEST': 'true', 'HTTP_HX_TARGET': 'datatable-body'}
+
+
+def run_case(name, baseline, benchmark, func, **pedantic):
+    """Time ``func`` and check every timed call against the case's query budget."""
+    counts = []
+
+    def measured():
+        with CaptureQueriesContext(connection) as queries:
+            result = func()
+        counts.append(len(queries))
+        return result
+
+    result = benchmark.pedantic(measured, **pedantic) if pedantic else benchmark(measured)
+    budget = baseline['cases'][name]['max_queries']
+    assert max(counts) <= budget, f'{name}: {max(counts)} queries, budget {budget}'
+    return result
+
+
+def _get(client, url, **params):
+    def call():
+        response = client.get(url, params, **HTMX)
+        assert response.status_code == 200
+        return response
+    return call
+
+
+def _download(client, url, **params):
+    def call():
+        response = client.get(url, params)
+        assert response.status_code == 200
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return call
+
+
+def _movement_ids(hub_id, status, count):
+    from warehouse.models import StockMovement
+    return ','.join(str(pk) for pk in StockMovement.objects.filter(
+        hub_id=hub_id, status=status, is_deleted=False,
+    ).order_by('id').values_list('id', flat=True)[:count])
+
+
+class TestListBenchmarks:
+    """Datatable pages, sorting and search."""
+
+    def test_stock_movements_first_page(self, auth_client, baseline, benchmark):
+        """Benchmark the default movement page."""
+        run_case('stock_movements_first_page', baseline, benchmark,
+                 _get(auth_client, reverse('warehouse:stock_movements_list'), paginate='cursor', per_page=96))
+
+    def test_stock_movements_cursor_page(self, auth_client, baseline, benchmark):
+        """Benchmark a keyset page far into the list."""
+        response = _get(auth_client, reverse('warehouse:stock_movements_list'), paginate='cursor', per_page=96,
+                        sort='created_at', dir='desc')()
+        cursor = response.context['page_obj'].next_cursor
+        run_case('stock_movements_cursor_page', baseline, benchmark,
+                 _get(auth_client, reverse('warehouse:stock_movements_list'), paginate='cursor', cursor=cursor, per_page=96))
+
+    def test_stock_movements_sorted_quantity(self, auth_client, baseline, benchmark):
+        """Benchmark sorting by a non-unique column."""
+        run_case('stock_movements_sorted_quantity', baseline, benchmark,
+                 _get(auth_client, reverse('warehouse:stock_movements_list'), paginate='cursor', sort='quantity', dir='desc'))
+
+    def test_stock_movements_offset_deep_page(self, auth_client, baseline, benchmark):
+        """Benchmark a deep page in offset mode, including the count query."""
+        run_case('stock_movements_offset_deep_page', baseline, benchmark,
+                 _get(auth_client, reverse('warehouse:stock_movements_list'), page=100, per_page=96))
+
+    def test_stock_movements_search(self, auth_client, baseline, benchmark):
+        """Benchmark a ranked search across references and notes."""
+        run_case('stock_movements_search', baseline, benchmark,
+                 _get(auth_client, reverse('warehouse:stock_movements_list'), q='urgent'))
+
+    def test_warehouses_list(self, auth_client, baseline, benchmark):
+        """Benchmark the warehouse list."""
+        run_case('warehouses_list', baseline, benchmark,
+                 _get(auth_client, reverse('warehouse:warehouses_list'), per_page=96))
+
+    def test_zones_list(self, auth_client, baseline, benchmark):
+        """Benchmark the zone list with its warehouse and parent joins."""
+        run_case('zones_list', baseline, benchmark, _get(auth_client, reverse('warehouse:zones'), per_page=96))
+
+    def test_zones_subtree(self, auth_client, hub_id, baseline, benchmark):
+        """Benchmark listing every location under an aisle."""
+        from warehouse.models import Zone
+        aisle = Zone.objects.filter(hub_id=hub_id, zone_type='aisle').order_by('code').first()
+        run_case('zones_subtree', baseline, benchmark,
+                 _get(auth_client, reverse('warehouse:zones'), under=str(aisle.pk), per_page=96))
+
+    def test_dashboard(self, auth_client, baseline, benchmark):
+        """Benchmark the dashboard aggregates with a cold cache."""
+        run_case('dashboard', baseline, benchmark, _get(auth_client, reverse('warehouse:dashboard')),
+                 setup=cache.clear, rounds=3)
+
+
+class TestExportBenchmarks:
+    """Full streamed exports."""
+
+    def test_stock_movements_export_csv(self, auth_client, baseline, benchmark):
+        """Benchmark the streamed CSV export of every movement."""
+        run_case('stock_movements_export_csv', baseline, benchmark,
+                 _download(auth_client, reverse('warehouse:stock_movements_list'), export='csv'), rounds=1)
+
+    def test_stock_movements_export_excel(self, auth_client, baseline, benchmark):
+        """Benchmark the xlsx export of every movement."""
+        pytest.importorskip('openpyxl')
+        run_case('stock_movements_export_excel', baseline, benchmark,
+                 _download(auth_client, reverse('warehouse:stock_movements_list'), export='excel'), rounds=1)
+
+
+class TestBulkBenchmarks:
+    """Bulk actions on hundreds of selected rows; each test rolls back."""
+
+    def test_warehouses_bulk_action(self, auth_client, hub_id, baseline, benchmark):
+        """Benchmark deactivating every warehouse."""
+        from warehouse.models import Warehouse
+        ids = ','.join(str(pk) for pk in Warehouse.objects.filter(hub_id=hub_id).values_list('id', flat=True))
+
+        def call():
+            assert auth_client.post(reverse('warehouse:warehouses_bulk_action'), {'ids': ids, 'action': 'deactivate'}).status_code == 200
+        run_case('warehouses_bulk_action', baseline, benchmark, call, rounds=1)
+
+    def test_stock_movements_bulk_transition(self, auth_client, hub_id, baseline, benchmark):
+        """Benchmark starting 500 pending movements."""
+        ids = _movement_ids(hub_id, 'pending', 500)
+
+        def call():
+            assert auth_client.post(reverse('warehouse:stock_movements_bulk_action'), {'ids': ids, 'action': 'start'}).status_code == 200
+        run_case('stock_movements_bulk_transition', baseline, benchmark, call, rounds=1)
+
+    def test_stock_movements_bulk_delete(self, auth_client, hub_id, baseline, benchmark):
+        """Benchmark deleting 500 done movements with ledger reversal."""
+        ids = _movement_ids(hub_id, 'done', 500)
+
+        def call():
+            assert auth_client.post(reverse('warehouse:stock_movements_bulk_action'), {'ids': ids, 'action': 'delete'}).status_code == 200
+        run_case('stock_movements_bulk_delete', baseline, benchmark, call, rounds=1)
@@ -77,6 +77,28 @@ def warehouse(db, hub_id):
     )
 
 
+@pytest.fixture
+def zone(db, hub_id, warehouse):
+    """Create a test Zone."""
+    return Zone.objects.create(
+        hub_id=hub_id,
+        warehouse=warehouse,
+        name='Test Zone',
+        code='Z-001',
+    )
+
+
+@pytest.fixture
+def other_zone(db, hub_id, warehouse):
+    """Create a second test Zone."""
+    return Zone.objects.create(
+        hub_id=hub_id,
+        warehouse=warehouse,
+        name='Other Zone',
+        code='Z-002',
+    )
+
+
 @pytest.fixture
 def stock_movement(db, hub_id):
     """Create a test StockMovement."""
@@ -0,0 +1,70 @@
+"""Tests for warehouse AI tools."""
+import uuid
+import pytest
+from types import SimpleNamespace
+
+pytest.importorskip('assistant')
+
+from warehouse.ai_tools import ListWarehouses, ListWarehouseZones  # noqa: E402
+from warehouse.models import Warehouse, Zone  # noqa: E402
+
+
+def _request(hub_id):
+    return SimpleNamespace(session={'hub_id': str(hub_id)})
+
+
+@pytest.mark.django_db
+class TestListTools:
+    """Assistant list tool tests."""
+
+    def test_warehouses_scoped_and_paginated(self, hub_id):
+        """Test only the hub's live warehouses are returned, one page at a time."""
+        for i in range(5):
+            Warehouse.objects.create(hub_id=hub_id, name=f'W{i}', code=f'W{i}')
+        Warehouse.objects.create(hub_id=uuid.uuid4(), name='Foreign')
+        Warehouse.objects.create(hub_id=hub_id, name='Gone', is_deleted=True)
+
+        tool = ListWarehouses()
+        first = tool.execute({'limit': 3}, _request(hub_id))
+        assert [w['name'] for w in first['warehouses']] == ['W0', 'W1', 'W2']
+        assert set(first['warehouses'][0]) == {'id', 'name', 'code', 'address', 'is_active'}
+        second = tool.execute({'limit': 3, 'cursor': first['next_cursor']}, _request(hub_id))
+        assert [w['name'] for w in second['warehouses']] == ['W3', 'W4']
+        assert second['next_cursor'] is None
+
+    def test_warehouses_summary(self, hub_id):
+        """Test summary mode returns counts per is_active."""
+        Warehouse.objects.create(hub_id=hub_id, name='A', is_active=True)
+        Warehouse.objects.create(hub_id=hub_id, name='B', is_active=False)
+        result = ListWarehouses().execute({'summary': True}, _request(hub_id))
+        assert result['total'] == 2
+        assert sorted((g['is_active'], g['count']) for g in result['by_is_active']) == [(False, 1), (True, 1)]
+
+    def test_zones_summary(self, hub_id, warehouse):
+        """Test zone summary groups by zone_type."""
+        Zone.objects.create(hub_id=hub_id, warehouse=warehouse, name='Dock', zone_type='receiving')
+        Zone.objects.create(hub_id=hub_id, warehouse=warehouse, name='Rack A', zone_type='storage')
+        Zone.objects.create(hub_id=hub_id, warehouse=warehouse, name='Rack B', zone_type='storage')
+        result = ListWarehouseZones().execute({'summary': True}, _request(hub_id))
+        assert result['total'] == 3
+        assert {g['zone_type']: g['count'] for g in result['by_zone_type']} == {'receiving': 1, 'storage': 2}
+        rows = ListWarehouseZones().execute({}, _request(hub_id))['zones']
+        assert rows[0] == {
+            'id': rows[0]['id'], 'name': 'Dock', 'code': '', 'zone_type': 'receiving', 'parent_id': None, 'depth': 0,
+            'warehouse': 'Test Name',
+        }
+
+    def test_zones_search(self, hub_id, warehouse):
+        """Test search returns code prefix matches from the zone directory."""
+        Zone.objects.create(hub_id=hub_id, warehouse=warehouse, name='Bulk', code='B-01')
+        Zone.objects.create(hub_id=hub_id, warehouse=warehouse, name='Dock B-01', code='D-01')
+        Zone.objects.create(hub_id=hub_id, warehouse=warehouse, name='Pick', code='P-01')
+        result = ListWarehouseZones().execute({'search': 'b-01'}, _request(hub_id))
+        assert [z['code'] for z in result['zones']] == ['B-01', 'D-01']
+        assert result['zones'][0]['warehouse_name'] == 'Test Name'
+        assert result['next_cursor'] is None
+
+    def test_list_zones_unknown_warehouse(self, hub_id):
+        """Test a malformed or foreign warehouse id is reported, with or without search."""
+        for args in ({'warehouse_id': 'not-a-uuid'}, {'warehouse_id': 'not-a-uuid', 'search': 'b'}, {'warehouse_id': str(uuid.uuid4())}):
+            assert ListWarehouseZones().execute(args, _request(hub_id)) == {"error": "Warehouse not found"}
@@ -0,0 +1,105 @@
+"""Tests for the async read views (WAREHOUSE_ASYNC_VIEWS)."""
+import asyncio
+import importlib
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.urls import clear_url_caches, resolve, reverse
+
+from warehouse import services, urls
+from warehouse.models import StockMovement, Warehouse
+from warehouse.pagination import apaginate
+
+ROWS = {'HTTP_HX_REQUEST': 'true', 'HTTP_HX_TARGET': 'datatable-body'}
+
+
+@pytest.fixture
+def async_urls(settings):
+    """Route the read views to async_views for the test."""
+    settings.WAREHOUSE_ASYNC_VIEWS = True
+    settings.WAREHOUSE_FRAGMENT_CACHE = False
+    importlib.reload(urls)
+    clear_url_caches()
+    yield
+    settings.WAREHOUSE_ASYNC_VIEWS = False
+    importlib.reload(urls)
+    clear_url_caches()
+
+
+@pytest.mark.django_db
+class TestAsyncViews:
+    """Async dashboard, list and type-ahead view tests."""
+
+    def test_routes_are_async(self, async_urls):
+        """Test the setting routes the read views to coroutine functions."""
+        for name in ('dashboard', 'warehouses_list', 'stock_movements_list', 'zone_search'):
+            assert asyncio.iscoroutinefunction(resolve(reverse(f'warehouse:{name}')).func)
+        assert not asyncio.iscoroutinefunction(resolve(reverse('warehouse:warehouse_add')).func)
+
+    def test_requires_login(self, async_urls, client):
+        """Test anonymous requests are turned away like the sync views."""
+        assert client.get(reverse('warehouse:warehouses_list')).status_code in (302, 401, 403)
+
+    def test_dashboard(self, async_urls, auth_client, warehouse, stock_movement):
+        """Test the dashboard counts match the sync aggregates."""
+        response = auth_client.get(reverse('warehouse:dashboard'))
+        assert response.status_code == 200
+        assert response.context['total_warehouses'] == 1
+        assert response.context['total_stock_movements'] == 1
+
+    def test_warehouses_list(self, async_urls, auth_client, hub_id, warehouse):
+        """Test search, sort and the rows partial."""
+        Warehouse.objects.create(hub_id=hub_id, name='Second', code='TST-002')
+        url = reverse('warehouse:warehouses_list')
+        response = auth_client.get(url, {'sort': 'code', 'dir': 'desc'}, **ROWS)
+        assert [w.code for w in response.context['warehouses']] == ['TST-002', 'TST-001']
+        response = auth_client.get(url, {'q': 'second'}, **ROWS)
+        assert [w.code for w in response.context['warehouses']] == ['TST-002']
+        assert auth_client.get(url).status_code == 200
+
+    def test_stock_movements_list(self, async_urls, auth_client, hub_id, zone):
+        """Test filters, facet counts and the out-of-band filter bar."""
+        StockMovement.objects.create(hub_id=hub_id, reference='IN', movement_type='inbound', dest_zone=zone, quantity=1)
+        StockMovement.objects.create(hub_id=hub_id, reference='OUT', movement_type='outbound', quantity=1)
+        url = reverse('warehouse:stock_movements_list')
+        response = auth_client.get(url, {'type': 'outbound'}, **ROWS)
+        assert [m.reference for m in response.context['stock_movements']] == ['OUT']
+        assert dict((v, c) for v, _l, c in response.context['facets']['movement_type'])['inbound'] == 1
+        assert 'hx-swap-oob' in response.content.decode()
+        response = auth_client.get(url, {'paginate': 'cursor', 'sort': 'created_at'}, **ROWS)
+        assert len(response.context['stock_movements']) == 2
+
+    def test_unchanged_list_returns_304(self, async_urls, auth_client, stock_movement):
+        """Test the async views answer conditional requests too."""
+        url = reverse('warehouse:stock_movements_list')
+        etag = auth_client.get(url, **ROWS)['ETag']
+        assert auth_client.get(url, HTTP_IF_NONE_MATCH=etag, **ROWS).status_code == 304
+
+    def test_zone_search(self, async_urls, auth_client, zone, other_zone):
+        """Test the type-ahead endpoint returns matching zones."""
+        response = auth_client.get(reverse('warehouse:zone_search'), {'q': 'z-002'})
+        content = response.content.decode()
+        assert 'Other Zone' in content and 'Test Zone' not in content
+
+
+@pytest.mark.django_db
+class TestAsyncHelpers:
+    """Async service and pagination helper tests."""
+
+    def test_dashboard_stats_match(self, hub_id, warehouse, zone, stock_movement):
+        """Test the async dashboard aggregates equal the sync ones."""
+        assert async_to_sync(services.acompute_dashboard_stats)(hub_id) == services.compute_dashboard_stats(hub_id)
+
+    def test_zone_directory_match(self, hub_id, zone, other_zone):
+        """Test the async zone directory equals the sync one."""
+        assert async_to_sync(services.azone_directory)(hub_id) == services.zone_directory(hub_id)
+
+    def test_apaginate(self, hub_id):
+        """Test async pagination matches Paginator.get_page, including out-of-range pages."""
+        Warehouse.objects.bulk_create([Warehouse(hub_id=hub_id, name=f'W{i}', code=f'W{i:02d}') for i in range(5)])
+        qs = Warehouse.objects.filter(hub_id=hub_id).order_by('code')
+        page = async_to_sync(apaginate)(qs, 2, 2)
+        assert [w.code for w in page] == ['W02', 'W03']
+        assert page.paginator.num_pages == 3
+        assert async_to_sync(apaginate)(qs, 2, 99).number == 3
+        assert len(async_to_sync(apaginate)(qs, 0, 1)) == 5
@@ -0,0 +1,167 @@
+"""Tests for background export jobs."""
+import datetime
+import uuid
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from warehouse import export_jobs
+from warehouse.models import ExportJob
+
+
+@pytest.fixture
+def export_settings(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.WAREHOUSE_EXPORT_WORKER = 'command'
+    return settings
+
+
+@pytest.mark.django_db
+class TestExportJobs:
+    """Queue, worker and retention tests."""
+
+    def test_enqueue_rejects_unknown_export(self, hub_id, export_settings):
+        """Test an unknown kind or format is refused."""
+        with pytest.raises(ValueError):
+            export_jobs.enqueue_export(hub_id, 'zones', 'csv', {})
+        with pytest.raises(ValueError):
+            export_jobs.enqueue_export(hub_id, 'warehouses', 'pdf', {})
+
+    def test_run_writes_csv(self, hub_id, stock_movement, export_settings):
+        """Test a job writes the filtered rows to storage and reports completion."""
+        job = export_jobs.enqueue_export(hub_id, 'stock_movements', 'csv', {'q': 'Reference'})
+        assert job.status == 'queued'
+        export_jobs.run_export_job(job.pk)
+        job.refresh_from_db()
+        assert job.status == 'done'
+        assert job.total_rows == job.rows_written == 1
+        assert job.progress == 100
+        assert job.finished_at is not None
+        with job.file.open('rb') as f:
+            content = f.read().decode('utf-8')
+        assert 'Test Reference' in content
+        assert job.file.name.endswith('.csv')
+
+    def test_run_respects_search(self, hub_id, stock_movement, export_settings):
+        """Test the stored search state filters the export."""
+        job = export_jobs.enqueue_export(hub_id, 'stock_movements', 'csv', {'q': 'nomatch'})
+        job = export_jobs.run_export_job(job.pk)
+        assert job.status == 'done'
+        assert job.rows_written == 0
+
+    def test_run_writes_xlsx(self, hub_id, warehouse, export_settings):
+        """Test a warehouse export in Excel format."""
+        job = export_jobs.enqueue_export(hub_id, 'warehouses', 'excel', {'sort': 'name', 'dir': 'desc'})
+        job = export_jobs.run_export_job(job.pk)
+        assert job.status == 'done'
+        assert job.rows_written == 1
+        assert job.file.name.endswith('.xlsx')
+
+    def test_failure_is_recorded(self, hub_id, export_settings, monkeypatch):
+        """Test an exception marks the job failed instead of leaving it running."""
+        def broken(job):
+            raise RuntimeError('disk full')
+        monkeypatch.setattr(export_jobs, 'write_export', broken)
+        job = export_jobs.enqueue_export(hub_id, 'warehouses', 'csv', {})
+        job = export_jobs.run_export_job(job.pk)
+        assert job.status == 'failed'
+        assert 'disk full' in job.error
+        assert job.is_finished
+
+    def test_claim_takes_oldest_queued_job(self, hub_id, export_settings):
+        """Test the worker claims jobs in order and stops when the queue is empty."""
+        first = export_jobs.enqueue_export(hub_id, 'warehouses', 'csv', {})
+        export_jobs.enqueue_export(hub_id, 'warehouses', 'csv', {})
+        claimed = export_jobs.claim_job()
+        assert claimed.pk == first.pk
+        assert claimed.status == 'running'
+        assert export_jobs.claim_job(first.pk) is None
+        assert export_jobs.claim_job() is not None
+        assert export_jobs.claim_job() is None
+
+    def test_requeue_stale_jobs(self, hub_id, export_settings):
+        """Test running jobs without progress go back to the queue."""
+        job = export_jobs.enqueue_export(hub_id, 'warehouses', 'csv', {})
+        export_jobs.claim_job(job.pk)
+        ExportJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - datetime.timedelta(hours=1))
+        assert export_jobs.requeue_stale_jobs() == 1
+        job.refresh_from_db()
+        assert job.status == 'queued'
+
+    def test_default_worker_is_command(self, hub_id, settings, tmp_path, django_capture_on_commit_callbacks):
+        """Test jobs only wait in the queue unless thread mode is chosen."""
+        settings.MEDIA_ROOT = str(tmp_path)
+        del settings.WAREHOUSE_EXPORT_WORKER
+        assert export_jobs.worker_mode() == 'command'
+        with django_capture_on_commit_callbacks() as callbacks:
+            export_jobs.enqueue_export(hub_id, 'warehouses', 'csv', {})
+        assert callbacks == []
+
+    def test_recover_jobs(self, hub_id, warehouse, export_settings):
+        """Test the thread pool's start-up pass requeues stalled jobs and runs the queue."""
+        stalled = export_jobs.enqueue_export(hub_id, 'warehouses', 'csv', {})
+        export_jobs.claim_job(stalled.pk)
+        ExportJob.objects.filter(pk=stalled.pk).update(updated_at=timezone.now() - datetime.timedelta(hours=1))
+        queued = export_jobs.enqueue_export(hub_id, 'warehouses', 'csv', {})
+        export_jobs.recover_jobs()
+        assert set(ExportJob.objects.filter(pk__in=[stalled.pk, queued.pk]).values_list('status', flat=True)) == {'done'}
+
+    def test_purge_removes_old_jobs_and_files(self, hub_id, warehouse, export_settings):
+        """Test finished jobs past retention are deleted with their files."""
+        job = export_jobs.run_export_job(export_jobs.enqueue_export(hub_id, 'warehouses', 'csv', {}).pk)
+        storage, name = job.file.storage, job.file.name
+        ExportJob.objects.filter(pk=job.pk).update(created_at=timezone.now() - datetime.timedelta(days=30))
+        queued = export_jobs.enqueue_export(hub_id, 'warehouses', 'csv', {})
+        assert export_jobs.purge_export_jobs() == 1
+        assert not storage.exists(name)
+        assert list(ExportJob.all_objects.values_list('pk', flat=True)) == [queued.pk]
+
+
+@pytest.mark.django_db
+class TestExportJobViews:
+    """Export job view tests."""
+
+    def test_create_stores_list_state(self, auth_client, export_settings):
+        """Test the datatable search and sort are stored with the job."""
+        response = auth_client.post(reverse('warehouse:export_job_create'), {
+            'kind': 'stock_movements', 'format': 'csv', 'q': 'pallet', 'sort': 'quantity', 'dir': 'desc',
+            'per_page': '12', 'view': 'table',
+        })
+        assert response.status_code == 200
+        job = ExportJob.objects.get()
+        assert job.params == {'q': 'pallet', 'sort': 'quantity', 'dir': 'desc'}
+        assert str(job.created_by) == auth_client.session['local_user_id']
+        assert 'every 2s' in response.content.decode()
+
+    def test_create_invalid_kind(self, auth_client, export_settings):
+        """Test an unknown export is rejected."""
+        response = auth_client.post(reverse('warehouse:export_job_create'), {'kind': 'users', 'format': 'csv'})
+        assert response.status_code == 400
+        assert not ExportJob.objects.exists()
+
+    def test_status_and_download(self, auth_client, stock_movement, export_settings):
+        """Test polling stops and the file downloads once the job is done."""
+        auth_client.post(reverse('warehouse:export_job_create'), {'kind': 'stock_movements', 'format': 'csv'})
+        job = ExportJob.objects.get()
+        download = reverse('warehouse:export_job_download', args=[job.pk])
+        assert auth_client.get(download).status_code == 404
+
+        export_jobs.run_export_job(job.pk)
+        response = auth_client.get(reverse('warehouse:export_job_status', args=[job.pk]))
+        assert response.status_code == 200
+        assert 'every 2s' not in response.content.decode()
+        assert download in response.content.decode()
+
+        response = auth_client.get(download)
+        assert response.status_code == 200
+        assert 'attachment' in response['Content-Disposition']
+        assert b'Test Reference' in b''.join(response.streaming_content)
+
+    def test_other_users_jobs_hidden(self, auth_client, hub_id, export_settings):
+        """Test a user cannot see or download someone else's export."""
+        job = export_jobs.enqueue_export(hub_id, 'warehouses', 'csv', {}, user_id=uuid.uuid4())
+        assert auth_client.get(reverse('warehouse:export_job_status', args=[job.pk])).status_code == 404
+        response = auth_client.get(reverse('warehouse:export_jobs'))
+        assert response.status_code == 200
+        assert str(job.pk) not in response.content.decode()
@@ -0,0 +1,126 @@
+"""Tests for bulk movement imports."""
+import io
+from decimal import Decimal
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+
+from warehouse import import_jobs, imports, services
+from warehouse.models import ImportJob, StockMovement
+
+CSV_ROWS = (
+    'Reference,Movement_Type,Quantity,Source_Zone,Dest_Zone\n'
+    'IN-1,inbound,10,,Z-001\n'
+    'IN-2,inbound,5,,NOPE\n'
+    'TR-1,transfer,3,Z-001,Z-002\n'
+)
+
+
+@pytest.mark.django_db
+class TestImportMovements:
+    """Chunked import pipeline tests."""
+
+    # Inside the test transaction workers=2 validates inline; the transactional case forks the pool.
+    @pytest.mark.parametrize('workers', [0, 2, pytest.param(2, marks=pytest.mark.django_db(transaction=True), id='pool')])
+    def test_csv_import(self, hub_id, zone, other_zone, workers):
+        """Test valid rows are committed chunk by chunk and rejected rows reported."""
+        rejected = io.StringIO()
+        result = imports.import_movements(
+            hub_id, io.BytesIO(CSV_ROWS.encode()), 'movements.csv', rejected=rejected, chunk_size=1, workers=workers,
+        )
+        assert result['created'] == 2
+        assert result['rejected'] == 1
+        assert result['errors'] == [{'row': 2, 'errors': {'dest_zone': 'Unknown zone: NOPE'}}]
+        assert sorted(StockMovement.objects.filter(hub_id=hub_id).values_list('reference', flat=True)) == ['IN-1', 'TR-1']
+        assert services.zone_on_hand(hub_id, zone.pk) == Decimal('7')
+        assert services.zone_on_hand(hub_id, other_zone.pk) == Decimal('3')
+        report = rejected.getvalue().splitlines()
+        assert report[0] == 'row,errors,reference,movement_type,quantity,source_zone,dest_zone'
+        assert report[1].startswith('2,dest_zone: Unknown zone: NOPE,IN-2,')
+
+    def test_overdrawing_rows_rejected(self, hub_id, zone):
+        """Test rows that would take a zone negative are rejected and reported, under the zone locks."""
+        data = 'reference,movement_type,quantity,source_zone,dest_zone\nIN-1,inbound,2,,Z-001\nOUT-1,outbound,5,Z-001,\n'
+        rejected = io.StringIO()
+        result = imports.import_movements(hub_id, io.BytesIO(data.encode()), 'movements.csv', rejected=rejected, workers=0)
+        assert result['created'] == 1
+        assert result['rejected'] == 1
+        assert result['errors'][0]['row'] == 2
+        assert 'Not enough stock' in result['errors'][0]['errors']['source_zone']
+        assert rejected.getvalue().splitlines()[1].startswith('2,source_zone: Not enough stock')
+        assert services.zone_on_hand(hub_id, zone.pk) == Decimal('2')
+
+    def test_xlsx_import(self, hub_id, zone):
+        """Test an Excel sheet with numeric cells and blank rows."""
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['reference', 'movement_type', 'quantity', 'dest_zone', 'product_ref'])
+        sheet.append(['X-1', 'inbound', 4, 'Z-001', 'SKU-1'])
+        sheet.append([None, None, None, None, None])
+        sheet.append(['X-2', 'adjustment', 1.5, 'Z-001', None])
+        data = io.BytesIO()
+        workbook.save(data)
+        data.seek(0)
+        result = imports.import_movements(hub_id, data, 'movements.xlsx', workers=0)
+        assert result == {'created': 2, 'rejected': 0, 'errors': []}
+        assert services.zone_on_hand(hub_id, zone.pk) == Decimal('5.5')
+        assert services.product_on_hand(hub_id, 'SKU-1', zone.pk) == Decimal('4')
+
+    def test_hub_zone_lookup(self, hub_id, zone, other_zone):
+        """Test the per-hub lookup resolves ids and codes, and flags shared codes."""
+        lookup = services.hub_zone_lookup(hub_id)
+        assert lookup['Z-001'] == zone.pk
+        assert lookup[str(other_zone.pk)] == other_zone.pk
+        other_zone.code = 'Z-001'
+        other_zone.save()
+        assert services.hub_zone_lookup(hub_id)['Z-001'] is None
+
+
+@pytest.mark.django_db
+class TestImportView:
+    """Import view tests."""
+
+    def test_import_form(self, auth_client):
+        """Test the import page renders."""
+        response = auth_client.get(reverse('warehouse:stock_movements_import'))
+        assert response.status_code == 200
+
+    def test_import_upload_queues_job(self, auth_client, hub_id, zone, other_zone, settings, tmp_path):
+        """Test an upload is queued as a job and the polled status shows the result."""
+        settings.MEDIA_ROOT = str(tmp_path)
+        settings.WAREHOUSE_EXPORT_WORKER = 'command'
+        upload = SimpleUploadedFile('movements.csv', CSV_ROWS.encode(), content_type='text/csv')
+        response = auth_client.post(reverse('warehouse:stock_movements_import'), {'file': upload})
+        assert response.status_code == 200
+        job = ImportJob.objects.get(hub_id=hub_id)
+        assert job.status == 'queued'
+        assert reverse('warehouse:import_job_status', args=[job.pk]) in response.content.decode()
+        assert not StockMovement.objects.filter(hub_id=hub_id).exists()
+
+        import_jobs.run_import_job(job.pk)
+        job.refresh_from_db()
+        assert (job.status, job.rows_created, job.rows_rejected) == ('done', 2, 1)
+        response = auth_client.get(reverse('warehouse:import_job_status', args=[job.pk]))
+        content = response.content.decode()
+        assert 'Unknown zone: NOPE' in content
+        assert 'hx-trigger' not in content
+        response = auth_client.get(reverse('warehouse:import_job_rejected', args=[job.pk]))
+        assert b'Unknown zone: NOPE' in b''.join(response.streaming_content)
+
+    def test_invalid_file_fails_job(self, hub_id, settings, tmp_path):
+        """Test an unreadable upload fails its job instead of the request."""
+        settings.MEDIA_ROOT = str(tmp_path)
+        settings.WAREHOUSE_EXPORT_WORKER = 'command'
+        job = import_jobs.enqueue_import(hub_id, SimpleUploadedFile('movements.xlsx', b'not a workbook'))
+        job = import_jobs.run_import_job(job.pk)
+        assert job.status == 'failed'
+        assert job.error
+
+    def test_import_requires_file(self, auth_client):
+        """Test posting without a file shows an error."""
+        response = auth_client.post(reverse('warehouse:stock_movements_import'))
+        assert response.status_code == 200
+        assert 'Select a CSV or Excel file' in response.content.decode()
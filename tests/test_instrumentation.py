@@ -0,0 +1,43 @@
+"""Tests for the opt-in view instrumentation."""
+import json
+import logging
+
+import pytest
+from django.urls import reverse
+
+
+@pytest.mark.django_db
+class TestInstrumentation:
+    """Server-Timing header and perf log tests."""
+
+    def test_disabled_by_default(self, auth_client, settings, zone):
+        """Test no header is added unless the setting is on."""
+        settings.WAREHOUSE_INSTRUMENTATION = False
+        response = auth_client.get(reverse('warehouse:stock_movements_list'))
+        assert 'Server-Timing' not in response
+
+    def test_list_reports_timings(self, auth_client, settings, stock_movement, caplog):
+        """Test the list view reports queries, render time and rows."""
+        settings.WAREHOUSE_INSTRUMENTATION = True
+        with caplog.at_level(logging.INFO, logger='warehouse.perf'):
+            response = auth_client.get(reverse('warehouse:stock_movements_list'),
+                                       HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+        timing = response['Server-Timing']
+        assert 'db;dur=' in timing and 'render;dur=' in timing
+        assert 'stock_movements_list.rows' in timing
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record['view'] == 'stock_movements_list.rows'
+        assert record['queries'] > 0
+        assert record['rows'] == 1
+        assert record['slowest_sql']
+
+    def test_streamed_export_logged_after_download(self, auth_client, settings, stock_movement, caplog):
+        """Test a CSV export is measured until its last row is streamed."""
+        settings.WAREHOUSE_INSTRUMENTATION = True
+        with caplog.at_level(logging.INFO, logger='warehouse.perf'):
+            response = auth_client.get(reverse('warehouse:stock_movements_list'), {'export': 'csv'})
+            assert not caplog.records
+            b''.join(response.streaming_content)
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record['view'] == 'stock_movements_list.export_csv'
+        assert record['rows'] == 1
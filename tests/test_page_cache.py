@@ -0,0 +1,58 @@
+"""Tests for conditional responses and the rendered fragment cache."""
+import pytest
+from django.urls import reverse
+
+from warehouse.models import StockMovement
+
+ROWS = {'HTTP_HX_REQUEST': 'true', 'HTTP_HX_TARGET': 'datatable-body'}
+
+
+@pytest.mark.django_db
+class TestPageCache:
+    """ETag, Last-Modified and fragment cache tests."""
+
+    def test_unchanged_page_returns_304(self, auth_client, stock_movement):
+        """Test a repeated request with the ETag gets 304 until the hub changes."""
+        url = reverse('warehouse:stock_movements_list')
+        response = auth_client.get(url, **ROWS)
+        assert response.status_code == 200
+        assert response['Last-Modified']
+        assert 'HX-Target' in response['Vary']
+        etag = response['ETag']
+        assert auth_client.get(url, HTTP_IF_NONE_MATCH=etag, **ROWS).status_code == 304
+        assert auth_client.get(url, {'page': 2}, HTTP_IF_NONE_MATCH=etag, **ROWS).status_code == 200
+
+    def test_write_moves_the_version(self, auth_client, hub_id, zone, django_capture_on_commit_callbacks):
+        """Test a committed write gives new ETags and re-renders cached fragments."""
+        url = reverse('warehouse:stock_movements_list')
+        first = auth_client.get(url, **ROWS)
+        StockMovement.objects.create(hub_id=hub_id, reference='UNSEEN', movement_type='inbound', quantity=1)
+        cached = auth_client.get(url, **ROWS)
+        assert cached.content == first.content
+        assert b'UNSEEN' not in cached.content
+        with django_capture_on_commit_callbacks(execute=True):
+            auth_client.post(reverse('warehouse:stock_movement_add'), {
+                'reference': 'IN', 'movement_type': 'inbound', 'quantity': '1', 'dest_zone': str(zone.pk),
+            })
+        response = auth_client.get(url, HTTP_IF_NONE_MATCH=first['ETag'], **ROWS)
+        assert response.status_code == 200
+        assert b'UNSEEN' in response.content
+        assert response['ETag'] != first['ETag']
+
+    def test_fragment_cache_can_be_disabled(self, auth_client, hub_id, settings):
+        """Test the conditional responses stay when the fragment cache is off."""
+        settings.WAREHOUSE_FRAGMENT_CACHE = False
+        url = reverse('warehouse:warehouses_list')
+        first = auth_client.get(url, **ROWS)
+        from warehouse.models import Warehouse
+        Warehouse.objects.create(hub_id=hub_id, name='Fresh', code='FR')
+        assert b'Fresh' in auth_client.get(url, **ROWS).content
+        assert auth_client.get(url, HTTP_IF_NONE_MATCH=first['ETag'], **ROWS).status_code == 304
+
+    def test_exports_and_full_pages_not_stored(self, auth_client, hub_id, stock_movement):
+        """Test exports bypass the decorator and full pages are always rendered."""
+        url = reverse('warehouse:stock_movements_list')
+        assert 'ETag' not in auth_client.get(url, {'export': 'csv'})
+        auth_client.get(url)
+        StockMovement.objects.create(hub_id=hub_id, reference='UNSEEN', movement_type='inbound', quantity=1)
+        assert b'UNSEEN' in auth_client.get(url).content
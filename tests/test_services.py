@@ -0,0 +1,700 @@
+"""Tests for warehouse services."""
+import datetime
+import uuid
+
+import pytest
+from decimal import Decimal
+from django.urls import reverse
+from django.utils import timezone
+
+from warehouse import services
+from warehouse.models import StockMovement, StockMovementLine, ZoneBalance
+
+
+@pytest.mark.django_db
+class TestZoneBalance:
+    """ZoneBalance ledger tests."""
+
+    def _add(self, auth_client, **data):
+        data.setdefault('reference', 'MOV')
+        data.setdefault('quantity', '10.00')
+        response = auth_client.post(reverse('warehouse:stock_movement_add'), data)
+        assert response.status_code == 200
+        return StockMovement.objects.get(reference=data['reference'])
+
+    def test_add_updates_balance(self, auth_client, hub_id, zone):
+        """Test inbound movement increments the destination zone."""
+        movement = self._add(auth_client, movement_type='inbound', dest_zone=str(zone.pk))
+        balance = ZoneBalance.objects.get(hub_id=hub_id, zone=zone)
+        assert balance.on_hand == Decimal('10.00')
+        assert balance.last_movement_id == movement.pk
+
+    def test_transfer_moves_stock(self, auth_client, hub_id, zone, other_zone):
+        """Test transfer decrements source and increments destination."""
+        self._add(auth_client, reference='IN', movement_type='inbound', dest_zone=str(zone.pk))
+        self._add(auth_client, reference='TR', movement_type='transfer', quantity='4',
+                  source_zone=str(zone.pk), dest_zone=str(other_zone.pk))
+        assert services.zone_on_hand(hub_id, zone.pk) == Decimal('6.00')
+        assert services.zone_on_hand(hub_id, other_zone.pk) == Decimal('4.00')
+
+    def test_edit_reapplies_balance(self, auth_client, hub_id, zone, other_zone):
+        """Test editing a movement reverses the old values."""
+        movement = self._add(auth_client, movement_type='inbound', dest_zone=str(zone.pk))
+        url = reverse('warehouse:stock_movement_edit', args=[movement.pk])
+        auth_client.post(url, {
+            'reference': 'MOV', 'movement_type': 'inbound',
+            'quantity': '3', 'dest_zone': str(other_zone.pk),
+        })
+        assert services.zone_on_hand(hub_id, zone.pk) == Decimal('0')
+        assert services.zone_on_hand(hub_id, other_zone.pk) == Decimal('3')
+
+    def test_delete_reverses_balance(self, auth_client, hub_id, zone):
+        """Test soft delete and bulk delete reverse the movement."""
+        first = self._add(auth_client, reference='A', movement_type='inbound', dest_zone=str(zone.pk))
+        second = self._add(auth_client, reference='B', movement_type='inbound', dest_zone=str(zone.pk))
+        auth_client.post(reverse('warehouse:stock_movement_delete', args=[first.pk]))
+        assert services.zone_on_hand(hub_id, zone.pk) == Decimal('10.00')
+        auth_client.post(reverse('warehouse:stock_movements_bulk_action'), {'ids': str(second.pk), 'action': 'delete'})
+        assert services.zone_on_hand(hub_id, zone.pk) == Decimal('0')
+
+    def test_repeated_delete_reverses_once(self, auth_client, hub_id, zone):
+        """Test a second delete of the same movement 404s without posting another reversal."""
+        self._add(auth_client, reference='A', movement_type='inbound', dest_zone=str(zone.pk))
+        movement = self._add(auth_client, reference='B', movement_type='inbound', dest_zone=str(zone.pk))
+        url = reverse('warehouse:stock_movement_delete', args=[movement.pk])
+        assert auth_client.post(url).status_code == 200
+        assert auth_client.post(url).status_code == 404
+        assert services.zone_on_hand(hub_id, zone.pk) == Decimal('10.00')
+
+    def test_foreign_zone_ignored(self, auth_client, zone):
+        """Test zones of another hub are not accepted."""
+        zone.hub_id = None
+        zone.save()
+        movement = self._add(auth_client, movement_type='inbound', dest_zone=str(zone.pk))
+        assert movement.dest_zone_id is None
+
+    def test_rebuild(self, hub_id, zone, other_zone):
+        """Test rebuild recomputes balances from history."""
+        StockMovement.objects.create(hub_id=hub_id, reference='IN', movement_type='inbound', dest_zone=zone, quantity=Decimal('8'))
+        transfer = StockMovement.objects.create(hub_id=hub_id, reference='TR', movement_type='transfer', source_zone=zone,
+                                                dest_zone=other_zone, quantity=Decimal('5'))
+        assert services.rebuild_zone_balances(hub_id) == 2
+        assert services.zone_on_hand(hub_id, zone.pk) == Decimal('3')
+        assert services.zone_on_hand(hub_id, other_zone.pk) == Decimal('5')
+        balances = ZoneBalance.objects.filter(hub_id=hub_id)
+        assert {(b.last_movement_id, b.last_movement_at) for b in balances} == {(transfer.pk, transfer.created_at)}
+
+
+@pytest.mark.django_db
+class TestIngest:
+    """Batch ingestion tests."""
+
+    def test_ingest_by_code_and_id(self, hub_id, zone, other_zone, django_assert_max_num_queries):
+        """Test valid rows are inserted in one batch and posted to the ledger."""
+        rows = [
+            {'reference': f'IN-{i}', 'movement_type': 'inbound', 'quantity': '2', 'dest_zone': 'Z-001'}
+            for i in range(50)
+        ] + [{'reference': 'TR', 'movement_type': 'transfer', 'quantity': '5',
+              'source_zone': str(zone.pk), 'dest_zone': 'Z-002'}]
+        # Fixed per-batch cost (ledger, product lines, rollup keys), never per row.
+        with django_assert_max_num_queries(40):
+            movements, errors = services.ingest_movements(hub_id, rows)
+        assert errors == []
+        assert len(movements) == 51
+        assert services.zone_on_hand(hub_id, zone.pk) == Decimal('95')
+        assert services.zone_on_hand(hub_id, other_zone.pk) == Decimal('5')
+
+    def test_ingest_reports_row_errors(self, hub_id, zone):
+        """Test invalid rows are reported and valid ones still inserted."""
+        rows = [
+            {'reference': 'OK', 'movement_type': 'inbound', 'quantity': '1', 'dest_zone': 'Z-001'},
+            {'reference': '', 'movement_type': 'teleport', 'quantity': 'x', 'dest_zone': 'NOPE'},
+            {'reference': 'OUT', 'movement_type': 'outbound', 'quantity': '1'},
+        ]
+        movements, errors = services.ingest_movements(hub_id, rows)
+        assert [m.reference for m in movements] == ['OK']
+        assert [e['row'] for e in errors] == [2, 3]
+        assert set(errors[0]['errors']) == {'reference', 'movement_type', 'quantity', 'dest_zone'}
+        assert 'source_zone' in errors[1]['errors']
+
+    def test_all_or_nothing(self, hub_id, zone):
+        """Test all_or_nothing rejects the whole batch on any error."""
+        rows = [
+            {'reference': 'OK', 'movement_type': 'inbound', 'quantity': '1', 'dest_zone': 'Z-001'},
+            {'reference': 'BAD', 'movement_type': 'inbound', 'quantity': '-1', 'dest_zone': 'Z-001'},
+        ]
+        movements, errors = services.ingest_movements(hub_id, rows, all_or_nothing=True)
+        assert movements == []
+        assert not StockMovement.objects.filter(hub_id=hub_id).exists()
+
+    def test_ingest_cannot_overdraw(self, hub_id, zone, other_zone):
+        """Test rows that would take a zone negative are rejected, counting earlier rows of the batch."""
+        rows = [
+            {'reference': 'OUT-1', 'movement_type': 'outbound', 'quantity': '1', 'source_zone': 'Z-001'},
+            {'reference': 'IN', 'movement_type': 'inbound', 'quantity': '5', 'dest_zone': 'Z-001'},
+            {'reference': 'TR', 'movement_type': 'transfer', 'quantity': '4', 'source_zone': 'Z-001', 'dest_zone': 'Z-002'},
+            {'reference': 'OUT-2', 'movement_type': 'outbound', 'quantity': '2', 'source_zone': 'Z-001'},
+        ]
+        movements, errors = services.ingest_movements(hub_id, rows)
+        assert [m.reference for m in movements] == ['IN', 'TR']
+        assert [e['row'] for e in errors] == [1, 4]
+        assert 'Not enough stock' in errors[1]['errors']['source_zone']
+        assert services.zone_on_hand(hub_id, zone.pk) == Decimal('1')
+        movements, errors = services.ingest_movements(hub_id, rows[3:] + rows[1:2], all_or_nothing=True)
+        assert movements == [] and [e['row'] for e in errors] == [1]
+        assert services.zone_on_hand(hub_id, zone.pk) == Decimal('1')
+
+    def test_ingest_view_json(self, auth_client, hub_id, zone):
+        """Test the JSON ingestion endpoint."""
+        import json
+        url = reverse('warehouse:stock_movements_ingest')
+        body = {'movements': [{'reference': 'IN', 'movement_type': 'inbound', 'quantity': '3', 'dest_zone': 'Z-001'}]}
+        response = auth_client.post(url, json.dumps(body), content_type='application/json')
+        assert response.status_code == 200
+        assert response.json()['created'] == 1
+
+    def test_ingest_view_csv(self, auth_client, hub_id, zone):
+        """Test the CSV upload ingestion endpoint."""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        url = reverse('warehouse:stock_movements_ingest')
+        upload = SimpleUploadedFile(
+            'movements.csv', b'reference,movement_type,quantity,dest_zone\nIN-1,inbound,4,Z-001\nIN-2,bogus,1,Z-001\n',
+            content_type='text/csv',
+        )
+        response = auth_client.post(url, {'file': upload})
+        data = response.json()
+        assert data['created'] == 1
+        assert data['errors'][0]['row'] == 2
+
+
+@pytest.mark.django_db
+class TestProductLines:
+    """Product line and per-SKU balance tests."""
+
+    def test_ingest_lines_post_product_balances(self, hub_id, zone, other_zone):
+        """Test lines are bulk inserted and posted per zone, product and lot."""
+        movements, errors = services.ingest_movements(hub_id, [
+            {'reference': 'IN', 'movement_type': 'inbound', 'dest_zone': 'Z-001', 'lines': [
+                {'product_ref': 'SKU-1', 'lot': 'L1', 'quantity': '6'},
+                {'product_ref': 'SKU-1', 'lot': 'L2', 'quantity': '4'},
+                {'product_ref': 'SKU-2', 'serial': 'SN-9', 'quantity': '1'},
+            ]},
+            {'reference': 'TR', 'movement_type': 'transfer', 'source_zone': 'Z-001', 'dest_zone': 'Z-002',
+             'product_ref': 'SKU-1', 'lot': 'L1', 'quantity': '5'},
+        ])
+        assert errors == []
+        assert movements[0].quantity == Decimal('11.00')
+        assert StockMovementLine.objects.filter(movement=movements[0]).count() == 3
+        assert services.product_on_hand(hub_id, 'SKU-1', zone.pk) == Decimal('5')
+        assert services.product_on_hand(hub_id, 'SKU-1', other_zone.pk) == Decimal('5')
+        assert services.product_availability(hub_id, 'SKU-1', zone.pk) == [
+            {'zone_id': zone.pk, 'lot': 'L1', 'on_hand': Decimal('1.00')},
+            {'zone_id': zone.pk, 'lot': 'L2', 'on_hand': Decimal('4.00')},
+        ]
+
+    def test_delete_and_edit_repost_lines(self, auth_client, hub_id, zone, other_zone):
+        """Test moving or deleting a header re-posts its lines."""
+        movements, _ = services.ingest_movements(hub_id, [
+            {'reference': 'IN', 'movement_type': 'inbound', 'dest_zone': 'Z-001',
+             'lines': [{'product_ref': 'SKU-1', 'quantity': '3'}]},
+        ])
+        movement = movements[0]
+        auth_client.post(reverse('warehouse:stock_movement_edit', args=[movement.pk]), {
+            'reference': 'IN', 'movement_type': 'inbound', 'quantity': '3', 'dest_zone': str(other_zone.pk),
+        })
+        assert services.product_on_hand(hub_id, 'SKU-1', zone.pk) == Decimal('0')
+        assert services.product_on_hand(hub_id, 'SKU-1', other_zone.pk) == Decimal('3')
+        auth_client.post(reverse('warehouse:stock_movement_delete', args=[movement.pk]))
+        assert services.product_on_hand(hub_id, 'SKU-1', other_zone.pk) == Decimal('0')
+        assert services.rebuild_product_balances(hub_id) == 0
+
+    def test_line_errors(self, hub_id, zone):
+        """Test invalid lines reject the row."""
+        _, errors = services.ingest_movements(hub_id, [
+            {'reference': 'IN', 'movement_type': 'inbound', 'dest_zone': 'Z-001',
+             'lines': [{'product_ref': 'SKU-1', 'serial': 'SN-1', 'quantity': '2'}]},
+        ])
+        assert 'lines' in errors[0]['errors']
+
+    def test_rebuild(self, hub_id, zone, other_zone):
+        """Test rebuild recomputes product balances from lines."""
+        services.ingest_movements(hub_id, [
+            {'reference': 'IN', 'movement_type': 'inbound', 'dest_zone': 'Z-001', 'product_ref': 'SKU-1', 'quantity': '8'},
+            {'reference': 'TR', 'movement_type': 'transfer', 'source_zone': 'Z-001', 'dest_zone': 'Z-002',
+             'product_ref': 'SKU-1', 'quantity': '3'},
+        ])
+        assert services.rebuild_product_balances(hub_id) == 2
+        assert services.product_on_hand(hub_id, 'SKU-1', zone.pk) == Decimal('5')
+        assert services.product_on_hand(hub_id, 'SKU-1', other_zone.pk) == Decimal('3')
+
+@pytest.mark.django_db
+class TestPosting:
+    """Locked, idempotent movement posting tests."""
+
+    def _values(self, **values):
+        values.setdefault('reference', 'MOV')
+        values.setdefault('quantity', '10')
+        values.setdefault('notes', '')
+        values.setdefault('status', 'pending')
+        return values
+
+    def test_idempotency_key_replay(self, hub_id, zone):
+        """Test a replayed key returns the first movement and posts once."""
+        values = self._values(movement_type='inbound', dest_zone_id=zone.pk)
+        first, created = services.post_movement(hub_id, values, idempotency_key='scan-1')
+        again, created_again = services.post_movement(hub_id, values, idempotency_key='scan-1')
+        assert created is True and created_again is False
+        assert again.pk == first.pk
+        assert StockMovement.objects.filter(hub_id=hub_id).count() == 1
+        assert services.zone_on_hand(hub_id, zone.pk) == Decimal('10')
+
+    def test_rejects_unknown_movement_type(self, hub_id, zone):
+        """Test a type outside MOVEMENT_TYPE is refused before anything is saved."""
+        with pytest.raises(services.PostingError):
+            services.post_movement(hub_id, self._values(movement_type='gift', dest_zone_id=zone.pk))
+        assert not StockMovement.objects.filter(hub_id=hub_id).exists()
+        assert services.zone_on_hand(hub_id, zone.pk) == Decimal('0')
+
+    def test_rejects_negative_stock(self, hub_id, zone, other_zone):
+        """Test outbound and transfer movements cannot overdraw their source zone."""
+        services.post_movement(hub_id, self._values(movement_type='inbound', dest_zone_id=zone.pk))
+        with pytest.raises(services.PostingError):
+            services.post_movement(hub_id, self._values(movement_type='outbound', quantity='11', source_zone_id=zone.pk))
+        movement, _ = services.post_movement(hub_id, self._values(
+            movement_type='transfer', quantity='10', source_zone_id=zone.pk, dest_zone_id=other_zone.pk,
+        ))
+        assert services.zone_on_hand(hub_id, zone.pk) == Decimal('0')
+        with pytest.raises(services.PostingError):
+            services.post_movement(hub_id, self._values(
+                movement_type='transfer', quantity='12', source_zone_id=zone.pk, dest_zone_id=other_zone.pk,
+            ), pk=movement.pk)
+        assert services.zone_on_hand(hub_id, other_zone.pk) == Decimal('10')
+
+    def test_add_view_reports_error(self, auth_client, hub_id, zone):
+        """Test the add view re-renders the form with the posting error."""
+        response = auth_client.post(reverse('warehouse:stock_movement_add'), {
+            'reference': 'OUT', 'movement_type': 'outbound', 'quantity': '1', 'source_zone': str(zone.pk),
+        })
+        assert response.status_code == 200
+        assert response.context['error']
+        assert not StockMovement.objects.filter(hub_id=hub_id).exists()
+
+
+@pytest.mark.django_db
+class TestStatusWorkflow:
+    """Movement status state machine tests."""
+
+    def _ingest(self, hub_id, count, status='pending'):
+        movements, _ = services.ingest_movements(hub_id, [
+            {'reference': f'IN-{i}', 'movement_type': 'inbound', 'quantity': '1', 'dest_zone': 'Z-001', 'status': status}
+            for i in range(count)
+        ])
+        return movements
+
+    def test_bulk_transition_is_conditional(self, hub_id, zone):
+        """Test only movements allowed to reach the target status change, with timestamps."""
+        movements = self._ingest(hub_id, 3)
+        services.transition_movements(hub_id, [movements[0].pk], 'in_progress')
+        count = services.transition_movements(hub_id, [m.pk for m in movements], 'done')
+        assert count == 1
+        done = StockMovement.objects.get(pk=movements[0].pk)
+        assert done.status == 'done'
+        assert done.started_at is not None and done.done_at is not None
+        assert StockMovement.objects.filter(hub_id=hub_id, status='pending').count() == 2
+
+    def test_bulk_transition_query_count(self, hub_id, zone, django_assert_max_num_queries):
+        """Test closing out a wave does not issue a query per movement."""
+        movements = self._ingest(hub_id, 200, status='in_progress')
+        with django_assert_max_num_queries(15):
+            assert services.transition_movements(hub_id, [m.pk for m in movements], 'done') == 200
+
+    def test_cancel_reverses_ledger(self, auth_client, hub_id, zone):
+        """Test cancelled movements leave the zone ledger and rebuild agrees."""
+        movements = self._ingest(hub_id, 2)
+        response = auth_client.post(reverse('warehouse:stock_movements_bulk_action'), {
+            'ids': str(movements[0].pk), 'action': 'cancel',
+        })
+        assert response.status_code == 200
+        assert StockMovement.objects.get(pk=movements[0].pk).cancelled_at is not None
+        assert services.zone_on_hand(hub_id, zone.pk) == Decimal('1')
+        services.rebuild_zone_balances(hub_id)
+        assert services.zone_on_hand(hub_id, zone.pk) == Decimal('1')
+
+    def test_invalid_transition_rejected(self, hub_id, zone):
+        """Test edits cannot leave a final status."""
+        movement = self._ingest(hub_id, 1, status='done')[0]
+        assert movement.done_at is not None
+        with pytest.raises(services.PostingError):
+            services.post_movement(hub_id, {'status': 'pending', 'quantity': '1'}, pk=movement.pk)
+        _, errors = services.ingest_movements(hub_id, [
+            {'reference': 'X', 'movement_type': 'inbound', 'quantity': '1', 'dest_zone': 'Z-001', 'status': 'shipped'},
+        ])
+        assert 'status' in errors[0]['errors']
+
+@pytest.mark.django_db(transaction=True)
+class TestConcurrentPosting:
+    """Concurrent posting tests (PostgreSQL only)."""
+
+    def test_parallel_outbound_cannot_overdraw(self, hub_id, zone):
+        """Test two concurrent withdrawals of 6 from 10 leave exactly one posted."""
+        from concurrent.futures import ThreadPoolExecutor
+        from django.db import connection, connections
+
+        if connection.vendor != 'postgresql':
+            pytest.skip('Row locking is only exercised on PostgreSQL')
+        services.post_movement(hub_id, {'reference': 'IN', 'movement_type': 'inbound', 'quantity': '10',
+                                        'dest_zone_id': zone.pk})
+
+        def withdraw(n):
+            try:
+                services.post_movement(hub_id, {'reference': f'OUT-{n}', 'movement_type': 'outbound',
+                                                'quantity': '6', 'source_zone_id': zone.pk})
+                return True
+            except services.PostingError:
+                return False
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            results = list(pool.map(withdraw, range(2)))
+        assert sorted(results) == [False, True]
+        assert services.zone_on_hand(hub_id, zone.pk) == Decimal('4')
+
+@pytest.mark.django_db
+class TestMovementRollup:
+    """Movement rollup tests."""
+
+    def _totals(self, hub_id):
+        from warehouse.models import MovementRollup
+        return sorted(
+            (r.period, r.direction, r.zone_id, r.movement_type, r.status, r.quantity, r.movement_count)
+            for r in MovementRollup.objects.filter(hub_id=hub_id).exclude(movement_count=0, quantity=0)
+        )
+
+    def test_incremental_matches_rebuild(self, hub_id, zone, other_zone):
+        """Test incrementally maintained rollups equal a full rebuild."""
+        rows = [
+            {'reference': 'IN', 'movement_type': 'inbound', 'quantity': '10', 'dest_zone': 'Z-001'},
+            {'reference': 'TR', 'movement_type': 'transfer', 'quantity': '4', 'source_zone': 'Z-001', 'dest_zone': 'Z-002'},
+            {'reference': 'OUT', 'movement_type': 'outbound', 'quantity': '1', 'source_zone': 'Z-002'},
+        ]
+        movements, _ = services.ingest_movements(hub_id, rows)
+        removed = [services.snapshot(movements[2])]
+        StockMovement.objects.filter(pk=movements[2].pk).update(is_deleted=True)
+        services.apply_movement_changes(hub_id, removed=removed)
+
+        incremental = self._totals(hub_id)
+        assert ('day', 'in', zone.pk, 'inbound', 'pending', Decimal('10.00'), 1) in incremental
+        services.rebuild_movement_rollups(hub_id)
+        assert self._totals(hub_id) == incremental
+
+    def test_throughput_report(self, hub_id, zone, other_zone):
+        """Test the report sums directions per bucket from rollups only."""
+        services.ingest_movements(hub_id, [
+            {'reference': 'IN', 'movement_type': 'inbound', 'quantity': '10', 'dest_zone': 'Z-001'},
+            {'reference': 'TR', 'movement_type': 'transfer', 'quantity': '4', 'source_zone': 'Z-001', 'dest_zone': 'Z-002'},
+        ])
+        series = services.throughput_report(hub_id, period='day')
+        assert len(series) == 1
+        assert series[0]['in_quantity'] == Decimal('14.00')
+        assert series[0]['out_quantity'] == Decimal('4.00')
+
+    def test_compact_drops_empty_rows(self, hub_id, zone):
+        """Test compaction removes rollups emptied by deletes."""
+        from warehouse.models import MovementRollup
+        movements, _ = services.ingest_movements(hub_id, [
+            {'reference': 'IN', 'movement_type': 'inbound', 'quantity': '10', 'dest_zone': 'Z-001'},
+        ])
+        services.apply_movement_changes(hub_id, removed=movements)
+        assert MovementRollup.objects.filter(hub_id=hub_id).exists()
+        services.compact_movement_rollups(hub_id)
+        assert not MovementRollup.objects.filter(hub_id=hub_id).exists()
+
+
+@pytest.mark.django_db
+class TestZoneSetup:
+    """Bin generator and zone upsert tests."""
+
+    def test_bin_labels(self):
+        """Test numeric, letter and list patterns."""
+        assert services.bin_labels('1-3') == ['1', '2', '3']
+        assert services.bin_labels('8-10') == ['08', '09', '10']
+        assert services.bin_labels('a-c') == ['A', 'B', 'C']
+        assert services.bin_labels('X, Y') == ['X', 'Y']
+        with pytest.raises(services.ZoneSetupError):
+            services.bin_labels('A-10')
+
+    def test_generate_bins_single_insert(self, hub_id, warehouse, zone, django_assert_max_num_queries):
+        """Test the generator inserts the whole tree in one statement and reuses existing codes."""
+        from warehouse.models import Zone
+        with django_assert_max_num_queries(2):
+            created = services.generate_bins(hub_id, warehouse.pk, 'A-D', '01-10', '1-5', prefix='P')
+        # 4 aisles, 40 racks and 200 bins.
+        assert created == 244
+        assert services.generate_bins(hub_id, warehouse.pk, 'A-E', '01-10', '1-5', prefix='P') == 61
+        assert Zone.objects.filter(hub_id=hub_id, code='PA-01-1').count() == 1
+        rack = Zone.objects.get(hub_id=hub_id, code='PA-01')
+        bin_zone = Zone.objects.get(hub_id=hub_id, code='PA-01-1')
+        assert (rack.zone_type, rack.depth, bin_zone.zone_type, bin_zone.depth) == ('rack', 1, 'bin', 2)
+        assert bin_zone.parent_id == rack.pk
+        assert bin_zone.path.startswith(rack.path)
+
+    def test_upsert_zones_batches(self, hub_id, warehouse, zone, monkeypatch):
+        """Test upsert creates and updates by warehouse and code across batches."""
+        from warehouse.models import Zone
+        monkeypatch.setattr(services, 'ZONE_UPSERT_BATCH_SIZE', 2)
+        rows = [{'code': 'Z-001', 'name': 'Renamed'}] + [
+            {'code': f'N-{i}', 'name': f'New {i}', 'zone_type': 'picking', 'warehouse': 'TST-001'} for i in range(4)
+        ]
+        created, updated, errors = services.upsert_zones(hub_id, rows, warehouse_id=warehouse.pk)
+        assert (created, updated, errors) == (4, 1, [])
+        assert Zone.objects.filter(hub_id=hub_id, zone_type='picking').count() == 4
+        _, _, errors = services.upsert_zones(hub_id, [{'code': 'X', 'warehouse': 'NOPE'}])
+        assert 'warehouse' in errors[0]['errors']
+        _, _, errors = services.upsert_zones(hub_id, [{'code': 'X', 'zone_type': 'attic'}], warehouse_id=warehouse.pk)
+        assert 'zone_type' in errors[0]['errors']
+
+    def test_upsert_zones_parent(self, hub_id, warehouse, zone):
+        """Test the parent column nests new zones and moves existing ones."""
+        from warehouse.models import Zone
+        rows = [
+            {'code': 'AREA', 'zone_type': 'area'},
+            {'code': 'AISLE', 'zone_type': 'aisle', 'parent': 'AREA'},
+            {'code': 'Z-001', 'parent': 'AISLE'},
+            {'code': 'ORPHAN', 'parent': 'MISSING'},
+        ]
+        created, updated, errors = services.upsert_zones(hub_id, rows, warehouse_id=warehouse.pk)
+        assert (created, updated) == (2, 1)
+        assert [e['row'] for e in errors] == [4]
+        zone.refresh_from_db()
+        assert zone.depth == 2
+        assert zone.parent == Zone.objects.get(hub_id=hub_id, code='AISLE')
+
+
+@pytest.mark.django_db
+class TestLocationTree:
+    """Location hierarchy and subtree aggregate tests."""
+
+    def _tree(self, hub_id, warehouse):
+        from warehouse.models import Zone
+        services.generate_bins(hub_id, warehouse.pk, 'A-B', '1-2', '1-2')
+        return {z.code: z for z in Zone.objects.filter(hub_id=hub_id)}
+
+    def _stock(self, hub_id, codes, quantity='5'):
+        rows = [
+            {'reference': f'IN-{code}', 'movement_type': 'inbound', 'quantity': quantity, 'dest_zone': code,
+             'lines': [{'product_ref': 'SKU-1', 'quantity': quantity}]}
+            for code in codes
+        ]
+        _movements, errors = services.ingest_movements(hub_id, rows)
+        assert errors == []
+
+    def test_paths(self, hub_id, warehouse, zone):
+        """Test roots and generated children get materialized paths."""
+        assert zone.path == f'{zone.pk.hex}/'
+        assert zone.depth == 0
+        zones = self._tree(hub_id, warehouse)
+        assert zones['A-1-2'].path == zones['A'].path + zones['A-1'].pk.hex + '/' + zones['A-1-2'].pk.hex + '/'
+
+    def test_subtree_aggregates(self, hub_id, warehouse):
+        """Test stock rolls up to racks, aisles and subtree reports."""
+        zones = self._tree(hub_id, warehouse)
+        self._stock(hub_id, ['A-1-1', 'A-1-2', 'A-2-1', 'B-1-1'])
+        assert services.subtree_on_hand(hub_id, zones['A'].path) == Decimal('15')
+        assert services.subtree_on_hand(hub_id, zones['A-1'].path) == Decimal('10')
+        assert services.tree_on_hand(hub_id, depth=0) == {zones['A'].pk: Decimal('15'), zones['B'].pk: Decimal('5')}
+        assert services.tree_on_hand(hub_id, depth=1, under=zones['A'].path) == {
+            zones['A-1'].pk: Decimal('10'), zones['A-2'].pk: Decimal('5'),
+        }
+        availability = services.product_availability(hub_id, 'SKU-1', under=zones['B'].path)
+        assert [row['zone_id'] for row in availability] == [zones['B-1-1'].pk]
+        report = services.throughput_report(hub_id, under=zones['A'].path)
+        assert sum(row['in_quantity'] for row in report) == Decimal('15')
+
+    def test_move_rewrites_subtree(self, hub_id, warehouse):
+        """Test moving a rack rewrites every descendant path and depth."""
+        from warehouse.models import Zone
+        zones = self._tree(hub_id, warehouse)
+        self._stock(hub_id, ['A-1-1'])
+        services.move_zone(hub_id, zones['A-1'], zones['B'])
+        moved = Zone.objects.get(pk=zones['A-1-1'].pk)
+        assert moved.path.startswith(zones['B'].path)
+        assert moved.depth == 2
+        assert Zone.objects.get(pk=zones['A-1'].pk).parent_id == zones['B'].pk
+        assert services.subtree_on_hand(hub_id, zones['B'].path) == Decimal('5')
+        assert services.subtree_on_hand(hub_id, zones['A'].path) == Decimal('0')
+
+    def test_move_under_itself_rejected(self, hub_id, warehouse):
+        """Test a location cannot become its own descendant."""
+        zones = self._tree(hub_id, warehouse)
+        with pytest.raises(services.ZoneSetupError):
+            services.move_zone(hub_id, zones['A'], zones['A-1-1'])
+
+    def test_delete_removes_subtree(self, hub_id, warehouse):
+        """Test deleting an aisle soft-deletes its racks and bins."""
+        from warehouse.models import Zone
+        zones = self._tree(hub_id, warehouse)
+        assert services.delete_zones(hub_id, [zones['A'].path]) == 7
+        assert set(Zone.objects.filter(hub_id=hub_id).values_list('code', flat=True)) == {'B', 'B-1', 'B-2', 'B-1-1', 'B-1-2', 'B-2-1', 'B-2-2'}
+
+
+@pytest.mark.django_db
+class TestZoneDirectory:
+    """Cached zone directory tests."""
+
+    def test_directory_cached_until_zone_write(self, hub_id, zone, django_assert_num_queries, django_capture_on_commit_callbacks):
+        """Test the directory is read once and rebuilt after a zone write commits."""
+        assert [z['code'] for z in services.zone_directory(hub_id)] == ['Z-001']
+        with django_assert_num_queries(0):
+            services.zone_directory(hub_id)
+            services.hub_zone_lookup(hub_id)
+        zone.name = 'Renamed'
+        zone.save()
+        with django_capture_on_commit_callbacks(execute=True):
+            services.mark_hub_changed(hub_id)
+        assert services.zone_directory(hub_id)[0]['name'] == 'Test Zone'
+        with django_capture_on_commit_callbacks(execute=True):
+            services.mark_hub_changed(hub_id, zones=True)
+        assert services.zone_directory(hub_id)[0]['name'] == 'Renamed'
+
+    def test_directory_skips_deleted(self, hub_id, warehouse, zone, other_zone):
+        """Test deleted zones and zones of deleted warehouses are left out."""
+        from warehouse.models import Warehouse, Zone
+        other_zone.is_deleted = True
+        other_zone.save()
+        gone = Warehouse.objects.create(hub_id=hub_id, name='Gone', code='G', is_deleted=True)
+        Zone.objects.create(hub_id=hub_id, warehouse=gone, name='Old', code='OLD')
+        assert [z['id'] for z in services.compute_zone_directory(hub_id)] == [zone.pk]
+        assert services.zone_entry(hub_id, zone.pk)['warehouse_name'] == warehouse.name
+        assert services.zone_entry(hub_id, other_zone.pk) is None
+        assert services.zone_entry(hub_id, 'not-a-uuid') is None
+
+    def test_directory_cached_in_chunks(self, hub_id, warehouse, zone, other_zone, monkeypatch, django_assert_num_queries):
+        """Test large directories are cached across several items and rebuilt when one is evicted."""
+        from django.core.cache import cache
+        monkeypatch.setattr(services, 'ZONE_DIRECTORY_CHUNK', 1)
+        directory = services.zone_directory(hub_id)
+        key = services._zone_directory_key(hub_id, services._hub_version(hub_id, 'zones'))
+        assert cache.get(key) == 2
+        with django_assert_num_queries(0):
+            assert services.zone_directory(hub_id) == directory
+        cache.delete(f'{key}:1')
+        assert services.zone_directory(hub_id) == directory
+        index = services.zone_index(hub_id)
+        with django_assert_num_queries(0):
+            assert services.zone_entry(hub_id, str(zone.pk), index)['code'] == zone.code
+
+    def test_search_zones(self, hub_id, warehouse):
+        """Test code prefixes rank first, then code or name substrings."""
+        from warehouse.models import Zone
+        for code, name in (('A-01', 'Aisle A'), ('B-01', 'Bulk'), ('X-9', 'Overflow a-01')):
+            Zone.objects.create(hub_id=hub_id, warehouse=warehouse, name=name, code=code)
+        assert [z['code'] for z in services.search_zones(hub_id, 'a-01')] == ['A-01', 'X-9']
+        assert [z['code'] for z in services.search_zones(hub_id, 'bul')] == ['B-01']
+        assert len(services.search_zones(hub_id, '', limit=2)) == 2
+        assert services.search_zones(hub_id, 'a', warehouse_id=uuid.uuid4()) == []
+
+    def test_movement_form_choices(self, hub_id, zone):
+        """Test the movement form lists the hub's zones from the directory and rejects others."""
+        from warehouse.forms import StockMovementForm
+        from warehouse.models import Warehouse, Zone
+        foreign = Zone.objects.create(
+            hub_id=uuid.uuid4(), warehouse=Warehouse.objects.create(hub_id=uuid.uuid4(), name='Other'), name='Foreign',
+        )
+        form = StockMovementForm(hub_id=hub_id)
+        assert [value for value, _label in form.fields['dest_zone'].choices][1:] == [zone.pk]
+        form = StockMovementForm({'reference': 'R', 'movement_type': 'inbound', 'quantity': '1', 'status': 'pending', 'dest_zone': foreign.pk}, hub_id=hub_id)
+        assert 'dest_zone' in form.errors
+
+
+@pytest.mark.django_db
+class TestMovementArchive:
+    """Movement archive tests."""
+
+    def _movement(self, hub_id, reference, days_ago, status='done', **fields):
+        movement = StockMovement.objects.create(
+            hub_id=hub_id, reference=reference, movement_type='inbound', status=status, quantity=Decimal('5'), **fields,
+        )
+        created_at = timezone.now() - datetime.timedelta(days=days_ago)
+        StockMovement.objects.filter(pk=movement.pk).update(created_at=created_at)
+        return movement, created_at
+
+    def test_cutoff_is_month_start(self):
+        """Test the cutoff is the first day of the oldest hot month."""
+        now = timezone.make_aware(datetime.datetime(2024, 3, 15, 10))
+        assert services.archive_cutoff(months=12, now=now).date() == datetime.date(2023, 3, 1)
+        assert services.archive_cutoff(months=2, now=now).date() == datetime.date(2024, 1, 1)
+
+    def test_archive_moves_closed_old_movements(self, hub_id, zone):
+        """Test closed movements before the cutoff move with their lines; open and recent ones stay."""
+        from warehouse.models import StockMovementArchive, StockMovementLineArchive
+        old, created_at = self._movement(hub_id, 'OLD', 400, dest_zone=zone)
+        StockMovementLine.objects.create(hub_id=hub_id, movement=old, product_ref='SKU-1', quantity=Decimal('5'))
+        self._movement(hub_id, 'OPEN', 400, status='pending', dest_zone=zone)
+        self._movement(hub_id, 'RECENT', 1, dest_zone=zone)
+        services.rebuild_zone_balances(hub_id)
+        assert services.archive_movements(hub_id, cutoff=services.archive_cutoff(months=12)) == 1
+        assert sorted(StockMovement.objects.values_list('reference', flat=True)) == ['OPEN', 'RECENT']
+        archived = StockMovementArchive.objects.get(pk=old.pk)
+        assert archived.created_at == created_at
+        assert StockMovementLineArchive.objects.get(movement=archived).product_ref == 'SKU-1'
+        assert not StockMovementLine.objects.filter(movement_id=old.pk).exists()
+        assert services.zone_on_hand(hub_id, zone.pk) == Decimal('15')
+        services.rebuild_zone_balances(hub_id)
+        services.rebuild_product_balances(hub_id)
+        assert services.zone_on_hand(hub_id, zone.pk) == Decimal('15')
+        assert services.product_on_hand(hub_id, 'SKU-1', zone.pk) == Decimal('5')
+
+    def test_archive_purges_soft_deleted(self, hub_id):
+        """Test soft-deleted movements leave the hot table once past the purge window."""
+        from warehouse.models import StockMovementArchive
+        gone, _created_at = self._movement(hub_id, 'GONE', 1, status='pending')
+        fresh, _created_at = self._movement(hub_id, 'FRESH', 1, status='pending')
+        StockMovement.all_objects.filter(pk=gone.pk).update(is_deleted=True, deleted_at=timezone.now() - datetime.timedelta(days=40))
+        StockMovement.all_objects.filter(pk=fresh.pk).update(is_deleted=True, deleted_at=timezone.now())
+        purge_before = timezone.now() - datetime.timedelta(days=30)
+        assert services.archive_movements(hub_id, purge_before=purge_before) == 1
+        assert StockMovementArchive.all_objects.filter(pk=gone.pk, is_deleted=True).exists()
+        assert StockMovement.all_objects.filter(pk=fresh.pk).exists()
+
+    def test_reaches_archive(self, hub_id):
+        """Test only a date range that starts before the newest archived row reads the archive."""
+        _movement, created_at = self._movement(hub_id, 'OLD', 400)
+        services.archive_movements(hub_id, cutoff=services.archive_cutoff(months=12))
+        assert not services.reaches_archive(hub_id)
+        assert services.reaches_archive(hub_id, date_from=created_at - datetime.timedelta(days=1))
+        assert not services.reaches_archive(hub_id, date_from=created_at + datetime.timedelta(days=1))
+        assert services.reaches_archive(hub_id, date_to=timezone.now())
+
+
+@pytest.mark.django_db
+class TestMovementFacets:
+    """Facet count tests."""
+
+    def test_facets_exclude_own_selection(self):
+        """Test each facet is counted with the other selections but not its own."""
+        rows = [
+            ('inbound', 'done', '', 'w1', 3),
+            ('outbound', 'pending', 'w1', '', 2),
+            ('transfer', 'pending', 'w1', 'w2', 1),
+        ]
+        facets = services.movement_facets(rows, status='pending')
+        assert facets['movement_type'] == {'outbound': 2, 'transfer': 1}
+        assert facets['status'] == {'done': 3, 'pending': 3}
+        assert facets['warehouse'] == {'w1': 3, 'w2': 1}
+        facets = services.movement_facets(rows, warehouse_id='w2')
+        assert facets['movement_type'] == {'transfer': 1}
+
+    def test_rows_cached_until_hub_changes(self, hub_id, zone, django_assert_num_queries, django_capture_on_commit_callbacks):
+        """Test facet rows come from one grouped query, cached until the hub changes."""
+        StockMovement.objects.create(hub_id=hub_id, reference='A', movement_type='inbound', dest_zone=zone, quantity=1)
+        movements = StockMovement.objects.filter(hub_id=hub_id)
+        with django_assert_num_queries(1):
+            rows = services.movement_facet_rows(hub_id, movements, ('',))
+        assert rows == [('inbound', 'pending', '', str(zone.warehouse_id), 1)]
+        with django_assert_num_queries(0):
+            services.movement_facet_rows(hub_id, movements, ('',))
+        StockMovement.objects.create(hub_id=hub_id, reference='B', movement_type='inbound', dest_zone=zone, quantity=1)
+        with django_capture_on_commit_callbacks(execute=True):
+            services.mark_hub_changed(hub_id)
+        assert services.movement_facet_rows(hub_id, movements, ('',))[0][-1] == 2
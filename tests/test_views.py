@@ -1,5 +1,7 @@
 """Tests for warehouse views."""
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 
@@ -19,6 +21,27 @@ class TestDashboard:
         response = auth_client.get(url, HTTP_HX_REQUEST='true')
         assert response.status_code == 200
 
+    def test_dashboard_is_cached_until_write(self, auth_client, zone, settings, django_capture_on_commit_callbacks):
+        """Test dashboard aggregates come from cache and are dropped on writes."""
+        from django.core.cache import cache
+        settings.WAREHOUSE_FRAGMENT_CACHE = False
+        cache.clear()
+        url = reverse('warehouse:dashboard')
+        auth_client.get(url, HTTP_HX_REQUEST='true')
+        with CaptureQueriesContext(connection) as warm:
+            response = auth_client.get(url, HTTP_HX_REQUEST='true')
+        assert not any('warehouse_stockmovement' in q['sql'] for q in warm.captured_queries)
+        assert response.context['total_stock_movements'] == 0
+
+        with django_capture_on_commit_callbacks(execute=True):
+            auth_client.post(reverse('warehouse:stock_movement_add'), {
+                'reference': 'IN', 'movement_type': 'inbound', 'quantity': '7', 'dest_zone': str(zone.pk),
+            })
+        response = auth_client.get(url, HTTP_HX_REQUEST='true')
+        assert response.context['total_stock_movements'] == 1
+        assert response.context['stats']['inbound_today'] == 7
+        assert response.context['stats']['warehouses'][0]['on_hand'] == 7
+
     def test_dashboard_requires_auth(self, client):
         """Test dashboard requires authentication."""
         url = reverse('warehouse:dashboard')
@@ -54,6 +77,15 @@ class TestWarehouseViews:
         response = auth_client.get(url, {'sort': 'created_at', 'dir': 'desc'})
         assert response.status_code == 200
 
+    def test_list_cursor_mode(self, auth_client, warehouse):
+        """Test opt-in keyset pagination."""
+        url = reverse('warehouse:warehouses_list')
+        response = auth_client.get(url, {'paginate': 'cursor', 'per_page': '0'},
+                                   HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+        assert response.status_code == 200
+        assert list(response.context['page_obj']) == [warehouse]
+        assert not response.context['page_obj'].has_next()
+
     def test_export_csv(self, auth_client):
         """Test CSV export."""
         url = reverse('warehouse:warehouses_list')
@@ -128,6 +160,28 @@ class TestWarehouseViews:
         warehouse.refresh_from_db()
         assert warehouse.is_deleted is True
 
+    def test_toggle_returns_only_the_row(self, auth_client, warehouse):
+        """Test a row action with ``rows`` answers with the row out of band, without paginating."""
+        import json
+        url = reverse('warehouse:warehouse_toggle_status', args=[warehouse.pk])
+        with CaptureQueriesContext(connection) as queries:
+            response = auth_client.post(url, {'rows': '12'}, HTTP_HX_REQUEST='true')
+        assert not any('COUNT(' in q['sql'].upper() for q in queries.captured_queries)
+        content = response.content.decode()
+        assert f'id="warehouse-row-{warehouse.pk}"' in content and 'hx-swap-oob="true"' in content
+        assert response['HX-Reswap'] == 'none'
+        assert json.loads(response['HX-Trigger']) == {'warehouses-changed': {'updated': 1, 'removed': 0}}
+
+    def test_bulk_delete_refreshes_emptied_page(self, auth_client, warehouse):
+        """Test deleting every row on screen asks the datatable to reload its page."""
+        import json
+        url = reverse('warehouse:warehouses_bulk_action')
+        response = auth_client.post(url, {'ids': str(warehouse.pk), 'action': 'delete', 'rows': '1'})
+        assert 'hx-swap-oob="delete"' in response.content.decode()
+        assert json.loads(response['HX-Trigger'])['warehouses-refresh'] is True
+        warehouse.refresh_from_db()
+        assert warehouse.is_deleted is True
+
     def test_list_requires_auth(self, client):
         """Test list requires authentication."""
         url = reverse('warehouse:warehouses_list')
@@ -157,12 +211,99 @@ class TestStockMovementViews:
         response = auth_client.get(url, {'q': 'test'})
         assert response.status_code == 200
 
+    def test_list_search_matches(self, auth_client, hub_id):
+        """Test search matches reference prefixes and notes words."""
+        from warehouse.models import StockMovement
+        StockMovement.objects.create(hub_id=hub_id, reference='PO-1001', movement_type='inbound', quantity=1)
+        StockMovement.objects.create(hub_id=hub_id, reference='SO-2002', movement_type='outbound', quantity=1,
+                                     notes='damaged pallet returned')
+        StockMovement.objects.create(hub_id=hub_id, reference='ADJ-3', movement_type='adjustment', quantity=1)
+        url = reverse('warehouse:stock_movements_list')
+        # The search box sends the whole datatable form, with the page's hidden inputs.
+        page = auth_client.get(url).content.decode()
+        assert '<input type="hidden" name="sort" value="">' in page
+        form = {'sort': '', 'dir': 'asc', 'view': 'table', 'paginate': '', 'estimate': '', 'per_page': '12',
+                'type': '', 'status': '', 'warehouse': '', 'from': '', 'to': ''}
+        for query, expected in (('PO-10', ['PO-1001']), ('pallet', ['SO-2002']), ('outbound', ['SO-2002'])):
+            response = auth_client.get(url, {**form, 'q': query}, HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+            assert [m.reference for m in response.context['stock_movements']] == expected
+            assert response.context['sort_field'] == 'relevance'
+        response = auth_client.get(url, {**form, 'q': 'PO-10', 'sort': 'created_at'}, HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+        assert response.context['sort_field'] == 'created_at'
+
+    def test_list_search_next_page(self, auth_client, hub_id):
+        """Test a cursor keeps its own sort while searching, instead of falling back to relevance."""
+        from warehouse.models import StockMovement
+        StockMovement.objects.bulk_create([
+            StockMovement(hub_id=hub_id, reference=f'PO-10{i:02d}', movement_type='inbound', quantity=1) for i in range(13)
+        ])
+        url = reverse('warehouse:stock_movements_list')
+        form = {'q': 'PO-10', 'sort': '', 'dir': 'asc', 'view': 'table', 'paginate': 'cursor', 'estimate': '', 'per_page': '12'}
+        rows = {'HTTP_HX_REQUEST': 'true', 'HTTP_HX_TARGET': 'datatable-body'}
+        response = auth_client.get(url, {**form, 'sort': 'reference'}, **rows)
+        page = response.context['page_obj']
+        assert page.is_keyset and len(page) == 12
+        response = auth_client.get(url, {**form, 'cursor': page.next_cursor}, **rows)
+        assert response.context['sort_field'] == 'reference'
+        assert response.context['page_obj'].is_keyset
+        assert [m.reference for m in response.context['stock_movements']] == ['PO-1012']
+
     def test_list_sort(self, auth_client):
         """Test list sorting."""
         url = reverse('warehouse:stock_movements_list')
         response = auth_client.get(url, {'sort': 'created_at', 'dir': 'desc'})
         assert response.status_code == 200
 
+    def test_list_date_range_reaches_archive(self, auth_client, hub_id):
+        """Test a date range that reaches archived months lists hot and archived rows together."""
+        import datetime
+        from django.utils import timezone
+        from warehouse import services
+        from warehouse.models import StockMovement
+        old = StockMovement.objects.create(hub_id=hub_id, reference='OLD', movement_type='inbound', status='done', quantity=1)
+        StockMovement.objects.filter(pk=old.pk).update(created_at=timezone.now() - datetime.timedelta(days=400))
+        StockMovement.objects.create(hub_id=hub_id, reference='NEW', movement_type='inbound', quantity=1)
+        services.archive_movements(hub_id, cutoff=services.archive_cutoff(months=12))
+        url = reverse('warehouse:stock_movements_list')
+        response = auth_client.get(url, HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+        assert [m.reference for m in response.context['stock_movements']] == ['NEW']
+        since = (timezone.localdate() - datetime.timedelta(days=500)).isoformat()
+        response = auth_client.get(url, {'from': since, 'sort': 'reference'}, HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+        rows = list(response.context['stock_movements'])
+        assert [(m.reference, m.is_archived) for m in rows] == [('NEW', False), ('OLD', True)]
+        assert 'Archived' in response.content.decode()
+
+    def test_list_facet_filters(self, auth_client, hub_id, zone, other_zone):
+        """Test type, status, zone and date filters, with facet counts next to each option."""
+        from warehouse.models import StockMovement
+        StockMovement.objects.create(hub_id=hub_id, reference='IN', movement_type='inbound', dest_zone=zone, quantity=1)
+        StockMovement.objects.create(hub_id=hub_id, reference='OUT', movement_type='outbound', status='done',
+                                     source_zone=other_zone, quantity=1)
+        url = reverse('warehouse:stock_movements_list')
+        response = auth_client.get(url, {'type': 'outbound'}, HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+        assert [m.reference for m in response.context['stock_movements']] == ['OUT']
+        assert dict((v, c) for v, _l, c in response.context['facets']['movement_type'])['inbound'] == 1
+        assert dict((v, c) for v, _l, c in response.context['facets']['status']) == {
+            'pending': 0, 'in_progress': 0, 'done': 1, 'cancelled': 0,
+        }
+        assert 'hx-swap-oob' in response.content.decode()
+        response = auth_client.get(url, {'zone': str(zone.pk)}, HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+        assert [m.reference for m in response.context['stock_movements']] == ['IN']
+        response = auth_client.get(url, {'warehouse': str(zone.warehouse_id), 'to': '2000-01-01', 'status': 'bogus'})
+        assert response.context['selected_status'] == ''
+        assert list(response.context['stock_movements']) == []
+
+    def test_list_cursor_mode(self, auth_client, stock_movement):
+        """Test opt-in keyset pagination."""
+        url = reverse('warehouse:stock_movements_list')
+        response = auth_client.get(url, {'paginate': 'cursor', 'sort': 'created_at', 'estimate': '1'},
+                                   HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+        assert response.status_code == 200
+        assert response.context['page_obj'].is_keyset
+        assert list(response.context['page_obj']) == [stock_movement]
+        response = auth_client.get(url, {'paginate': 'cursor', 'estimate': '1'})
+        assert '<input type="hidden" name="estimate" value="1">' in response.content.decode()
+
     def test_export_csv(self, auth_client):
         """Test CSV export."""
         url = reverse('warehouse:stock_movements_list')
@@ -176,6 +317,44 @@ class TestStockMovementViews:
         response = auth_client.get(url, {'export': 'excel'})
         assert response.status_code == 200
 
+    def test_export_csv_streams_zone_names(self, auth_client, hub_id, zone, other_zone):
+        """Test CSV export streams rows with zone names joined in one query."""
+        from decimal import Decimal
+        from warehouse.models import StockMovement
+        for i in range(3):
+            StockMovement.objects.create(hub_id=hub_id, reference=f'TR-{i}', movement_type='transfer',
+                                         source_zone=zone, dest_zone=other_zone, quantity=Decimal('1'))
+        url = reverse('warehouse:stock_movements_list')
+        response = auth_client.get(url, {'export': 'csv'})
+        assert response.streaming
+        with CaptureQueriesContext(connection) as ctx:
+            body = b''.join(response.streaming_content).decode()
+        assert len(ctx.captured_queries) <= 1
+        lines = body.strip().splitlines()
+        assert lines[0].startswith('Reference,Movement Type,Source Zone,Destination Zone')
+        assert lines[1].split(',')[2:4] == ['Test Zone', 'Other Zone']
+
+    @pytest.mark.parametrize('params', [{}, {'sort': 'source_zone'}, {'q': 'TR'}])
+    def test_list_query_count_independent_of_page_size(self, auth_client, hub_id, zone, other_zone, params):
+        """Test zones are joined in the base query instead of loaded per row."""
+        from decimal import Decimal
+        from warehouse.models import StockMovement
+        StockMovement.objects.bulk_create([
+            StockMovement(hub_id=hub_id, reference=f'TR-{i:03d}', movement_type='transfer',
+                          source_zone=zone, dest_zone=other_zone, quantity=Decimal('1'))
+            for i in range(100)
+        ])
+        url = reverse('warehouse:stock_movements_list')
+        counts = []
+        for per_page in (12, 96):
+            with CaptureQueriesContext(connection) as ctx:
+                response = auth_client.get(url, {**params, 'per_page': per_page},
+                                           HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+            assert response.status_code == 200
+            assert b'Other Zone' in response.content
+            counts.append(len(ctx.captured_queries))
+        assert counts[0] == counts[1]
+
     def test_add_form_loads(self, auth_client):
         """Test add form loads."""
         url = reverse('warehouse:stock_movement_add')
@@ -199,6 +378,18 @@ class TestStockMovementViews:
         response = auth_client.get(url)
         assert response.status_code == 200
 
+    def test_form_zone_select_and_picker(self, auth_client, zone, stock_movement, monkeypatch):
+        """Test small hubs get a zone select and large ones the type-ahead picker."""
+        stock_movement.dest_zone = zone
+        stock_movement.save()
+        url = reverse('warehouse:stock_movement_edit', args=[stock_movement.pk])
+        content = auth_client.get(url).content.decode()
+        assert f'<option value="{zone.pk}" selected>' in content
+        monkeypatch.setattr('warehouse.views.ZONE_SELECT_MAX', 0)
+        content = auth_client.get(url).content.decode()
+        assert reverse('warehouse:zone_search') in content
+        assert f'name="dest_zone" value="{zone.pk}"' in content
+
     def test_edit_post(self, auth_client, stock_movement):
         """Test editing via POST."""
         url = reverse('warehouse:stock_movement_edit', args=[stock_movement.pk])
@@ -226,6 +417,20 @@ class TestStockMovementViews:
         stock_movement.refresh_from_db()
         assert stock_movement.is_deleted is True
 
+    def test_bulk_status_out_of_band(self, auth_client, hub_id):
+        """Test status actions update rows in place unless a status filter or sort needs a reload."""
+        import json
+        from warehouse.models import StockMovement
+        movement = StockMovement.objects.create(hub_id=hub_id, reference='MV', movement_type='inbound', quantity=1)
+        url = reverse('warehouse:stock_movements_bulk_action')
+        response = auth_client.post(url, {'ids': str(movement.pk), 'action': 'start', 'rows': '5'})
+        assert f'id="stock-movement-row-{movement.pk}"' in response.content.decode()
+        assert 'stock-movements-refresh' not in json.loads(response['HX-Trigger'])
+        response = auth_client.post(url, {'ids': str(movement.pk), 'action': 'done', 'rows': '5', 'status': 'in_progress'})
+        assert json.loads(response['HX-Trigger'])['stock-movements-refresh'] is True
+        movement.refresh_from_db()
+        assert movement.status == 'done'
+
     def test_list_requires_auth(self, client):
         """Test list requires authentication."""
         url = reverse('warehouse:stock_movements_list')
@@ -233,6 +438,202 @@ class TestStockMovementViews:
         assert response.status_code == 302
 
 
+@pytest.mark.django_db
+class TestZoneViews:
+    """Zone view tests."""
+
+    def test_list_loads(self, auth_client, zone):
+        """Test list view loads."""
+        response = auth_client.get(reverse('warehouse:zones'))
+        assert response.status_code == 200
+
+    def test_list_scoped_by_warehouse(self, auth_client, hub_id, zone):
+        """Test the list only shows zones of the selected warehouse."""
+        from warehouse.models import Warehouse, Zone
+        other = Warehouse.objects.create(hub_id=hub_id, name='Other', code='OTH')
+        Zone.objects.create(hub_id=hub_id, warehouse=other, name='Elsewhere', code='E-1')
+        response = auth_client.get(reverse('warehouse:zones'), {'warehouse': str(zone.warehouse_id)},
+                                   HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+        assert [z.code for z in response.context['zones']] == ['Z-001']
+        assert response.context['page_obj'].is_keyset
+
+    def test_list_under_location(self, auth_client, hub_id, warehouse):
+        """Test the list can show every location below one zone."""
+        from warehouse import services
+        from warehouse.models import Zone
+        services.generate_bins(hub_id, warehouse.pk, 'A-B', '1', '1-2')
+        aisle = Zone.objects.get(hub_id=hub_id, code='A')
+        response = auth_client.get(reverse('warehouse:zones'), {'under': str(aisle.pk)},
+                                   HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+        assert [z.code for z in response.context['zones']] == ['A-1', 'A-1-1', 'A-1-2']
+
+    def test_add_under_parent(self, auth_client, hub_id, warehouse, zone):
+        """Test a posted parent code nests the new zone."""
+        from warehouse.models import Zone
+        response = auth_client.post(reverse('warehouse:zone_add'), {
+            'warehouse': str(warehouse.pk), 'name': 'Bin', 'code': 'Z-001-1', 'zone_type': 'bin', 'parent': 'Z-001',
+        })
+        assert response.status_code == 204
+        child = Zone.objects.get(hub_id=hub_id, code='Z-001-1')
+        assert (child.parent_id, child.depth) == (zone.pk, 1)
+        response = auth_client.post(reverse('warehouse:zone_add'), {
+            'warehouse': str(warehouse.pk), 'name': 'Bin', 'parent': 'NOPE',
+        })
+        assert 'error' in response.context
+
+    def test_list_queries_do_not_scale(self, auth_client, hub_id, warehouse, django_assert_max_num_queries):
+        """Test warehouse names come from the joined query, not one query per row."""
+        from warehouse import services
+        services.generate_bins(hub_id, warehouse.pk, 'A-C', '1-4', '1-2')
+        with django_assert_max_num_queries(8):
+            response = auth_client.get(reverse('warehouse:zones'), {'per_page': 24},
+                                       HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+        assert len(response.context['zones']) == 24
+
+    def test_add_post(self, auth_client, hub_id, warehouse):
+        """Test creating a zone via POST."""
+        from warehouse.models import Zone
+        response = auth_client.post(reverse('warehouse:zone_add'), {
+            'warehouse': str(warehouse.pk), 'name': 'Dock 1', 'code': 'D-1', 'zone_type': 'receiving',
+        })
+        assert response.status_code == 204
+        assert Zone.objects.filter(hub_id=hub_id, code='D-1', zone_type='receiving').exists()
+
+    def test_edit_post(self, auth_client, zone):
+        """Test editing via POST."""
+        response = auth_client.post(reverse('warehouse:zone_edit', args=[zone.pk]), {
+            'warehouse': str(zone.warehouse_id), 'name': 'Renamed', 'code': 'Z-001',
+        })
+        assert response.status_code == 200
+        zone.refresh_from_db()
+        assert zone.name == 'Renamed'
+
+    def test_bulk_delete(self, auth_client, zone):
+        """Test bulk delete."""
+        response = auth_client.post(reverse('warehouse:zones_bulk_action'), {'ids': str(zone.pk), 'action': 'delete'})
+        assert response.status_code == 200
+        zone.refresh_from_db()
+        assert zone.is_deleted is True
+
+    def test_bulk_set_type(self, auth_client, zone):
+        """Test bulk set_type writes known zone types only."""
+        url = reverse('warehouse:zones_bulk_action')
+        auth_client.post(url, {'ids': str(zone.pk), 'action': 'set_type', 'zone_type': 'attic'})
+        zone.refresh_from_db()
+        assert zone.zone_type == 'storage'
+        auth_client.post(url, {'ids': str(zone.pk), 'action': 'set_type', 'zone_type': 'picking'})
+        zone.refresh_from_db()
+        assert zone.zone_type == 'picking'
+
+    def test_generate(self, auth_client, hub_id, warehouse):
+        """Test the bin generator view."""
+        from warehouse.models import Zone
+        response = auth_client.post(reverse('warehouse:zones_generate'), {
+            'warehouse': str(warehouse.pk), 'aisles': 'A-B', 'racks': '01-03', 'levels': '1,2',
+        })
+        assert response.status_code == 200
+        assert response.context['generated'] == 20
+        assert Zone.objects.get(hub_id=hub_id, code='B-03-2').parent.code == 'B-03'
+
+    def test_import_csv(self, auth_client, hub_id, warehouse, zone):
+        """Test the CSV import upserts by code."""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        upload = SimpleUploadedFile(
+            'zones.csv', b'code,name,zone_type\nZ-001,Renamed,storage\nNEW-1,New,picking\n,Missing,\n',
+            content_type='text/csv',
+        )
+        response = auth_client.post(reverse('warehouse:zones_import'), {'warehouse': str(warehouse.pk), 'file': upload})
+        imported = response.context['imported']
+        assert (imported['created'], imported['updated'], imported['error_count']) == (1, 1, 1)
+        zone.refresh_from_db()
+        assert zone.name == 'Renamed'
+
+    def test_list_requires_auth(self, client):
+        """Test list requires authentication."""
+        response = client.get(reverse('warehouse:zones'))
+        assert response.status_code == 302
+
+    def test_zone_search(self, auth_client, zone, other_zone):
+        """Test the type-ahead endpoint returns matching zones."""
+        response = auth_client.get(reverse('warehouse:zone_search'), {'q': 'z-002'})
+        assert response.status_code == 200
+        content = response.content.decode()
+        assert 'Other Zone' in content and 'Test Zone' not in content
+
+
+@pytest.mark.django_db
+class TestListQueryPlans:
+    """Composite index usage of the list views (PostgreSQL only)."""
+
+    @pytest.fixture(autouse=True)
+    def _postgres_only(self):
+        if connection.vendor != 'postgresql':
+            pytest.skip('Query plans are only asserted on PostgreSQL')
+
+    def _explain_list_query(self, auth_client, url, params, table):
+        with CaptureQueriesContext(connection) as ctx:
+            auth_client.get(url, params, HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+        sql = next(
+            q['sql'] for q in ctx.captured_queries
+            if q['sql'].startswith('SELECT') and f'FROM "{table}"' in q['sql'] and 'ORDER BY' in q['sql']
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}')
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+    @pytest.mark.parametrize('sort', ['code', 'name', 'is_active', 'created_at'])
+    def test_warehouses_list_uses_sort_index(self, auth_client, warehouse, sort):
+        """Test warehouses_list walks the (hub_id, <sort>) partial index."""
+        plan = self._explain_list_query(
+            auth_client, reverse('warehouse:warehouses_list'), {'sort': sort}, 'warehouse_warehouse',
+        )
+        assert f'wh_warehouse_{sort}_idx' in plan
+        assert 'Sort Key' not in plan
+
+    @pytest.mark.parametrize('sort', ['reference', 'movement_type', 'status', 'quantity', 'created_at'])
+    def test_stock_movements_list_uses_sort_index(self, auth_client, stock_movement, sort):
+        """Test stock_movements_list walks the (hub_id, <sort>) partial index."""
+        plan = self._explain_list_query(
+            auth_client, reverse('warehouse:stock_movements_list'), {'sort': sort, 'dir': 'desc'},
+            'warehouse_stockmovement',
+        )
+        assert f'wh_movement_{sort}_idx' in plan
+        assert 'Sort Key' not in plan
+
+    def test_stock_movements_search_uses_gin_index(self, auth_client, stock_movement):
+        """Test free-text search is served by the tsvector GIN and reference prefix indexes."""
+        plan = self._explain_list_query(
+            auth_client, reverse('warehouse:stock_movements_list'), {'q': 'test'}, 'warehouse_stockmovement',
+        )
+        assert 'wh_movement_search_idx' in plan
+        assert 'wh_movement_ref_prefix_idx' in plan
+
+
+@pytest.mark.django_db
+class TestReports:
+    """Throughput report view tests."""
+
+    def test_reports_loads(self, auth_client):
+        """Test report page loads."""
+        response = auth_client.get(reverse('warehouse:reports'))
+        assert response.status_code == 200
+
+    def test_reports_reads_only_rollups(self, auth_client, warehouse):
+        """Test the report never scans raw movements."""
+        url = reverse('warehouse:reports')
+        with CaptureQueriesContext(connection) as ctx:
+            response = auth_client.get(url, {'range': '365', 'period': 'hour', 'warehouse': str(warehouse.pk)},
+                                       HTTP_HX_REQUEST='true')
+        assert response.status_code == 200
+        assert not any('warehouse_stockmovement' in q['sql'] for q in ctx.captured_queries)
+
+    def test_reports_requires_auth(self, client):
+        """Test report requires authentication."""
+        response = client.get(reverse('warehouse:reports'))
+        assert response.status_code == 302
+
+
 @pytest.mark.django_db
 class TestSettings:
     """Settings view tests."""
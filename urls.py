@@ -1,31 +1,57 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'warehouse'
 
+# ASGI deployments can serve the read-heavy views from async_views.
+reads = async_views if getattr(settings, 'WAREHOUSE_ASYNC_VIEWS', False) else views
+
 urlpatterns = [
     # Dashboard
-    path('', views.dashboard, name='dashboard'),
+    path('', reads.dashboard, name='dashboard'),
 
     # Navigation tab aliases
-    path('zones/', views.dashboard, name='zones'),
-    path('movements/', views.dashboard, name='movements'),
+    path('movements/', reads.dashboard, name='movements'),
 
 
     # Warehouse
-    path('warehouses/', views.warehouses_list, name='warehouses_list'),
+    path('warehouses/', reads.warehouses_list, name='warehouses_list'),
     path('warehouses/add/', views.warehouse_add, name='warehouse_add'),
     path('warehouses/<uuid:pk>/edit/', views.warehouse_edit, name='warehouse_edit'),
     path('warehouses/<uuid:pk>/delete/', views.warehouse_delete, name='warehouse_delete'),
     path('warehouses/<uuid:pk>/toggle/', views.warehouse_toggle_status, name='warehouse_toggle_status'),
     path('warehouses/bulk/', views.warehouses_bulk_action, name='warehouses_bulk_action'),
 
+    # Zone
+    path('zones/', views.zones_list, name='zones'),
+    path('zones/add/', views.zone_add, name='zone_add'),
+    path('zones/<uuid:pk>/edit/', views.zone_edit, name='zone_edit'),
+    path('zones/<uuid:pk>/delete/', views.zone_delete, name='zone_delete'),
+    path('zones/bulk/', views.zones_bulk_action, name='zones_bulk_action'),
+    path('zones/generate/', views.zones_generate, name='zones_generate'),
+    path('zones/import/', views.zones_import, name='zones_import'),
+    path('zones/search/', reads.zone_search, name='zone_search'),
+
     # StockMovement
-    path('stock_movements/', views.stock_movements_list, name='stock_movements_list'),
+    path('stock_movements/', reads.stock_movements_list, name='stock_movements_list'),
     path('stock_movements/add/', views.stock_movement_add, name='stock_movement_add'),
     path('stock_movements/<uuid:pk>/edit/', views.stock_movement_edit, name='stock_movement_edit'),
     path('stock_movements/<uuid:pk>/delete/', views.stock_movement_delete, name='stock_movement_delete'),
     path('stock_movements/bulk/', views.stock_movements_bulk_action, name='stock_movements_bulk_action'),
+    path('stock_movements/ingest/', views.stock_movements_ingest, name='stock_movements_ingest'),
+    path('stock_movements/import/', views.stock_movements_import, name='stock_movements_import'),
+    path('stock_movements/import/<uuid:pk>/', views.import_job_status, name='import_job_status'),
+    path('stock_movements/import/<uuid:pk>/rejected/', views.import_job_rejected, name='import_job_rejected'),
+
+    # Export jobs
+    path('exports/', views.export_jobs_list, name='export_jobs'),
+    path('exports/create/', views.export_job_create, name='export_job_create'),
+    path('exports/<uuid:pk>/', views.export_job_status, name='export_job_status'),
+    path('exports/<uuid:pk>/download/', views.export_job_download, name='export_job_download'),
+
+    # Reports
+    path('reports/', views.reports, name='reports'),
 
     # Settings
     path('settings/', views.settings_view, name='settings'),
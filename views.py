@@ -1,54 +1,129 @@
 """
 Warehouse Management Module Views
 """
+import csv
+import datetime
+import io
+import json
+import uuid
+
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
-from django.db.models import Q, Count
-from django.http import HttpResponse
+from django.db import transaction
+from django.db.models import BooleanField, Count, Q, Value
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.urls import reverse
 from django.shortcuts import get_object_or_404, render as django_render
+from django.template.loader import render_to_string
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.views.decorators.http import require_POST
 
 from apps.accounts.decorators import login_required, permission_required
 from apps.core.htmx import htmx_view
-from apps.core.services import export_to_csv, export_to_excel
 from apps.modules_runtime.navigation import with_module_nav
 
-from .models import Warehouse, Zone, StockMovement
+from . import export_jobs, import_jobs, queries, services
+from .exports import STOCK_MOVEMENT_EXPORT_COLUMNS, WAREHOUSE_EXPORT_COLUMNS, stream_export
+from .instrumentation import instrumented, record_rows, set_branch
+from .page_cache import hub_cached
+from .pagination import cursor_ordering, keyset_paginate
+from .search import search_archived_movements, search_stock_movements
+from .models import ExportJob, ImportJob, Warehouse, Zone, StockMovement, StockMovementArchive, MOVEMENT_STATUS, MOVEMENT_TYPE, STATUS_TRANSITIONS, ZONE_TYPE
 
 PER_PAGE_CHOICES = [12, 24, 48, 96, 0]
 
+# Sort keys usable in cursor mode: keyset seeks need a non-nullable column.
+WAREHOUSE_KEYSET_FIELDS = ('code', 'name', 'is_active', 'address', 'created_at')
+STOCK_MOVEMENT_KEYSET_FIELDS = ('reference', 'movement_type', 'status', 'quantity', 'created_at')
+STOCK_MOVEMENT_STATUS_ACTIONS = {'start': 'in_progress', 'done': 'done', 'cancel': 'cancelled'}
+
 
 # ======================================================================
 # Dashboard
 # ======================================================================
 
 @login_required
+@instrumented('dashboard')
+@hub_cached('dashboard')
 @with_module_nav('warehouse', 'dashboard')
 @htmx_view('warehouse/pages/index.html', 'warehouse/partials/dashboard_content.html')
 def dashboard(request):
     hub_id = request.session.get('hub_id')
+    stats = services.dashboard_stats(hub_id)
     return {
-        'total_warehouses': Warehouse.objects.filter(hub_id=hub_id, is_deleted=False).count(),
-        'total_stock_movements': StockMovement.objects.filter(hub_id=hub_id, is_deleted=False).count(),
+        'total_warehouses': stats['total_warehouses'],
+        'total_stock_movements': stats['total_stock_movements'],
+        'stats': stats,
     }
 
 
+# ======================================================================
+# List state
+# ======================================================================
+
+def _list_params(request, default_sort):
+    """
+    Datatable state from GET: ``(search_query, sort_field, sort_dir, cursor,
+    page_number, current_view, per_page)``. A cursor carries its own sort.
+    """
+    sort_field = request.GET.get('sort', default_sort)
+    sort_dir = request.GET.get('dir', 'asc')
+    cursor = request.GET.get('cursor')
+    cursor_sort = cursor_ordering(cursor) if cursor else None
+    if cursor_sort:
+        sort_field, sort_dir = cursor_sort
+    per_page = int(request.GET.get('per_page', 12))
+    if per_page not in PER_PAGE_CHOICES:
+        per_page = 12
+    return (
+        request.GET.get('q', '').strip(), sort_field, sort_dir, cursor,
+        request.GET.get('page', 1), request.GET.get('view', 'table'), per_page,
+    )
+
+
+# ======================================================================
+# Row updates
+# ======================================================================
+
+def _rows_on_screen(request):
+    """Rows the datatable shows (the ``rows`` value its row actions send), or None."""
+    try:
+        return int(request.POST['rows'])
+    except (KeyError, ValueError):
+        return None
+
+def _oob_rows_response(request, row_template, row_prefix, event, updated=(), removed=(), refresh=False):
+    """
+    Answer a row action with the changed rows only.
+
+    Updated rows replace theirs and removed rows are deleted, out of band; the
+    datatable itself is not swapped. ``HX-Trigger`` carries ``event`` and, when
+    the list must be reloaded (``refresh``, or every row on screen was removed),
+    ``<event>-refresh``, which the datatable answers by reloading its current page.
+    """
+    rows = _rows_on_screen(request)
+    refresh = refresh or (bool(removed) and rows is not None and len(removed) >= rows)
+    response = HttpResponse(render_to_string('warehouse/partials/oob_rows.html', {
+        'rows': updated, 'removed': [str(pk) for pk in removed],
+        'row_template': row_template, 'row_prefix': row_prefix,
+    }, request=request))
+    triggers = {f'{event}-changed': {'updated': len(updated), 'removed': len(removed)}}
+    if refresh:
+        triggers[f'{event}-refresh'] = True
+    response['HX-Trigger'] = json.dumps(triggers)
+    response['HX-Reswap'] = 'none'
+    return response
+
+
 # ======================================================================
 # Warehouse
 # ======================================================================
 
-WAREHOUSE_SORT_FIELDS = {
-    'code': 'code',
-    'name': 'name',
-    'is_active': 'is_active',
-    'address': 'address',
-    'created_at': 'created_at',
-}
+WAREHOUSE_ROW_TEMPLATE = 'warehouse/partials/warehouse_row.html'
 
 def _build_warehouses_context(hub_id, per_page=10):
-    qs = Warehouse.objects.filter(hub_id=hub_id, is_deleted=False).order_by('code')
+    qs = Warehouse.objects.filter(hub_id=hub_id, is_deleted=False).order_by('code', 'id')
     paginator = Paginator(qs, per_page if per_page > 0 else max(qs.count(), 1))
     page_obj = paginator.get_page(1)
     return {
@@ -66,51 +141,47 @@ def _render_warehouses_list(request, hub_id, per_page=10):
     return django_render(request, 'warehouse/partials/warehouses_list.html', ctx)
 
 @login_required
+@instrumented('warehouses_list')
+@hub_cached('warehouses_list')
 @with_module_nav('warehouse', 'warehouses')
 @htmx_view('warehouse/pages/warehouses.html', 'warehouse/partials/warehouses_content.html')
 def warehouses_list(request):
     hub_id = request.session.get('hub_id')
-    search_query = request.GET.get('q', '').strip()
-    sort_field = request.GET.get('sort', 'code')
-    sort_dir = request.GET.get('dir', 'asc')
-    page_number = request.GET.get('page', 1)
-    current_view = request.GET.get('view', 'table')
-    per_page = int(request.GET.get('per_page', 12))
-    if per_page not in PER_PAGE_CHOICES:
-        per_page = 12
-
-    qs = Warehouse.objects.filter(hub_id=hub_id, is_deleted=False)
-
-    if search_query:
-        qs = qs.filter(Q(name__icontains=search_query) | Q(code__icontains=search_query) | Q(address__icontains=search_query))
+    search_query, sort_field, sort_dir, cursor, page_number, current_view, per_page = _list_params(request, 'code')
 
-    order_by = WAREHOUSE_SORT_FIELDS.get(sort_field, 'code')
-    if sort_dir == 'desc':
-        order_by = f'-{order_by}'
-    qs = qs.order_by(order_by)
+    qs = queries.warehouses_queryset(hub_id, search_query, sort_field, sort_dir)
 
     export_format = request.GET.get('export')
     if export_format in ('csv', 'excel'):
-        fields = ['code', 'name', 'is_active', 'address']
-        headers = ['Code', 'Name', 'Is Active', 'Address']
-        if export_format == 'csv':
-            return export_to_csv(qs, fields=fields, headers=headers, filename='warehouses.csv')
-        return export_to_excel(qs, fields=fields, headers=headers, filename='warehouses.xlsx')
-
-    paginator = Paginator(qs, per_page if per_page > 0 else max(qs.count(), 1))
-    page_obj = paginator.get_page(page_number)
-
+        set_branch(f'export_{export_format}')
+        return stream_export(qs, WAREHOUSE_EXPORT_COLUMNS, export_format, 'warehouses')
+
+    paginate_mode = request.GET.get('paginate', '')
+    if paginate_mode == 'cursor' and sort_field in WAREHOUSE_KEYSET_FIELDS:
+        page_obj = keyset_paginate(
+            qs, queries.WAREHOUSE_SORT_FIELDS[sort_field], sort_dir == 'desc',
+            cursor=cursor, per_page=per_page,
+            estimate=request.GET.get('estimate') == '1',
+        )
+    else:
+        paginator = Paginator(qs, per_page if per_page > 0 else max(qs.count(), 1))
+        page_obj = paginator.get_page(page_number)
+
+    record_rows(len(page_obj))
     if request.htmx and request.htmx.target == 'datatable-body':
+        set_branch('rows')
         return django_render(request, 'warehouse/partials/warehouses_list.html', {
             'warehouses': page_obj, 'page_obj': page_obj,
             'search_query': search_query, 'sort_field': sort_field,
             'sort_dir': sort_dir, 'current_view': current_view, 'per_page': per_page,
+            'paginate_mode': paginate_mode, 'estimate': request.GET.get('estimate', ''),
         })
 
     return {
         'warehouses': page_obj, 'page_obj': page_obj,
         'search_query': search_query, 'sort_field': sort_field,
         'sort_dir': sort_dir, 'current_view': current_view, 'per_page': per_page,
+        'paginate_mode': paginate_mode, 'estimate': request.GET.get('estimate', ''),
     }
 
 @login_required
@@ -128,6 +199,7 @@ def warehouse_add(request):
         obj.address = address
         obj.is_active = is_active
         obj.save()
+        services.mark_hub_changed(hub_id)
         response = HttpResponse(status=204)
         response['HX-Redirect'] = reverse('warehouse:warehouses_list')
         return response
@@ -144,6 +216,7 @@ def warehouse_edit(request, pk):
         obj.address = request.POST.get('address', '').strip()
         obj.is_active = request.POST.get('is_active') == 'on'
         obj.save()
+        services.mark_hub_changed(hub_id, zones=True)
         return _render_warehouses_list(request, hub_id)
     return {'obj': obj}
 
@@ -155,6 +228,9 @@ def warehouse_delete(request, pk):
     obj.is_deleted = True
     obj.deleted_at = timezone.now()
     obj.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
+    services.mark_hub_changed(hub_id, zones=True)
+    if _rows_on_screen(request) is not None:
+        return _oob_rows_response(request, WAREHOUSE_ROW_TEMPLATE, 'warehouse-row', 'warehouses', removed=[obj.pk])
     return _render_warehouses_list(request, hub_id)
 
 @login_required
@@ -164,9 +240,13 @@ def warehouse_toggle_status(request, pk):
     obj = get_object_or_404(Warehouse, pk=pk, hub_id=hub_id, is_deleted=False)
     obj.is_active = not obj.is_active
     obj.save(update_fields=['is_active', 'updated_at'])
+    services.mark_hub_changed(hub_id)
+    if _rows_on_screen(request) is not None:
+        return _oob_rows_response(request, WAREHOUSE_ROW_TEMPLATE, 'warehouse-row', 'warehouses', updated=[obj])
     return _render_warehouses_list(request, hub_id)
 
 @login_required
+@instrumented('warehouses_bulk_action')
 @require_POST
 def warehouses_bulk_action(request):
     hub_id = request.session.get('hub_id')
@@ -179,25 +259,288 @@ def warehouses_bulk_action(request):
         qs.update(is_active=False)
     elif action == 'delete':
         qs.update(is_deleted=True, deleted_at=timezone.now())
+    services.mark_hub_changed(hub_id, zones=True)
+    if _rows_on_screen(request) is not None:
+        if action == 'delete':
+            return _oob_rows_response(request, WAREHOUSE_ROW_TEMPLATE, 'warehouse-row', 'warehouses', removed=ids)
+        return _oob_rows_response(request, WAREHOUSE_ROW_TEMPLATE, 'warehouse-row', 'warehouses', updated=list(qs))
     return _render_warehouses_list(request, hub_id)
 
 
 # ======================================================================
-# StockMovement
+# Zone
 # ======================================================================
 
-STOCK_MOVEMENT_SORT_FIELDS = {
-    'reference': 'reference',
-    'movement_type': 'movement_type',
-    'source_zone': 'source_zone',
-    'dest_zone': 'dest_zone',
-    'status': 'status',
-    'quantity': 'quantity',
+ZONE_SORT_FIELDS = {
+    'code': 'code',
+    'name': 'name',
+    'zone_type': 'zone_type',
+    'warehouse': 'warehouse__name',
     'created_at': 'created_at',
 }
 
+ZONE_KEYSET_FIELDS = ('code', 'name', 'zone_type', 'created_at')
+
+ZONE_LIST_FIELDS = ('id', 'code', 'name', 'zone_type', 'depth', 'created_at', 'warehouse__id', 'warehouse__name', 'parent__id', 'parent__code')
+
+def _zones_queryset(hub_id, warehouse_id=None, under=None):
+    qs = (
+        Zone.objects.filter(hub_id=hub_id, is_deleted=False, warehouse__is_deleted=False)
+        .select_related('warehouse', 'parent')
+        .only(*ZONE_LIST_FIELDS)
+    )
+    if warehouse_id:
+        qs = qs.filter(warehouse_id=warehouse_id)
+    if under is not None:
+        qs = qs.filter(path__startswith=under.path, depth__gt=under.depth)
+    return qs
+
+def _get_hub_warehouse_id(hub_id, value):
+    """Return ``value`` as a warehouse id if it names a live warehouse of the hub, else None."""
+    if not value:
+        return None
+    try:
+        return Warehouse.objects.filter(hub_id=hub_id, is_deleted=False, pk=value).values_list('pk', flat=True).first()
+    except (ValueError, ValidationError):
+        return None
+
+def _get_under_zone(hub_id, value):
+    """Resolve the ``under`` list filter (a zone id) to a live zone of the hub, or None."""
+    if not value:
+        return None
+    try:
+        return Zone.objects.filter(hub_id=hub_id, is_deleted=False, pk=value).only('id', 'code', 'name', 'path', 'depth').first()
+    except (ValueError, ValidationError):
+        return None
+
+def _get_parent_zone(hub_id, warehouse_id, code):
+    """Resolve a posted parent location code within a warehouse, or None."""
+    if not code or not warehouse_id:
+        return None
+    return (
+        Zone.objects.filter(hub_id=hub_id, warehouse_id=warehouse_id, is_deleted=False, code=code)
+        .only('id', 'warehouse_id', 'path', 'depth').order_by('created_at', 'id').first()
+    )
+
+def _render_zones_list(request, hub_id):
+    warehouse_id = _get_hub_warehouse_id(hub_id, request.POST.get('warehouse') or request.GET.get('warehouse'))
+    under = _get_under_zone(hub_id, request.POST.get('under') or request.GET.get('under'))
+    page_obj = keyset_paginate(_zones_queryset(hub_id, warehouse_id, under), 'code', per_page=12)
+    return django_render(request, 'warehouse/partials/zones_list.html', {
+        'zones': page_obj, 'page_obj': page_obj,
+        'search_query': '', 'sort_field': 'code', 'sort_dir': 'asc',
+        'per_page': 12, 'paginate_mode': 'cursor', 'warehouse_id': warehouse_id, 'under': under,
+    })
+
+@login_required
+@instrumented('zones_list')
+@with_module_nav('warehouse', 'zones')
+@htmx_view('warehouse/pages/zones.html', 'warehouse/partials/zones_content.html')
+def zones_list(request):
+    """Zone list, optionally scoped to one warehouse or one location's subtree; cursor-paginated by default."""
+    hub_id = request.session.get('hub_id')
+    search_query = request.GET.get('q', '').strip()
+    sort_field = request.GET.get('sort', 'code')
+    sort_dir = request.GET.get('dir', 'asc')
+    cursor = request.GET.get('cursor')
+    cursor_sort = cursor_ordering(cursor) if cursor else None
+    if cursor_sort:
+        sort_field, sort_dir = cursor_sort
+    page_number = request.GET.get('page', 1)
+    per_page = int(request.GET.get('per_page', 12))
+    if per_page not in PER_PAGE_CHOICES:
+        per_page = 12
+    warehouse_id = _get_hub_warehouse_id(hub_id, request.GET.get('warehouse'))
+    under = _get_under_zone(hub_id, request.GET.get('under'))
+
+    qs = _zones_queryset(hub_id, warehouse_id, under)
+
+    if search_query:
+        qs = qs.filter(Q(code__istartswith=search_query) | Q(name__icontains=search_query))
+
+    order_by = ZONE_SORT_FIELDS.get(sort_field, 'code')
+    if sort_dir == 'desc':
+        qs = qs.order_by(f'-{order_by}', '-id')
+    else:
+        qs = qs.order_by(order_by, 'id')
+
+    paginate_mode = request.GET.get('paginate') or 'cursor'
+    if paginate_mode == 'cursor' and sort_field in ZONE_KEYSET_FIELDS and per_page > 0:
+        page_obj = keyset_paginate(
+            qs, ZONE_SORT_FIELDS[sort_field], sort_dir == 'desc',
+            cursor=cursor, per_page=per_page,
+            estimate=request.GET.get('estimate') == '1',
+        )
+    else:
+        paginator = Paginator(qs, per_page if per_page > 0 else max(qs.count(), 1))
+        page_obj = paginator.get_page(page_number)
+
+    ctx = {
+        'zones': page_obj, 'page_obj': page_obj,
+        'search_query': search_query, 'sort_field': sort_field,
+        'sort_dir': sort_dir, 'per_page': per_page,
+        'paginate_mode': paginate_mode, 'estimate': request.GET.get('estimate', ''),
+        'warehouse_id': warehouse_id, 'under': under,
+    }
+    record_rows(len(page_obj))
+    if request.htmx and request.htmx.target == 'datatable-body':
+        set_branch('rows')
+        return django_render(request, 'warehouse/partials/zones_list.html', ctx)
+    ctx['warehouses'] = queries.hub_warehouses(hub_id)
+    return ctx
+
+def _zone_values(request, hub_id):
+    return {
+        'warehouse_id': _get_hub_warehouse_id(hub_id, request.POST.get('warehouse')),
+        'name': request.POST.get('name', '').strip(),
+        'code': request.POST.get('code', '').strip(),
+        'zone_type': request.POST.get('zone_type', '').strip() or 'storage',
+    }
+
+def _zone_form_context(hub_id, **extra):
+    return {'warehouses': queries.hub_warehouses(hub_id), 'zone_types': ZONE_TYPE, **extra}
+
+@login_required
+@htmx_view('warehouse/pages/zone_add.html', 'warehouse/partials/zone_add_content.html')
+def zone_add(request):
+    hub_id = request.session.get('hub_id')
+    if request.method == 'POST':
+        values = _zone_values(request, hub_id)
+        if not values['warehouse_id'] or not values['name']:
+            return _zone_form_context(hub_id, error=_('Warehouse and name are required.'))
+        if values['zone_type'] not in services.ZONE_TYPES:
+            return _zone_form_context(hub_id, error=_('Select a valid zone type.'))
+        parent_code = request.POST.get('parent', '').strip()
+        parent = _get_parent_zone(hub_id, values['warehouse_id'], parent_code)
+        if parent_code and parent is None:
+            return _zone_form_context(hub_id, error=_('Unknown parent location: %(code)s') % {'code': parent_code})
+        obj = Zone(hub_id=hub_id, **values)
+        try:
+            services.attach_zone(obj, parent)
+        except services.ZoneSetupError as exc:
+            return _zone_form_context(hub_id, error=str(exc))
+        obj.save()
+        services.mark_hub_changed(hub_id, zones=True)
+        response = HttpResponse(status=204)
+        response['HX-Redirect'] = reverse('warehouse:zones')
+        return response
+    return _zone_form_context(hub_id, warehouse_id=request.GET.get('warehouse', ''), parent_code=request.GET.get('parent', ''))
+
+@login_required
+@htmx_view('warehouse/pages/zone_edit.html', 'warehouse/partials/zone_edit_content.html')
+def zone_edit(request, pk):
+    hub_id = request.session.get('hub_id')
+    obj = get_object_or_404(Zone.objects.select_related('parent'), pk=pk, hub_id=hub_id, is_deleted=False)
+    if request.method == 'POST':
+        values = _zone_values(request, hub_id)
+        if not values['warehouse_id'] or not values['name']:
+            return _zone_form_context(hub_id, obj=obj, error=_('Warehouse and name are required.'))
+        if values['zone_type'] not in services.ZONE_TYPES:
+            return _zone_form_context(hub_id, obj=obj, error=_('Select a valid zone type.'))
+        parent_code = request.POST.get('parent', '').strip()
+        parent = _get_parent_zone(hub_id, values['warehouse_id'], parent_code)
+        if parent_code and parent is None:
+            return _zone_form_context(hub_id, obj=obj, error=_('Unknown parent location: %(code)s') % {'code': parent_code})
+        with transaction.atomic():
+            if parent != obj.parent or (parent is None and values['warehouse_id'] != obj.warehouse_id):
+                try:
+                    services.move_zone(hub_id, obj, parent, warehouse_id=values['warehouse_id'])
+                except services.ZoneSetupError as exc:
+                    return _zone_form_context(hub_id, obj=obj, error=str(exc))
+            values['warehouse_id'] = obj.warehouse_id
+            for field, value in values.items():
+                setattr(obj, field, value)
+            obj.save()
+        services.mark_hub_changed(hub_id, zones=True)
+        return _render_zones_list(request, hub_id)
+    return _zone_form_context(hub_id, obj=obj)
+
+@login_required
+@require_POST
+def zone_delete(request, pk):
+    """Soft-delete a location together with everything under it."""
+    hub_id = request.session.get('hub_id')
+    obj = get_object_or_404(Zone, pk=pk, hub_id=hub_id, is_deleted=False)
+    services.delete_zones(hub_id, [obj.path])
+    return _render_zones_list(request, hub_id)
+
+@login_required
+@instrumented('zones_bulk_action')
+@require_POST
+def zones_bulk_action(request):
+    hub_id = request.session.get('hub_id')
+    ids = [i.strip() for i in request.POST.get('ids', '').split(',') if i.strip()]
+    action = request.POST.get('action', '')
+    qs = Zone.objects.filter(hub_id=hub_id, is_deleted=False, id__in=ids)
+    if action == 'delete':
+        services.delete_zones(hub_id, list(qs.values_list('path', flat=True)))
+    elif action == 'set_type' and request.POST.get('zone_type', '').strip() in services.ZONE_TYPES:
+        qs.update(zone_type=request.POST['zone_type'].strip(), updated_at=timezone.now())
+        services.mark_hub_changed(hub_id, zones=True)
+    return _render_zones_list(request, hub_id)
+
+@login_required
+@htmx_view('warehouse/pages/zones_setup.html', 'warehouse/partials/zones_setup_content.html')
+def zones_generate(request):
+    """Bulk location tree generator (aisle → rack → bin) and the CSV import form."""
+    hub_id = request.session.get('hub_id')
+    ctx = _zone_form_context(hub_id, warehouse_id=request.GET.get('warehouse', ''))
+    if request.method == 'POST':
+        warehouse_id = _get_hub_warehouse_id(hub_id, request.POST.get('warehouse'))
+        if not warehouse_id:
+            return {**ctx, 'error': _('Select a warehouse.')}
+        parent_code = request.POST.get('parent', '').strip()
+        parent = _get_parent_zone(hub_id, warehouse_id, parent_code)
+        if parent_code and parent is None:
+            return {**ctx, 'warehouse_id': str(warehouse_id), 'error': _('Unknown parent location: %(code)s') % {'code': parent_code}}
+        try:
+            created = services.generate_bins(
+                hub_id, warehouse_id,
+                aisles=request.POST.get('aisles', ''), racks=request.POST.get('racks', ''),
+                levels=request.POST.get('levels', ''), prefix=request.POST.get('prefix', '').strip(),
+                separator=request.POST.get('separator', '-'),
+                zone_type=request.POST.get('zone_type', '').strip() or 'bin', parent=parent,
+            )
+        except services.ZoneSetupError as exc:
+            return {**ctx, 'warehouse_id': str(warehouse_id), 'error': str(exc)}
+        return {**ctx, 'warehouse_id': str(warehouse_id), 'generated': created}
+    return ctx
+
+@login_required
+@require_POST
+@htmx_view('warehouse/pages/zones_setup.html', 'warehouse/partials/zones_setup_content.html')
+def zones_import(request):
+    """Upsert zones by ``(warehouse, code)`` from an uploaded CSV."""
+    hub_id = request.session.get('hub_id')
+    warehouse_id = _get_hub_warehouse_id(hub_id, request.POST.get('warehouse'))
+    ctx = _zone_form_context(hub_id, warehouse_id=str(warehouse_id or ''))
+    upload = request.FILES.get('file')
+    if upload is None:
+        return {**ctx, 'error': _('Select a CSV file.')}
+    try:
+        rows = csv.DictReader(io.TextIOWrapper(upload.file, encoding='utf-8-sig'))
+        created, updated, errors = services.upsert_zones(hub_id, rows, warehouse_id=warehouse_id)
+    except (UnicodeDecodeError, csv.Error):
+        return {**ctx, 'error': _('Invalid CSV file.')}
+    return {**ctx, 'imported': {'created': created, 'updated': updated, 'errors': errors[:100], 'error_count': len(errors)}}
+
+@login_required
+def zone_search(request):
+    """Type-ahead zone picker results, served from the cached zone directory."""
+    hub_id = request.session.get('hub_id')
+    warehouse_id = request.GET.get('warehouse', '').strip() or None
+    return django_render(request, 'warehouse/partials/zone_search_results.html', {
+        'results': services.search_zones(hub_id, request.GET.get('zone_q', request.GET.get('q', '')), warehouse_id=warehouse_id),
+    })
+
+# ======================================================================
+# StockMovement
+# ======================================================================
+
+STOCK_MOVEMENT_ROW_TEMPLATE = 'warehouse/partials/stock_movement_row.html'
+
 def _build_stock_movements_context(hub_id, per_page=10):
-    qs = StockMovement.objects.filter(hub_id=hub_id, is_deleted=False).order_by('reference')
+    qs = queries.stock_movement_rows(hub_id).order_by('reference', 'id')
     paginator = Paginator(qs, per_page if per_page > 0 else max(qs.count(), 1))
     page_obj = paginator.get_page(1)
     return {
@@ -210,77 +553,184 @@ def _build_stock_movements_context(hub_id, per_page=10):
         'per_page': per_page,
     }
 
+# Sort keys of a page that spans the hot and archive tables: plain columns of both.
+STOCK_MOVEMENT_ARCHIVE_SORT_FIELDS = ('reference', 'movement_type', 'status', 'quantity', 'created_at')
+
+def _archived_stock_movements_queryset(hub_id, search_query='', filters=None, facets=True):
+    qs = queries.filter_stock_movements(StockMovementArchive.objects.filter(hub_id=hub_id, is_deleted=False), hub_id, filters or {}, facets)
+    if search_query:
+        qs = search_archived_movements(qs, search_query)
+    return qs
+
+def _stock_movement_facets(hub_id, search_query, filters, with_archive):
+    """Facet counts for the filter bar: one grouped query per table, cached per hub."""
+    base = queries.filter_stock_movements(StockMovement.objects.filter(hub_id=hub_id, is_deleted=False), hub_id, filters, facets=False)
+    if search_query:
+        base = search_stock_movements(base, search_query)
+    state = (search_query, filters.get('date_from'), filters.get('date_to'), filters.get('zone'))
+    rows = services.movement_facet_rows(hub_id, base, state)
+    if with_archive:
+        archived = _archived_stock_movements_queryset(hub_id, search_query, filters, facets=False)
+        rows = rows + services.movement_facet_rows(hub_id, archived, ('archive', *state))
+    counts = services.movement_facets(
+        rows, filters.get('movement_type'), filters.get('status'), filters.get('warehouse'),
+    )
+    return {
+        'movement_type': [(value, label, counts['movement_type'].get(value, 0)) for value, label in MOVEMENT_TYPE],
+        'status': [(value, label, counts['status'].get(value, 0)) for value, label in MOVEMENT_STATUS],
+        'warehouse': [
+            (str(w.pk), w.name, counts['warehouse'].get(str(w.pk), 0))
+            for w in queries.hub_warehouses(hub_id)
+        ],
+    }
+
+def _stock_movements_with_archive_page(hub_id, search_query, sort_field, sort_dir, filters, per_page, page_number):
+    """
+    Page over hot and archived movements, for a date range that reaches the archive.
+
+    The union only carries ids and the sort key; the rows of the page are then
+    loaded from their own table.
+    """
+    key = sort_field if sort_field in STOCK_MOVEMENT_ARCHIVE_SORT_FIELDS else 'created_at'
+    hot = queries.stock_movements_queryset(hub_id, search_query, filters=filters)
+    archived = _archived_stock_movements_queryset(hub_id, search_query, filters)
+    rows = (
+        hot.order_by().annotate(archived=Value(False, output_field=BooleanField())).values_list('id', key, 'archived')
+        .union(
+            archived.order_by().annotate(archived=Value(True, output_field=BooleanField())).values_list('id', key, 'archived'),
+            all=True,
+        )
+        .order_by(*((f'-{key}', '-id') if sort_dir == 'desc' else (key, 'id')))
+    )
+    paginator = Paginator(rows, per_page if per_page > 0 else max(rows.count(), 1))
+    page_obj = paginator.get_page(page_number)
+    ids = {True: [], False: []}
+    for pk, _value, is_archived in page_obj.object_list:
+        ids[bool(is_archived)].append(pk)
+    loaded = {
+        **queries.stock_movement_rows(hub_id).in_bulk(ids[False]),
+        **StockMovementArchive.objects.select_related(
+            'source_zone', 'source_zone__warehouse', 'dest_zone', 'dest_zone__warehouse',
+        ).in_bulk(ids[True]),
+    }
+    page_obj.object_list = [loaded[pk] for pk, _value, _archived in page_obj.object_list if pk in loaded]
+    return page_obj
+
+def _stock_movement_filter_context(request, hub_id, search_query, filters, with_archive):
+    """Filter bar context of the movements list: facet counts and selected values."""
+    directory = services.zone_directory(hub_id)
+    return {
+        'facets': _stock_movement_facets(hub_id, search_query, filters, with_archive),
+        'selected_type': filters.get('movement_type', ''), 'selected_status': filters.get('status', ''),
+        'selected_warehouse': filters.get('warehouse', ''),
+        'filter_zone': services.zone_index(hub_id, directory).get(filters['zone']) if filters.get('zone') else None,
+        'filter_zones': directory if len(directory) <= ZONE_SELECT_MAX else None,
+        'date_from': request.GET.get('from', ''), 'date_to': request.GET.get('to', ''),
+    }
+
 def _render_stock_movements_list(request, hub_id, per_page=10):
     ctx = _build_stock_movements_context(hub_id, per_page)
     return django_render(request, 'warehouse/partials/stock_movements_list.html', ctx)
 
+# Above this many zones the movement forms use the type-ahead picker instead of a select.
+ZONE_SELECT_MAX = 500
+
+def _get_hub_zone_id(zones, value):
+    """Resolve a posted zone id to a zone of this hub (``zones`` from ``services.zone_index``), or None."""
+    entry = zones.get((value or '').strip())
+    return entry['id'] if entry else None
+
+def _stock_movement_form_context(hub_id, obj=None):
+    directory = services.zone_directory(hub_id)
+    ctx = {
+        'zones': directory if len(directory) <= ZONE_SELECT_MAX else None,
+        'movement_types': MOVEMENT_TYPE, 'statuses': MOVEMENT_STATUS,
+    }
+    if obj is not None:
+        ctx['obj'] = obj
+        index = services.zone_index(hub_id, directory)
+        ctx['source_zone'] = services.zone_entry(hub_id, obj.source_zone_id, index)
+        ctx['dest_zone'] = services.zone_entry(hub_id, obj.dest_zone_id, index)
+        allowed = STATUS_TRANSITIONS.get(obj.status, ())
+        ctx['statuses'] = [(value, label) for value, label in MOVEMENT_STATUS if value == obj.status or value in allowed]
+    else:
+        ctx['idempotency_key'] = uuid.uuid4().hex
+    return ctx
+
+def _stock_movement_values(request, hub_id):
+    zones = services.zone_index(hub_id)
+    return {
+        'reference': request.POST.get('reference', '').strip(),
+        'movement_type': request.POST.get('movement_type', '').strip(),
+        'source_zone_id': _get_hub_zone_id(zones, request.POST.get('source_zone')),
+        'dest_zone_id': _get_hub_zone_id(zones, request.POST.get('dest_zone')),
+        'quantity': request.POST.get('quantity', '0') or '0',
+        'notes': request.POST.get('notes', '').strip(),
+        'status': request.POST.get('status', '').strip(),
+    }
+
 @login_required
+@instrumented('stock_movements_list')
+@hub_cached('stock_movements_list')
 @with_module_nav('warehouse', 'warehouses')
 @htmx_view('warehouse/pages/stock_movements.html', 'warehouse/partials/stock_movements_content.html')
 def stock_movements_list(request):
     hub_id = request.session.get('hub_id')
-    search_query = request.GET.get('q', '').strip()
-    sort_field = request.GET.get('sort', 'reference')
-    sort_dir = request.GET.get('dir', 'asc')
-    page_number = request.GET.get('page', 1)
-    current_view = request.GET.get('view', 'table')
-    per_page = int(request.GET.get('per_page', 12))
-    if per_page not in PER_PAGE_CHOICES:
-        per_page = 12
-
-    qs = StockMovement.objects.filter(hub_id=hub_id, is_deleted=False)
-
-    if search_query:
-        qs = qs.filter(Q(reference__icontains=search_query) | Q(movement_type__icontains=search_query) | Q(notes__icontains=search_query) | Q(status__icontains=search_query))
+    search_query, sort_field, sort_dir, cursor, page_number, current_view, per_page = _list_params(request, '')
 
-    order_by = STOCK_MOVEMENT_SORT_FIELDS.get(sort_field, 'reference')
-    if sort_dir == 'desc':
-        order_by = f'-{order_by}'
-    qs = qs.order_by(order_by)
+    sort_field = queries.stock_movement_sort(search_query, sort_field)
+    filters = queries.stock_movement_filters(hub_id, request.GET)
+    qs = queries.stock_movements_queryset(hub_id, search_query, sort_field, sort_dir, filters)
 
     export_format = request.GET.get('export')
     if export_format in ('csv', 'excel'):
-        fields = ['reference', 'movement_type', 'source_zone', 'dest_zone', 'status', 'quantity']
-        headers = ['Reference', 'Movement Type', 'Zone', 'Zone', 'Status', 'Quantity']
-        if export_format == 'csv':
-            return export_to_csv(qs, fields=fields, headers=headers, filename='stock_movements.csv')
-        return export_to_excel(qs, fields=fields, headers=headers, filename='stock_movements.xlsx')
-
-    paginator = Paginator(qs, per_page if per_page > 0 else max(qs.count(), 1))
-    page_obj = paginator.get_page(page_number)
-
-    if request.htmx and request.htmx.target == 'datatable-body':
-        return django_render(request, 'warehouse/partials/stock_movements_list.html', {
-            'stock_movements': page_obj, 'page_obj': page_obj,
-            'search_query': search_query, 'sort_field': sort_field,
-            'sort_dir': sort_dir, 'current_view': current_view, 'per_page': per_page,
-        })
-
-    return {
+        set_branch(f'export_{export_format}')
+        return stream_export(qs, STOCK_MOVEMENT_EXPORT_COLUMNS, export_format, 'stock_movements')
+
+    paginate_mode = request.GET.get('paginate', '')
+    with_archive = services.reaches_archive(hub_id, filters.get('date_from'), filters.get('date_to'))
+    if with_archive:
+        set_branch('archive')
+        page_obj = _stock_movements_with_archive_page(
+            hub_id, search_query, sort_field, sort_dir, filters, per_page, page_number,
+        )
+    elif paginate_mode == 'cursor' and sort_field in STOCK_MOVEMENT_KEYSET_FIELDS:
+        page_obj = keyset_paginate(
+            qs, queries.STOCK_MOVEMENT_SORT_FIELDS[sort_field], sort_dir == 'desc',
+            cursor=cursor, per_page=per_page,
+            estimate=request.GET.get('estimate') == '1',
+        )
+    else:
+        paginator = Paginator(qs, per_page if per_page > 0 else max(qs.count(), 1))
+        page_obj = paginator.get_page(page_number)
+
+    record_rows(len(page_obj))
+    ctx = {
         'stock_movements': page_obj, 'page_obj': page_obj,
-        'search_query': search_query, 'sort_field': sort_field,
+        'search_query': search_query, 'sort_field': sort_field, 'sort_param': request.GET.get('sort', ''),
         'sort_dir': sort_dir, 'current_view': current_view, 'per_page': per_page,
+        'paginate_mode': paginate_mode, 'estimate': request.GET.get('estimate', ''),
+        **_stock_movement_filter_context(request, hub_id, search_query, filters, with_archive),
     }
+    if request.htmx and request.htmx.target == 'datatable-body':
+        set_branch('rows')
+        # The filter bar sits outside the rows; refresh its counts out of band.
+        return django_render(request, 'warehouse/partials/stock_movements_list.html', {**ctx, 'facets_oob': True})
+
+    return ctx
 
 @login_required
 @htmx_view('warehouse/pages/stock_movement_add.html', 'warehouse/partials/stock_movement_add_content.html')
 def stock_movement_add(request):
     hub_id = request.session.get('hub_id')
     if request.method == 'POST':
-        reference = request.POST.get('reference', '').strip()
-        movement_type = request.POST.get('movement_type', '').strip()
-        quantity = request.POST.get('quantity', '0') or '0'
-        notes = request.POST.get('notes', '').strip()
-        status = request.POST.get('status', '').strip()
-        obj = StockMovement(hub_id=hub_id)
-        obj.reference = reference
-        obj.movement_type = movement_type
-        obj.quantity = quantity
-        obj.notes = notes
-        obj.status = status
-        obj.save()
+        idempotency_key = request.POST.get('idempotency_key', '')
+        try:
+            services.post_movement(hub_id, _stock_movement_values(request, hub_id), idempotency_key=idempotency_key)
+        except services.PostingError as exc:
+            return {**_stock_movement_form_context(hub_id), 'idempotency_key': idempotency_key, 'error': str(exc)}
         return _render_stock_movements_list(request, hub_id)
-    return {}
+    return _stock_movement_form_context(hub_id)
 
 @login_required
 @htmx_view('warehouse/pages/stock_movement_edit.html', 'warehouse/partials/stock_movement_edit_content.html')
@@ -288,36 +738,220 @@ def stock_movement_edit(request, pk):
     hub_id = request.session.get('hub_id')
     obj = get_object_or_404(StockMovement, pk=pk, hub_id=hub_id, is_deleted=False)
     if request.method == 'POST':
-        obj.reference = request.POST.get('reference', '').strip()
-        obj.movement_type = request.POST.get('movement_type', '').strip()
-        obj.quantity = request.POST.get('quantity', '0') or '0'
-        obj.notes = request.POST.get('notes', '').strip()
-        obj.status = request.POST.get('status', '').strip()
-        obj.save()
+        try:
+            services.post_movement(hub_id, _stock_movement_values(request, hub_id), pk=obj.pk)
+        except services.PostingError as exc:
+            return {**_stock_movement_form_context(hub_id, obj), 'error': str(exc)}
         return _render_stock_movements_list(request, hub_id)
-    return {'obj': obj}
+    return _stock_movement_form_context(hub_id, obj)
 
 @login_required
 @require_POST
 def stock_movement_delete(request, pk):
     hub_id = request.session.get('hub_id')
-    obj = get_object_or_404(StockMovement, pk=pk, hub_id=hub_id, is_deleted=False)
-    obj.is_deleted = True
-    obj.deleted_at = timezone.now()
-    obj.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
+    with transaction.atomic():
+        # The row lock makes a concurrent delete of the same movement wait, then 404.
+        obj = get_object_or_404(StockMovement.objects.select_for_update(), pk=pk, hub_id=hub_id, is_deleted=False)
+        obj.is_deleted = True
+        obj.deleted_at = timezone.now()
+        obj.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
+        services.apply_movement_changes(hub_id, removed=[obj])
+    if _rows_on_screen(request) is not None:
+        return _oob_rows_response(request, STOCK_MOVEMENT_ROW_TEMPLATE, 'stock-movement-row', 'stock-movements', removed=[obj.pk])
     return _render_stock_movements_list(request, hub_id)
 
 @login_required
+@instrumented('stock_movements_bulk_action')
 @require_POST
 def stock_movements_bulk_action(request):
     hub_id = request.session.get('hub_id')
     ids = [i.strip() for i in request.POST.get('ids', '').split(',') if i.strip()]
     action = request.POST.get('action', '')
     qs = StockMovement.objects.filter(hub_id=hub_id, is_deleted=False, id__in=ids)
+    oob = _rows_on_screen(request) is not None
     if action == 'delete':
-        qs.update(is_deleted=True, deleted_at=timezone.now())
+        with transaction.atomic():
+            removed = list(qs.select_for_update().only(*services.SNAPSHOT_FIELDS))
+            StockMovement.objects.filter(pk__in=[m.pk for m in removed]).update(is_deleted=True, deleted_at=timezone.now())
+            services.apply_movement_changes(hub_id, removed=removed)
+        if oob:
+            return _oob_rows_response(
+                request, STOCK_MOVEMENT_ROW_TEMPLATE, 'stock-movement-row', 'stock-movements', removed=[m.pk for m in removed],
+            )
+    elif action in STOCK_MOVEMENT_STATUS_ACTIONS:
+        services.transition_movements(hub_id, ids, STOCK_MOVEMENT_STATUS_ACTIONS[action])
+        if oob:
+            # Rows may leave a status filter or move in a status sort; reload the page then.
+            refresh = bool(request.POST.get('status')) or request.POST.get('sort') == 'status'
+            updated = queries.stock_movement_rows(hub_id).filter(pk__in=ids)
+            return _oob_rows_response(
+                request, STOCK_MOVEMENT_ROW_TEMPLATE, 'stock-movement-row', 'stock-movements',
+                updated=[] if refresh else list(updated), refresh=refresh,
+            )
     return _render_stock_movements_list(request, hub_id)
 
+@login_required
+@instrumented('stock_movements_ingest')
+@require_POST
+def stock_movements_ingest(request):
+    """
+    Batch movement ingestion for scanners and external WMS.
+
+    Accepts a JSON body (``{"movements": [...], "all_or_nothing": false}`` or a
+    bare list) or a CSV upload in ``file``. Zones may be given by id or code.
+    """
+    hub_id = request.session.get('hub_id')
+    try:
+        if request.content_type == 'application/json':
+            payload = json.loads(request.body or b'null')
+            all_or_nothing = False
+            if isinstance(payload, dict):
+                all_or_nothing = bool(payload.get('all_or_nothing', False))
+                payload = payload.get('movements')
+            if not isinstance(payload, list) or not all(isinstance(r, dict) for r in payload):
+                raise ValueError
+            rows = payload
+        else:
+            upload = request.FILES.get('file')
+            if upload is None:
+                raise ValueError
+            all_or_nothing = request.POST.get('all_or_nothing') in ('1', 'true', 'on')
+            rows = list(csv.DictReader(io.TextIOWrapper(upload.file, encoding='utf-8-sig')))
+    except (ValueError, UnicodeDecodeError, csv.Error):
+        return JsonResponse({'error': str(_('Invalid payload.'))}, status=400)
+    if len(rows) > services.INGEST_MAX_ROWS:
+        return JsonResponse({'error': str(_('Too many rows in one batch.'))}, status=400)
+
+    movements, errors = services.ingest_movements(hub_id, rows, all_or_nothing=all_or_nothing)
+    return JsonResponse({
+        'created': len(movements),
+        'ids': [str(m.pk) for m in movements],
+        'errors': errors,
+    }, status=200 if movements or not errors else 400)
+
+@login_required
+@htmx_view('warehouse/pages/stock_movements_import.html', 'warehouse/partials/stock_movements_import_content.html')
+def stock_movements_import(request):
+    """Queue a bulk movement import from a CSV or xlsx file; the page polls the job."""
+    hub_id = request.session.get('hub_id')
+    if request.method != 'POST':
+        return {}
+    upload = request.FILES.get('file')
+    if upload is None:
+        return {'error': _('Select a CSV or Excel file.')}
+    return {'job': import_jobs.enqueue_import(hub_id, upload, user_id=request.session.get('local_user_id'))}
+
+def _user_import_jobs(request):
+    """Import jobs of the current user in the current hub."""
+    return ImportJob.objects.filter(
+        hub_id=request.session.get('hub_id'), created_by=request.session.get('local_user_id'),
+    )
+
+@login_required
+def import_job_status(request, pk):
+    """Progress and result of one import; the partial keeps polling until the job finishes."""
+    job = get_object_or_404(_user_import_jobs(request), pk=pk)
+    return django_render(request, 'warehouse/partials/import_job_status.html', {'job': job})
+
+@login_required
+def import_job_rejected(request, pk):
+    """CSV report of the rows an import rejected."""
+    job = get_object_or_404(_user_import_jobs(request), pk=pk)
+    if not job.rejected_file:
+        raise Http404
+    return FileResponse(job.rejected_file.open('rb'), as_attachment=True, filename=job.rejected_file.name.rsplit('/', 1)[-1])
+
+
+# ======================================================================
+# Export jobs
+# ======================================================================
+
+EXPORT_JOBS_LIST_LIMIT = 20
+
+def _user_export_jobs(request):
+    """Export jobs of the current user in the current hub."""
+    return ExportJob.objects.filter(
+        hub_id=request.session.get('hub_id'), created_by=request.session.get('local_user_id'),
+    )
+
+@login_required
+@with_module_nav('warehouse', 'warehouses')
+@htmx_view('warehouse/pages/exports.html', 'warehouse/partials/exports_content.html')
+def export_jobs_list(request):
+    """The current user's recent exports, newest first."""
+    return {
+        'jobs': _user_export_jobs(request).order_by('-created_at')[:EXPORT_JOBS_LIST_LIMIT],
+        'retention_days': export_jobs.EXPORT_RETENTION_DAYS,
+    }
+
+@login_required
+@require_POST
+def export_job_create(request):
+    """Queue an export of a datatable with its current search and sort."""
+    hub_id = request.session.get('hub_id')
+    try:
+        job = export_jobs.enqueue_export(
+            hub_id, request.POST.get('kind', ''), request.POST.get('format', ''),
+            export_jobs.export_params(request.POST), user_id=request.session.get('local_user_id'),
+        )
+    except ValueError:
+        return HttpResponse(status=400)
+    return django_render(request, 'warehouse/partials/export_job_status.html', {'job': job})
+
+@login_required
+def export_job_status(request, pk):
+    """Progress of one job; the partial keeps polling until the job finishes."""
+    job = get_object_or_404(_user_export_jobs(request), pk=pk)
+    return django_render(request, 'warehouse/partials/export_job_status.html', {'job': job})
+
+@login_required
+def export_job_download(request, pk):
+    job = get_object_or_404(_user_export_jobs(request), pk=pk)
+    if job.status != 'done' or not job.file:
+        raise Http404
+    return FileResponse(job.file.open('rb'), as_attachment=True, filename=job.file.name.rsplit('/', 1)[-1])
+
+
+# ======================================================================
+# Reports
+# ======================================================================
+
+REPORT_RANGES = {'7': 7, '30': 30, '90': 90, '365': 365}
+
+@login_required
+@instrumented('reports')
+@with_module_nav('warehouse', 'reports')
+@htmx_view('warehouse/pages/reports.html', 'warehouse/partials/reports_content.html')
+def reports(request):
+    """Throughput report served entirely from the movement rollup tables."""
+    hub_id = request.session.get('hub_id')
+    period = request.GET.get('period', 'day')
+    if period not in ('day', 'hour'):
+        period = 'day'
+    range_key = request.GET.get('range', '30')
+    if range_key not in REPORT_RANGES:
+        range_key = '30'
+    warehouse_id = request.GET.get('warehouse', '').strip()
+    try:
+        warehouse_id = uuid.UUID(warehouse_id) if warehouse_id else None
+    except ValueError:
+        warehouse_id = None
+
+    start = services.truncate_bucket(timezone.now() - datetime.timedelta(days=REPORT_RANGES[range_key]), period)
+    series = services.throughput_report(hub_id, period=period, start=start, warehouse_id=warehouse_id)
+    max_quantity = max([max(r['in_quantity'], r['out_quantity']) for r in series] or [0])
+    return {
+        'series': series,
+        'period': period,
+        'range_key': range_key,
+        'range_choices': list(REPORT_RANGES),
+        'warehouse_id': warehouse_id,
+        'warehouses': Warehouse.objects.filter(hub_id=hub_id, is_deleted=False).values('id', 'name').order_by('name'),
+        'max_quantity': max_quantity or 1,
+        'total_in': sum((r['in_quantity'] for r in series), 0),
+        'total_out': sum((r['out_quantity'] for r in series), 0),
+    }
+
 
 @login_required
 @permission_required('warehouse.manage_settings')